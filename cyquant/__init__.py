@@ -1,12 +1,16 @@
 from .dimensions import Dimensions
-from .quantities import Quantity, SIUnit
+from .quantities import Quantity, QuantityArray, SIUnit, UnitConverter
 from .util import converter
+from .parsing import parse_unit
 
 
 __all__ = (
     "Dimensions",
     "SIUnit",
     "Quantity",
+    "QuantityArray",
+    "UnitConverter",
     "si",
-    "converter"
+    "converter",
+    "parse_unit",
 )
\ No newline at end of file
@@ -0,0 +1,189 @@
+"""
+Micro benchmarks for cyquant
+
+Benchmarks register themselves with the `benchmark` decorator. A benchmark
+is a setup function returning the zero argument callable to be timed, so
+that only the operation itself is measured. Setup functions may raise
+`Skip` (e.g. when an optional dependency is missing).
+
+    python -m cyquant.bench --json before.json
+    python -m cyquant.bench --json after.json
+    python -m cyquant.bench --compare before.json after.json
+
+With `--allocations`, each benchmark also reports the bytes it draws from
+the allocator per call, traced with tracemalloc. Objects recycled from
+free-lists never reach the allocator, so they do not count.
+"""
+
+import json
+import platform
+import statistics
+import sys
+import time
+import timeit
+import tracemalloc
+
+FORMAT_VERSION = 1
+
+BENCHMARKS = {}
+
+
+class Skip(Exception):
+    pass
+
+
+def benchmark(group, name=None):
+    def register(setup):
+        key = "%s.%s" % (group, name or setup.__name__)
+        if key in BENCHMARKS:
+            raise ValueError("duplicate benchmark '%s'" % key)
+        BENCHMARKS[key] = setup
+        return setup
+    return register
+
+
+def requires(module_name):
+    try:
+        return __import__(module_name)
+    except ImportError:
+        raise Skip("%s is not installed" % module_name)
+
+
+def load():
+    from cyquant.bench import suites
+    return BENCHMARKS
+
+
+def package_version():
+    try:
+        from importlib.metadata import version
+        return version("cyquant")
+    except Exception:
+        return None
+
+
+def time_callable(func, repeat=5, min_time=0.05):
+    timer = timeit.Timer(func)
+    loops = 1
+    while True:
+        elapsed = timer.timeit(number=loops)
+        if elapsed >= min_time / 10:
+            break
+        loops *= 10
+    loops = max(1, int(loops * min_time / elapsed))
+    times = [elapsed / loops for elapsed in timer.repeat(repeat=repeat, number=loops)]
+    return {
+        "loops": loops,
+        "repeat": repeat,
+        "best": min(times),
+        "mean": statistics.mean(times),
+        "stdev": statistics.stdev(times) if len(times) > 1 else 0.0,
+    }
+
+
+def trace_allocations(func, loops=1000):
+    """
+    Average peak number of bytes `func` holds from the allocator per call,
+    over `loops` calls after a warm up call.
+    """
+    func()
+    tracemalloc.start()
+    try:
+        total = 0
+        for _ in range(loops):
+            tracemalloc.reset_peak()
+            current = tracemalloc.get_traced_memory()[0]
+            func()
+            total += tracemalloc.get_traced_memory()[1] - current
+    finally:
+        tracemalloc.stop()
+    return total / loops
+
+
+def run(patterns=(), repeat=5, min_time=0.05, stream=None, allocations=False):
+    results = {}
+    skipped = {}
+    for key, setup in sorted(load().items()):
+        if patterns and not any(pattern in key for pattern in patterns):
+            continue
+        try:
+            func = setup()
+        except Skip as e:
+            skipped[key] = str(e)
+            continue
+        results[key] = time_callable(func, repeat=repeat, min_time=min_time)
+        if allocations:
+            results[key]["allocated"] = trace_allocations(func)
+        if stream is not None:
+            stream.write("%-48s %12s%s\n" % (key, format_time(results[key]["best"]), format_allocated(results[key])))
+            stream.flush()
+
+    return {
+        "version": FORMAT_VERSION,
+        "created": time.time(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cyquant": package_version(),
+        "results": results,
+        "skipped": skipped,
+    }
+
+
+def compare(old, new, threshold=0.10):
+    """
+    Compares the best times of two `run` reports.
+
+    Returns a list of (name, old_best, new_best, ratio, status) rows, where
+    status is one of 'slower', 'faster', 'same', 'added' or 'removed'.
+    """
+    for report in (old, new):
+        if report.get("version") != FORMAT_VERSION:
+            raise ValueError("unsupported benchmark report version: %r" % report.get("version"))
+
+    old_results = old["results"]
+    new_results = new["results"]
+    rows = []
+    for key in sorted(set(old_results) | set(new_results)):
+        if key not in new_results:
+            rows.append((key, old_results[key]["best"], None, None, "removed"))
+            continue
+        if key not in old_results:
+            rows.append((key, None, new_results[key]["best"], None, "added"))
+            continue
+
+        old_best = old_results[key]["best"]
+        new_best = new_results[key]["best"]
+        ratio = new_best / old_best if old_best else float("inf")
+        if ratio > 1 + threshold:
+            status = "slower"
+        elif ratio < 1 - threshold:
+            status = "faster"
+        else:
+            status = "same"
+        rows.append((key, old_best, new_best, ratio, status))
+    return rows
+
+
+def format_time(seconds):
+    if seconds is None:
+        return "-"
+    for unit, scale in (("s", 1.0), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return "%.3f %s" % (seconds / scale, unit)
+    return "%.1f ns" % (seconds / 1e-9)
+
+
+def format_allocated(result):
+    if result is None or "allocated" not in result:
+        return ""
+    return " %10.1f B" % result["allocated"]
+
+
+def load_report(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_report(report, path):
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
@@ -0,0 +1,59 @@
+import argparse
+import sys
+
+from cyquant import bench
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m cyquant.bench", description="cyquant micro benchmarks")
+    parser.add_argument("-k", dest="patterns", action="append", default=[],
+                        help="only run benchmarks whose name contains PATTERN (repeatable)")
+    parser.add_argument("--repeat", type=int, default=5, help="timing repeats per benchmark")
+    parser.add_argument("--min-time", type=float, default=0.05, help="approximate seconds per repeat")
+    parser.add_argument("--threads", type=int,
+                        help="threads large array operations are split across (0: one per cpu)")
+    parser.add_argument("--allocations", action="store_true",
+                        help="also report the bytes drawn from the allocator per call")
+    parser.add_argument("--json", dest="output", help="write the results to this file")
+    parser.add_argument("--list", action="store_true", help="list benchmark names and exit")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"),
+                        help="compare two result files instead of running")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="relative change reported as slower/faster (default 0.10)")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        old, new = bench.load_report(args.compare[0]), bench.load_report(args.compare[1])
+        rows = bench.compare(old, new, args.threshold)
+        for key, old_best, new_best, ratio, status in rows:
+            print("%-48s %12s %12s %8s  %-7s%s%s" % (
+                key,
+                bench.format_time(old_best),
+                bench.format_time(new_best),
+                "-" if ratio is None else "%.2fx" % ratio,
+                status,
+                bench.format_allocated(old["results"].get(key)),
+                bench.format_allocated(new["results"].get(key)),
+            ))
+        return 1 if any(row[4] == "slower" for row in rows) else 0
+
+    if args.list:
+        for key in sorted(bench.load()):
+            print(key)
+        return 0
+
+    if args.threads is not None:
+        from cyquant import parallel
+        parallel.set_threads(args.threads)
+
+    report = bench.run(args.patterns, repeat=args.repeat, min_time=args.min_time, stream=sys.stdout,
+                       allocations=args.allocations)
+    for key, reason in sorted(report["skipped"].items()):
+        print("%-48s %12s  (%s)" % (key, "skipped", reason))
+    if args.output:
+        bench.save_report(report, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
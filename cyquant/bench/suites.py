@@ -0,0 +1,467 @@
+import array
+
+from cyquant import si, lazy, qmath, shared, sorting, util
+from cyquant import Quantity, QuantityArray
+from cyquant.bench import benchmark, requires
+
+ARRAY_SIZE = 1000
+
+"""
+Construction
+"""
+
+@benchmark("construct")
+def quantity_init():
+    return lambda: Quantity(1.5, si.meters)
+
+@benchmark("construct")
+def unit_mul():
+    return lambda: 1.5 * si.meters
+
+@benchmark("construct")
+def promote():
+    promote = si.meters.promote
+    return lambda: promote(1.5)
+
+@benchmark("construct")
+def promote_mpf():
+    mp = requires("mpmath").mp
+    value = mp.mpf(1.5)
+    promote = si.meters.promote
+    return lambda: promote(value)
+
+@benchmark("construct")
+def promote_buffer():
+    values = array.array('d', range(1, ARRAY_SIZE + 1))
+    promote_buffer = si.meters.promote_buffer
+    return lambda: promote_buffer(values)
+
+"""
+Arithmetic
+"""
+
+def _scalars():
+    return 1.5 * si.meters, 250 * si.millimeters
+
+def _mpfs():
+    mp = requires("mpmath").mp
+    return mp.mpf(1.5) * si.meters, mp.mpf(250) * si.millimeters
+
+def _ndarrays():
+    np = requires("numpy")
+    return np.arange(1, ARRAY_SIZE + 1, dtype=float) * si.meters, np.arange(1, ARRAY_SIZE + 1, dtype=float) * si.millimeters
+
+def _qarrays():
+    return (
+        QuantityArray(array.array('d', range(1, ARRAY_SIZE + 1)), si.meters),
+        QuantityArray(array.array('d', range(1, ARRAY_SIZE + 1)), si.millimeters),
+    )
+
+for _kind, _make in (("scalar", _scalars), ("mpf", _mpfs), ("ndarray", _ndarrays), ("qarray", _qarrays)):
+    def _add(make=_make):
+        x, y = make()
+        return lambda: x + y
+
+    def _sub(make=_make):
+        x, y = make()
+        return lambda: x - y
+
+    def _mul(make=_make):
+        x, y = make()
+        return lambda: x * y
+
+    def _div(make=_make):
+        x, y = make()
+        return lambda: x / y
+
+    def _scale(make=_make):
+        x, _ = make()
+        return lambda: x * 2.5
+
+    benchmark("arith", "%s_add" % _kind)(_add)
+    benchmark("arith", "%s_sub" % _kind)(_sub)
+    benchmark("arith", "%s_mul" % _kind)(_mul)
+    benchmark("arith", "%s_div" % _kind)(_div)
+    benchmark("arith", "%s_scale" % _kind)(_scale)
+
+"""
+Allocation
+
+Chains of scalar operations whose intermediate results are discarded
+immediately, so the timings are dominated by object allocation. Run with
+--allocations to see the bytes they still draw from the allocator; the
+free-lists of Quantity, SIUnit and Dimensions keep these at zero.
+"""
+
+@benchmark("alloc")
+def scalar_chain():
+    x, y = _scalars()
+    z = 2.0 * si.seconds
+    return lambda: (x * y + x * x) / z - y * y / z
+
+@benchmark("alloc")
+def unit_chain():
+    m, kg, s = si.meters, si.kilograms, si.seconds
+    return lambda: m * kg / s / s * m / kg
+
+@benchmark("alloc")
+def dimensions_chain():
+    m, kg, s = si.meters.dimensions, si.kilograms.dimensions, si.seconds.dimensions
+    return lambda: m * kg / s / s * m / kg
+
+@benchmark("alloc")
+def units_property():
+    x, _ = _scalars()
+    return lambda: x.units.dimensions
+
+"""
+Conversion
+"""
+
+@benchmark("convert")
+def cvt_to():
+    x = 1.5 * si.meters
+    return lambda: x.cvt_to(si.millimeters)
+
+@benchmark("convert")
+def get_as():
+    x = 1.5 * si.meters
+    return lambda: x.get_as(si.millimeters)
+
+@benchmark("convert")
+def get_as_mpf():
+    x, _ = _mpfs()
+    return lambda: x.get_as(si.millimeters)
+
+@benchmark("convert")
+def demote():
+    x = 1.5 * si.meters
+    demote = si.millimeters.demote
+    return lambda: demote(x)
+
+@benchmark("convert")
+def qarray_get_as():
+    x, _ = _qarrays()
+    return lambda: x.get_as(si.millimeters)
+
+"""
+Comparison
+"""
+
+@benchmark("compare")
+def eq():
+    x, y = _scalars()
+    return lambda: x == y
+
+@benchmark("compare")
+def lt():
+    x, y = _scalars()
+    return lambda: x < y
+
+@benchmark("compare")
+def eq_mpf():
+    x, y = _mpfs()
+    return lambda: x == y
+
+@benchmark("compare")
+def unit_eq():
+    x = si.kilonewtons
+    y = si.meters * si.kilograms / si.seconds ** 2
+    return lambda: x == y
+
+@benchmark("compare")
+def unit_hash():
+    return lambda: hash(si.kilonewtons)
+
+@benchmark("compare")
+def qarray_lt():
+    x, y = _qarrays()
+    return lambda: x < y
+
+@benchmark("compare")
+def sort_list():
+    values = [float((i * 7919) % ARRAY_SIZE) * si.meters for i in range(ARRAY_SIZE)]
+    return lambda: sorted(values)
+
+@benchmark("compare")
+def sort_list_key():
+    values = [float((i * 7919) % ARRAY_SIZE) * si.meters for i in range(ARRAY_SIZE)]
+    return lambda: sorted(values, key=sorting.sort_key(si.meters))
+
+@benchmark("compare")
+def sorted_irange():
+    table = sorting.SortedQuantities(float(i) * si.meters for i in range(ARRAY_SIZE))
+    lo, hi = 100 * si.meters, 200000 * si.millimeters
+    return lambda: table.irange(lo, hi)
+
+"""
+Approximation
+"""
+
+@benchmark("approx")
+def index_within():
+    index = sorting.ApproxIndex(1 * si.millimeters)
+    index.update(float(i) * si.millimeters for i in range(ARRAY_SIZE))
+    x = 500.5 * si.millimeters
+    return lambda: index.within(x)
+
+@benchmark("approx")
+def index_nearest():
+    index = sorting.ApproxIndex(1 * si.millimeters)
+    index.update(float(i) * si.millimeters for i in range(ARRAY_SIZE))
+    x = 500.25 * si.millimeters
+    return lambda: index.nearest(x)
+
+@benchmark("approx")
+def linear_q_approx():
+    values = [float(i) * si.millimeters for i in range(ARRAY_SIZE)]
+    x = 500.5 * si.millimeters
+    tol = 1 * si.millimeters
+    return lambda: [v for v in values if v.q_approx(x, tol)]
+
+@benchmark("approx")
+def r_approx():
+    x, y = _scalars()
+    return lambda: x.r_approx(y)
+
+@benchmark("approx")
+def a_approx():
+    x, y = _scalars()
+    return lambda: x.a_approx(y)
+
+@benchmark("approx")
+def q_approx():
+    x, y = _scalars()
+    tol = 1 * si.millimeters
+    return lambda: x.q_approx(y, tol)
+
+@benchmark("approx")
+def r_approx_mpf():
+    x, y = _mpfs()
+    return lambda: x.r_approx(y)
+
+"""
+qmath
+"""
+
+@benchmark("qmath")
+def sin():
+    x = 0.5 * si.radians
+    return lambda: qmath.sin(x)
+
+@benchmark("qmath")
+def atan2():
+    x, y = _scalars()
+    return lambda: qmath.atan2(y, x)
+
+@benchmark("qmath")
+def hypot():
+    x, y = _scalars()
+    return lambda: qmath.hypot(x, y)
+
+@benchmark("qmath")
+def sqrt():
+    x, _ = _scalars()
+    return lambda: qmath.sqrt(x)
+
+@benchmark("qmath")
+def qarray_sin():
+    x = QuantityArray(array.array('d', range(1, ARRAY_SIZE + 1)), si.degrees)
+    return lambda: qmath.sin(x)
+
+@benchmark("qmath")
+def qsum_list():
+    values = [float(i) * si.meters for i in range(ARRAY_SIZE)]
+    return lambda: qmath.qsum(values)
+
+@benchmark("qmath")
+def builtin_sum_list():
+    values = [float(i) * si.meters for i in range(ARRAY_SIZE)]
+    return lambda: sum(values[1:], values[0])
+
+@benchmark("qmath")
+def qsum_qarray():
+    x, _ = _qarrays()
+    return lambda: qmath.qsum(x)
+
+"""
+parallel
+
+Large arrays, split across threads with `--threads`.
+"""
+
+LARGE_SIZE = ARRAY_SIZE * 1000
+
+def _large_qarrays():
+    return (
+        QuantityArray(array.array('d', range(1, LARGE_SIZE + 1)), si.meters),
+        QuantityArray(array.array('d', range(1, LARGE_SIZE + 1)), si.millimeters),
+    )
+
+@benchmark("parallel")
+def large_add():
+    x, y = _large_qarrays()
+    return lambda: x + y
+
+@benchmark("parallel")
+def large_get_as():
+    x, _ = _large_qarrays()
+    return lambda: x.get_as(si.millimeters)
+
+@benchmark("parallel")
+def large_sin():
+    x = QuantityArray(array.array('d', range(1, LARGE_SIZE + 1)), si.degrees)
+    return lambda: qmath.sin(x)
+
+_EXECUTOR = None
+
+def _process_pool():
+    global _EXECUTOR
+    if _EXECUTOR is None:
+        from concurrent.futures import ProcessPoolExecutor
+        _EXECUTOR = ProcessPoolExecutor(2)
+    return _EXECUTOR
+
+@benchmark("parallel")
+def process_map_shared():
+    x, _ = _large_qarrays()
+    executor = _process_pool()
+    return lambda: shared.map_chunks(qmath.sqrt, x, executor, workers=2)
+
+@benchmark("parallel")
+def process_map_pickled():
+    x, _ = _large_qarrays()
+    executor = _process_pool()
+    size = shared.chunk_size(len(x), 2)
+
+    def run():
+        values = array.array('d')
+        chunks = [x[i:i + size] for i in range(0, len(x), size)]
+        for result in executor.map(qmath.sqrt, chunks):
+            values.frombytes(memoryview(result.q).cast('B'))
+        return QuantityArray(values, result.units)
+    return run
+
+"""
+lazy
+
+Eager operators against a compiled formula of the same expression.
+"""
+
+def _energy():
+    m = lazy.symbol("m", si.kilograms)
+    v = lazy.symbol("v", si.meters / si.seconds)
+    h = lazy.symbol("h", si.meters)
+    g = 9.81 * si.meters / si.seconds ** 2
+    return g, (m * v ** 2 / 2 + m * g * h).compile(si.joules)
+
+def _energy_args(size):
+    return (
+        QuantityArray(array.array('d', range(1, size + 1)), si.kilograms),
+        QuantityArray(array.array('d', range(1, size + 1)), si.meters / si.seconds),
+        QuantityArray(array.array('d', range(1, size + 1)), si.millimeters),
+    )
+
+@benchmark("lazy")
+def scalar_eager():
+    g, _ = _energy()
+    m, v, h = 2 * si.kilograms, 3 * si.meters / si.seconds, 1 * si.millimeters
+    return lambda: (m * v ** 2 / 2 + m * g * h).get_as(si.joules)
+
+@benchmark("lazy")
+def scalar_formula():
+    _, energy = _energy()
+    m, v, h = 2 * si.kilograms, 3 * si.meters / si.seconds, 1 * si.millimeters
+    return lambda: energy(m, v, h)
+
+@benchmark("lazy")
+def qarray_eager():
+    g, _ = _energy()
+    m, v, h = _energy_args(ARRAY_SIZE)
+    return lambda: (m * v ** 2 / 2 + m * g * h).cvt_to(si.joules)
+
+@benchmark("lazy")
+def qarray_formula():
+    _, energy = _energy()
+    m, v, h = _energy_args(ARRAY_SIZE)
+    return lambda: energy(m, v, h)
+
+@benchmark("lazy")
+def large_eager():
+    g, _ = _energy()
+    m, v, h = _energy_args(LARGE_SIZE)
+    return lambda: (m * v ** 2 / 2 + m * g * h).cvt_to(si.joules)
+
+@benchmark("lazy")
+def large_formula():
+    _, energy = _energy()
+    m, v, h = _energy_args(LARGE_SIZE)
+    return lambda: energy(m, v, h)
+
+"""
+util
+"""
+
+@benchmark("util")
+def converter():
+    convert = util.converter(si.meters)
+    x = 1500 * si.millimeters
+    return lambda: convert(x)
+
+@benchmark("util")
+def converter_promotes():
+    convert = util.converter(si.meters, promotes=True)
+    return lambda: convert(1.5)
+
+@benchmark("util")
+def are_of():
+    dims = si.meters.dimensions
+    values = [float(i) * si.meters for i in range(ARRAY_SIZE)]
+    return lambda: util.are_of(dims, values)
+
+@benchmark("util")
+def valid_mask():
+    dims = si.meters.dimensions
+    values = [float(i) * si.meters for i in range(ARRAY_SIZE)]
+    return lambda: util.valid_mask(dims, values)
+
+@benchmark("util")
+def attrs_init():
+    attr = requires("attr")
+
+    @attr.s(slots=True)
+    class Box:
+        mass = attr.ib(converter=util.converter(si.kilograms, promotes=True))
+        size = attr.ib(converter=util.converter(si.meters ** 3))
+
+    size = 1 * si.meters ** 3
+    return lambda: Box(10, size)
+
+@benchmark("util")
+def attrs_init_convert():
+    attr = requires("attr")
+
+    @attr.s(slots=True)
+    class Box:
+        mass = attr.ib(converter=util.converter(si.kilograms, promotes=True))
+        size = attr.ib(converter=util.converter(si.meters ** 3))
+
+    mass = 10000 * si.grams
+    size = 1000 * si.liters
+    return lambda: Box(mass, size)
+
+"""
+format
+"""
+
+@benchmark("format")
+def show_quantity():
+    from cyquant.format_quantity import show_quantity
+    x = 1.25 * si.millimeters
+    return lambda: show_quantity(x)
+
+@benchmark("format")
+def show_quantity_derived():
+    from cyquant.format_quantity import show_quantity
+    x = 2 * si.kilonewtons
+    return lambda: show_quantity(x)
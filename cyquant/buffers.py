@@ -0,0 +1,43 @@
+"""
+Raw double buffers of array valued quantities
+
+    units, values = buffers.values_of(heights)
+    data = buffers.double_bytes(values)  # native doubles, as bytes
+
+Used to move quantity values through files and shared memory without
+going through Python floats.
+"""
+
+import array
+import sys
+
+from cyquant.quantities import Quantity, QuantityArray
+
+NATIVE_DOUBLES = ("d", "@d", "=d", "<d" if sys.byteorder == "little" else ">d")
+
+
+def values_of(quantity):
+    """
+    The units and a memoryview of the values of an array valued Quantity or
+    QuantityArray.
+    """
+    if type(quantity) is QuantityArray:
+        return quantity.units, memoryview(quantity.q)
+    if type(quantity) is Quantity:
+        try:
+            return quantity.units, memoryview(quantity.q)
+        except TypeError:
+            pass
+    raise TypeError("Expected array valued Quantity or QuantityArray")
+
+
+def double_bytes(values):
+    """
+    The bytes of a one dimensional memoryview as contiguous native doubles;
+    the view itself when it already is, otherwise a converted copy.
+    """
+    if values.ndim != 1:
+        raise ValueError("Expected a one dimensional array")
+    if values.format in NATIVE_DOUBLES and values.c_contiguous:
+        return values.cast("B")
+    return memoryview(array.array("d", values.tolist())).cast("B")
@@ -1,28 +1,82 @@
-from libc.string cimport memcmp
-from libc.math cimport fabs, fmax
+from libc.string cimport memcmp, memcpy
+from libc.stdint cimport int32_t, int64_t, uint64_t, INT32_MAX
+from libc.math cimport fabs, fmax, floor, sqrt, cbrt, isfinite
+
+# dimension exponents are exact rationals num / den in lowest terms with
+# den > 0. zero is stored as 0 / 0 so that zeroed memory is dimensionless.
+# every DData is kept in this canonical form, so two DData are equal if and
+# only if their bytes are.
+cdef struct Ratio:
+    int32_t num
+    int32_t den
 
 cdef struct DData:
-    float exponents[7]
+    Ratio exponents[7]
 
 cdef struct UData:
     double scale
     DData dimensions
 
-cdef inline bint fapprox(double a, double b, double rtol, double atol):
+#largest denominator used when approximating a double exponent
+cdef enum:
+    MAX_EXPONENT_DEN = 65536
+
+cdef inline bint fapprox(double a, double b, double rtol, double atol) noexcept nogil:
     cdef double epsilon = fabs(fmax(atol, rtol * fmax(1, fmax(a, b))))
     return fabs(a - b) <= epsilon
 
-cdef inline bint eq_ddata(const DData& lhs, const DData& rhs, float atol=1e-9):
-    cdef size_t i
-    for i in range(7):
-        if fabs(lhs.exponents[i] - rhs.exponents[i]) > atol:
-            return False
-    return True
+cdef inline bint eq_ddata(const DData& lhs, const DData& rhs) noexcept nogil:
+    if &lhs == &rhs:
+        return True
+    return memcmp(lhs.exponents, rhs.exponents, sizeof(lhs.exponents)) == 0
 
-cdef inline bint eq_udata(const UData& lhs, const UData& rhs, double atol=1e-9):
+cdef inline bint eq_udata(const UData& lhs, const UData& rhs, double atol=1e-9) noexcept nogil:
     if fabs(lhs.scale - rhs.scale) > atol:
         return False
-    return eq_ddata(lhs.dimensions, rhs.dimensions, atol)
+    return eq_ddata(lhs.dimensions, rhs.dimensions)
+
+
+# begin hashing functions
+
+cdef inline Py_hash_t finish_hash(uint64_t acc) noexcept nogil:
+    cdef Py_hash_t ret = <Py_hash_t>(acc ^ (acc >> 32))
+    return -2 if ret == -1 else ret
+
+cdef inline uint64_t mix_hash(uint64_t acc, uint64_t bits) noexcept nogil:
+    return (acc ^ bits) * <uint64_t>0x100000001b3
+
+cdef inline uint64_t acc_ddata(uint64_t acc, const DData& data) noexcept nogil:
+    cdef size_t i
+    cdef uint64_t bits
+    for i in range(7):
+        memcpy(&bits, &data.exponents[i], sizeof(bits))
+        acc = mix_hash(acc, bits)
+    return acc
+
+cdef inline Py_hash_t hash_ddata(const DData& data) noexcept nogil:
+    return finish_hash(acc_ddata(<uint64_t>0xcbf29ce484222325, data))
+
+cdef inline Py_hash_t hash_udata(const UData& data) noexcept nogil:
+    cdef double scale = data.scale + 0.0
+    cdef uint64_t bits
+    memcpy(&bits, &scale, sizeof(bits))
+    return finish_hash(acc_ddata(mix_hash(<uint64_t>0xcbf29ce484222325, bits), data.dimensions))
+
+cdef inline Py_hash_t combine_hash(Py_hash_t lhs, Py_hash_t rhs) noexcept nogil:
+    return finish_hash(mix_hash(mix_hash(<uint64_t>0xcbf29ce484222325, <uint64_t>lhs), <uint64_t>rhs))
+
+
+cdef inline double ipow(double base, long power) noexcept nogil:
+    cdef double result = 1.0
+    cdef bint invert = power < 0
+    if invert:
+        power = -power
+    while power:
+        if power & 1:
+            result *= base
+        base *= base
+        power >>= 1
+    return 1.0 / result if invert else result
 
 
 # begin error code convention interface
@@ -31,63 +85,187 @@ cdef enum Error:
     Success = 0
     DimensionMismatch = 1
     ZeroDiv = 2
-    #Overflow = 4
+    Overflow = 4
     Unknown = 0x80000000
 
+# begin ratio functions
+
+cdef inline double ratio_value(const Ratio& ratio) noexcept nogil:
+    if ratio.den == 0:
+        return 0.0
+    return <double>ratio.num / ratio.den
+
+cdef inline int64_t gcd(int64_t a, int64_t b) noexcept nogil:
+    cdef int64_t t
+    if a < 0:
+        a = -a
+    if b < 0:
+        b = -b
+    while b:
+        t = a % b
+        a = b
+        b = t
+    return a
+
+#Success
+#Overflow
+cdef inline Error make_ratio(Ratio& out, int64_t num, int64_t den) noexcept nogil:
+    cdef int64_t divisor
+    if num == 0:
+        out.num = 0
+        out.den = 0
+        return Success
+    if den < 0:
+        num = -num
+        den = -den
+    divisor = gcd(num, den)
+    num = num // divisor
+    den = den // divisor
+    if num > INT32_MAX or num < -INT32_MAX or den > INT32_MAX:
+        return Overflow
+    out.num = <int32_t>num
+    out.den = <int32_t>den
+    return Success
+
+#Success
+#Overflow
+cdef inline Error add_ratio(Ratio& out, const Ratio& lhs, const Ratio& rhs, int sign) noexcept nogil:
+    cdef int64_t lden, rden, num
+    if lhs.den <= 1 and rhs.den <= 1:
+        #integer exponents, no reduction needed
+        num = <int64_t>lhs.num + sign * <int64_t>rhs.num
+        if num > INT32_MAX or num < -INT32_MAX:
+            return Overflow
+        out.num = <int32_t>num
+        out.den = 1 if num else 0
+        return Success
+    lden = lhs.den if lhs.den else 1
+    rden = rhs.den if rhs.den else 1
+    return make_ratio(out, lhs.num * rden + sign * rhs.num * lden, lden * rden)
+
+#Success
+#Overflow
+cdef inline Error mul_ratio(Ratio& out, const Ratio& lhs, const Ratio& rhs) noexcept nogil:
+    if lhs.num == 0 or rhs.num == 0:
+        out.num = 0
+        out.den = 0
+        return Success
+    return make_ratio(out, <int64_t>lhs.num * rhs.num, <int64_t>lhs.den * rhs.den)
+
+#closest ratio to `value` with a denominator of at most MAX_EXPONENT_DEN
+#Success
+#Overflow (also when that ratio is not within a relative 1e-9 of `value`)
+cdef inline Error to_ratio(Ratio& out, double value) noexcept nogil:
+    cdef int64_t h0 = 0, h1 = 1, k0 = 1, k1 = 0, h2, k2, term
+    cdef double x = value
+    cdef int i
+
+    if not isfinite(value) or fabs(value) > INT32_MAX:
+        return Overflow
+    if value == floor(value):
+        return make_ratio(out, <int64_t>value, 1)
+
+    #continued fraction convergents h / k
+    for i in range(64):
+        term = <int64_t>floor(x)
+        h2 = term * h1 + h0
+        k2 = term * k1 + k0
+        if k2 > MAX_EXPONENT_DEN:
+            break
+        h0, h1, k0, k1 = h1, h2, k1, k2
+        if x == term or fabs(value - <double>h1 / k1) <= 1e-12 * fmax(1.0, fabs(value)):
+            break
+        x = 1.0 / (x - term)
+
+    if fabs(value - <double>h1 / k1) > 1e-9 * fabs(value):
+        return Overflow
+    return make_ratio(out, h1, k1)
+
 # begin ddata functions
 
 #Success
-cdef inline Error mul_ddata(DData& out, const DData& lhs, const DData& rhs):
+#Overflow
+cdef inline Error mul_ddata(DData& out, const DData& lhs, const DData& rhs) noexcept nogil:
     cdef size_t i
+    cdef Error error_code
     for i in range(7):
-        out.exponents[i] = lhs.exponents[i] + rhs.exponents[i]
+        error_code = add_ratio(out.exponents[i], lhs.exponents[i], rhs.exponents[i], 1)
+        if error_code != Success:
+            return error_code
     return Success
 
 #Success
-cdef inline Error div_ddata(DData& out, const DData& lhs, const DData& rhs):
+#Overflow
+cdef inline Error div_ddata(DData& out, const DData& lhs, const DData& rhs) noexcept nogil:
     cdef size_t i
+    cdef Error error_code
     for i in range(7):
-        out.exponents[i] = lhs.exponents[i] - rhs.exponents[i]
+        error_code = add_ratio(out.exponents[i], lhs.exponents[i], rhs.exponents[i], -1)
+        if error_code != Success:
+            return error_code
     return Success
 
 #Success
-cdef inline Error pow_ddata(DData& out, const DData& lhs, double power):
+#Overflow
+cdef inline Error pow_ddata(DData& out, const DData& lhs, double power) noexcept nogil:
     cdef size_t i
+    cdef Ratio ratio = Ratio(0, 0)
+    cdef Error error_code = to_ratio(ratio, power)
+    if error_code != Success:
+        return error_code
     for i in range(7):
-        out.exponents[i] = lhs.exponents[i] * power
+        error_code = mul_ratio(out.exponents[i], lhs.exponents[i], ratio)
+        if error_code != Success:
+            return error_code
     return Success
 
-cdef inline Error inv_ddata(DData& out, const DData& src):
+cdef inline Error inv_ddata(DData& out, const DData& src) noexcept nogil:
     cdef size_t i
     for i in range(7):
-        out.exponents[i] = -src.exponents[i]
+        out.exponents[i].num = -src.exponents[i].num
+        out.exponents[i].den = src.exponents[i].den
     return Success
 
 # begin udata functions
 
 #Success
-cdef inline Error mul_udata(UData& out, const UData& lhs, const UData& rhs):
+cdef inline Error mul_udata(UData& out, const UData& lhs, const UData& rhs) noexcept nogil:
     #todo: overflow checks
     out.scale = lhs.scale * rhs.scale
     return mul_ddata(out.dimensions, lhs.dimensions, rhs.dimensions)
 
 #Success
 #ZeroDiv
-cdef inline Error div_udata(UData& out, const UData& lhs, const UData& rhs):
+cdef inline Error div_udata(UData& out, const UData& lhs, const UData& rhs) noexcept nogil:
     if rhs.scale == 0:
         return ZeroDiv
     out.scale = lhs.scale / rhs.scale
     return div_ddata(out.dimensions, lhs.dimensions, rhs.dimensions)
 
 #Success
-cdef inline Error pow_udata(UData& out, const UData& lhs, double power):
+cdef inline Error pow_udata(UData& out, const UData& lhs, double power) noexcept nogil:
     #todo: overflow checks
     out.scale = lhs.scale ** power
     return pow_ddata(out.dimensions, lhs.dimensions, power)
 
+#Success
+cdef inline Error ipow_udata(UData& out, const UData& lhs, long power) noexcept nogil:
+    out.scale = ipow(lhs.scale, power)
+    return pow_ddata(out.dimensions, lhs.dimensions, power)
+
+#Success
+cdef inline Error sqrt_udata(UData& out, const UData& lhs) noexcept nogil:
+    out.scale = sqrt(lhs.scale)
+    return pow_ddata(out.dimensions, lhs.dimensions, 0.5)
+
+#Success
+cdef inline Error cbrt_udata(UData& out, const UData& lhs) noexcept nogil:
+    out.scale = cbrt(lhs.scale)
+    return pow_ddata(out.dimensions, lhs.dimensions, 1.0 / 3.0)
+
 #Success
 #DimensionMismatch
-cdef inline Error cmp_udata(int& out, const UData& lhs, const UData& rhs):
+cdef inline Error cmp_udata(int& out, const UData& lhs, const UData& rhs) noexcept nogil:
     if not eq_ddata(lhs.dimensions, rhs.dimensions):
         return DimensionMismatch
 
@@ -100,7 +278,7 @@ cdef inline Error cmp_udata(int& out, const UData& lhs, const UData& rhs):
 
     return Success
 
-cdef inline Error inv_udata(UData& out, const UData& src):
+cdef inline Error inv_udata(UData& out, const UData& src) noexcept nogil:
     # if src.scale == 0:
     #     return c.ZeroDiv
     out.scale = 1.0 / src.scale
@@ -109,7 +287,7 @@ cdef inline Error inv_udata(UData& out, const UData& src):
 
 #Success
 #DimensionMismatch
-cdef inline Error min_udata(UData& out, const UData& lhs, const UData& rhs):
+cdef inline Error min_udata(UData& out, const UData& lhs, const UData& rhs) noexcept nogil:
     if not eq_ddata(lhs.dimensions, rhs.dimensions):
         return DimensionMismatch
 
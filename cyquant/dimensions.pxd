@@ -2,7 +2,15 @@ cimport cyquant.ctypes as c
 
 cdef class Dimensions:
     cdef c.DData data
+    cdef Py_hash_t hash_value
 
     cpdef bint approx(Dimensions self, Dimensions other)
 
-    cpdef Dimensions exp(Dimensions self, double power)
\ No newline at end of file
+    cpdef Dimensions exp(Dimensions self, double power)
+
+    cpdef Dimensions intern(Dimensions self)
+
+cdef Dimensions make_dimensions(const c.DData& data)
+
+cdef bytes pack_ddata(const c.DData& data)
+cdef int unpack_ddata(c.DData& data, const unsigned char[:] packed) except -1
@@ -1,10 +1,18 @@
 #!python
 #cython: language_level=3
 
+cimport cython
 cimport cyquant.ctypes as c
+from libc.string cimport memcpy
 
 cdef double DIMENSIONS_RTOL = 1e-12
 
+cdef bint INTERNING = False
+cdef dict INTERNED = {}
+
+cdef int PICKLE_VERSION = 1
+
+@cython.freelist(64)
 cdef class Dimensions:
 
     @staticmethod
@@ -18,46 +26,64 @@ cdef class Dimensions:
             raise ValueError("relative tolerance must be greater than 0.")
         DIMENSIONS_RTOL = rtol
 
+    @staticmethod
+    def GetInterning():
+        return INTERNING
+
+    @staticmethod
+    def SetInterning(bint enabled):
+        global INTERNING
+        INTERNING = enabled
+        if not enabled:
+            INTERNED.clear()
+
     @property
     def kg(self):
-        return self.data.exponents[0]
+        return c.ratio_value(self.data.exponents[0])
 
     @property
     def m(self):
-        return self.data.exponents[1]
+        return c.ratio_value(self.data.exponents[1])
 
     @property
     def s(self):
-        return self.data.exponents[2]
+        return c.ratio_value(self.data.exponents[2])
 
     @property
     def k(self):
-        return self.data.exponents[3]
+        return c.ratio_value(self.data.exponents[3])
 
     @property
     def a(self):
-        return self.data.exponents[4]
+        return c.ratio_value(self.data.exponents[4])
 
     @property
     def mol(self):
-        return self.data.exponents[5]
+        return c.ratio_value(self.data.exponents[5])
 
     @property
     def cd(self):
-        return self.data.exponents[6]
+        return c.ratio_value(self.data.exponents[6])
 
     def __init__(Dimensions self, double kg=0, double m=0, double s=0, double k=0, double a=0, double mol=0, double cd=0):
-        self.data.exponents[:] = [kg, m, s, k, a, mol, cd]
+        cdef double exponents[7]
+        cdef int i
+        exponents[:] = [kg, m, s, k, a, mol, cd]
+        for i in range(7):
+            if c.to_ratio(self.data.exponents[i], exponents[i]) != c.Success:
+                raise OverflowError("dimension exponent out of range")
 
     def __mul__(Dimensions lhs, Dimensions rhs):
-        cdef Dimensions ret_val = Dimensions.__new__(Dimensions)
-        c.mul_ddata(ret_val.data, lhs.data, rhs.data)
-        return ret_val
+        cdef c.DData data
+        if c.mul_ddata(data, lhs.data, rhs.data) != c.Success:
+            raise OverflowError("dimension exponent out of range")
+        return make_dimensions(data)
 
     def __truediv__(Dimensions lhs, Dimensions rhs):
-        cdef Dimensions ret_val = Dimensions.__new__(Dimensions)
-        c.div_ddata(ret_val.data, lhs.data, rhs.data)
-        return ret_val
+        cdef c.DData data
+        if c.div_ddata(data, lhs.data, rhs.data) != c.Success:
+            raise OverflowError("dimension exponent out of range")
+        return make_dimensions(data)
 
     def __pow__(lhs, rhs, modulo):
         if type(lhs) is not Dimensions:
@@ -69,19 +95,30 @@ cdef class Dimensions:
             return NotImplemented
         if type(other) is not Dimensions:
             return NotImplemented
-        return self.approx(other)
+        return c.eq_ddata((<Dimensions>self).data, (<Dimensions>other).data)
 
     cpdef bint approx(Dimensions self, Dimensions other):
         cdef int i
+        if c.eq_ddata(self.data, other.data):
+            return True
         for i in range(7):
-            if not c.fapprox(self.data.exponents[i], other.data.exponents[i], DIMENSIONS_RTOL, 0):
+            if not c.fapprox(c.ratio_value(self.data.exponents[i]), c.ratio_value(other.data.exponents[i]), DIMENSIONS_RTOL, 0):
                 return False
         return True
 
     cpdef Dimensions exp(Dimensions self, double exp):
-        cdef Dimensions ret_val = Dimensions.__new__(Dimensions)
-        c.pow_ddata(ret_val.data, self.data, exp)
-        return ret_val
+        cdef c.DData data
+        if c.pow_ddata(data, self.data, exp) != c.Success:
+            raise OverflowError("dimension exponent out of range")
+        return make_dimensions(data)
+
+    cpdef Dimensions intern(Dimensions self):
+        cdef bytes key = ddata_key(self.data)
+        cdef Dimensions ret = INTERNED.get(key)
+        if ret is None:
+            self.hash_value = c.hash_ddata(self.data)
+            INTERNED[key] = ret = self
+        return ret
 
     def __copy__(self):
         return self
@@ -89,9 +126,13 @@ cdef class Dimensions:
     def __deepcopy__(self, memodict={}):
         return self
 
-    def __hash__(self):
-        etuple = (self.kg, self.m, self.s, self.k, self.a, self.mol, self.cd)
-        return hash(etuple)
+    def __reduce__(Dimensions self):
+        return _load_dimensions, (PICKLE_VERSION, pack_ddata(self.data))
+
+    def __hash__(Dimensions self):
+        if self.hash_value == 0:
+            self.hash_value = c.hash_ddata(self.data)
+        return self.hash_value
 
     def __repr__(self):
         return 'Dimensions(kg=%f, m=%f, s=%f, k=%f, a=%f, mol=%f, cd=%f)' % (
@@ -99,6 +140,55 @@ cdef class Dimensions:
         )
 
 
+cdef inline bytes ddata_key(const c.DData& data):
+    return (<char*>&data)[:sizeof(c.DData)]
+
+cdef Dimensions make_dimensions(const c.DData& data):
+    cdef Dimensions ret = Dimensions.__new__(Dimensions)
+    ret.data = data
+    if INTERNING:
+        return ret.intern()
+    return ret
+
+"""
+Packed encoding: one signed byte per exponent when every exponent is an
+integer in [-128, 127], otherwise the raw DData struct (native byte order).
+"""
+
+cdef bytes pack_ddata(const c.DData& data):
+    cdef signed char small[7]
+    cdef int i
+    for i in range(7):
+        if data.exponents[i].den > 1 or not -128 <= data.exponents[i].num <= 127:
+            return ddata_key(data)
+        small[i] = <signed char>data.exponents[i].num
+    return (<char*>small)[:7]
+
+cdef int unpack_ddata(c.DData& data, const unsigned char[:] packed) except -1:
+    cdef int i
+    cdef signed char num
+    if packed.shape[0] == 7:
+        for i in range(7):
+            num = <signed char>packed[i]
+            data.exponents[i] = c.Ratio(num, 1 if num else 0)
+        return 0
+
+    if packed.shape[0] != <Py_ssize_t>sizeof(c.DData):
+        raise ValueError("invalid packed dimensions")
+    memcpy(&data, &packed[0], sizeof(c.DData))
+    for i in range(7):
+        if data.exponents[i].den < 0 or (data.exponents[i].den == 0) != (data.exponents[i].num == 0):
+            raise ValueError("invalid packed dimensions")
+    return 0
+
+def _load_dimensions(int version, bytes packed):
+    cdef c.DData data
+    if version != PICKLE_VERSION:
+        raise ValueError("unsupported pickle version: %i" % version)
+    unpack_ddata(data, packed)
+    return make_dimensions(data)
+
+
 dimensionless_t = Dimensions()
 
 #:
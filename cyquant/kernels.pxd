@@ -0,0 +1,217 @@
+# cython: boundscheck=False, wraparound=False, cdivision=True
+# (decorators are ignored on inline functions in a .pxd, so the directives
+# are set for the whole file; they do not leak into modules cimporting it)
+
+cimport cyquant.ctypes as c
+
+from libc.math cimport fabs, pow, sin, cos
+
+# begin elementwise kernels over double buffers
+#
+# `out` may be the exact same view as any of the inputs; every kernel reads
+# element i before writing element i. views that overlap at other offsets or
+# strides must be copied first (see quantities.unaliased). kernels are nogil
+# and only touch the elements of the views they are given, so disjoint slices
+# can run on different threads.
+
+# values mirror Py_LT ... Py_GE so rich comparison ops can be cast directly
+cdef enum CmpOp:
+    CmpLT = 0
+    CmpLE = 1
+    CmpEQ = 2
+    CmpNE = 3
+    CmpGT = 4
+    CmpGE = 5
+
+#out = a * x
+cdef inline void scale(double[:] out, const double[:] x, double a) noexcept nogil:
+    cdef Py_ssize_t i
+    for i in range(x.shape[0]):
+        out[i] = a * x[i]
+
+#out = a * x + b * y
+cdef inline void axpby(double[:] out, double a, const double[:] x, double b, const double[:] y) noexcept nogil:
+    cdef Py_ssize_t i
+    for i in range(x.shape[0]):
+        out[i] = a * x[i] + b * y[i]
+
+#out = a * x + c
+cdef inline void axpc(double[:] out, double a, const double[:] x, double c) noexcept nogil:
+    cdef Py_ssize_t i
+    for i in range(x.shape[0]):
+        out[i] = a * x[i] + c
+
+#out = x * y
+cdef inline void mul(double[:] out, const double[:] x, const double[:] y) noexcept nogil:
+    cdef Py_ssize_t i
+    for i in range(x.shape[0]):
+        out[i] = x[i] * y[i]
+
+#out = x / y
+cdef inline void div(double[:] out, const double[:] x, const double[:] y) noexcept nogil:
+    cdef Py_ssize_t i
+    for i in range(x.shape[0]):
+        out[i] = x[i] / y[i]
+
+#out = x / c
+cdef inline void divc(double[:] out, const double[:] x, double c) noexcept nogil:
+    cdef Py_ssize_t i
+    for i in range(x.shape[0]):
+        out[i] = x[i] / c
+
+#out = c / x
+cdef inline void rdiv(double[:] out, double c, const double[:] x) noexcept nogil:
+    cdef Py_ssize_t i
+    for i in range(x.shape[0]):
+        out[i] = c / x[i]
+
+#out = x ** p
+cdef inline void power(double[:] out, const double[:] x, double p) noexcept nogil:
+    cdef Py_ssize_t i
+    for i in range(x.shape[0]):
+        out[i] = pow(x[i], p)
+
+#out = x ** n
+cdef inline void ipower(double[:] out, const double[:] x, long n) noexcept nogil:
+    cdef Py_ssize_t i
+    for i in range(x.shape[0]):
+        out[i] = c.ipow(x[i], n)
+
+#out = |x|
+cdef inline void absolute(double[:] out, const double[:] x) noexcept nogil:
+    cdef Py_ssize_t i
+    for i in range(x.shape[0]):
+        out[i] = fabs(x[i])
+
+cdef inline bint _cmp(double l, double r, CmpOp op) noexcept nogil:
+    if op == CmpLT:
+        return l < r
+    if op == CmpLE:
+        return l <= r
+    if op == CmpEQ:
+        return l == r
+    if op == CmpNE:
+        return l != r
+    if op == CmpGT:
+        return l > r
+    return l >= r
+
+#out = (a * x) op (b * y)
+cdef inline void compare(signed char[:] out, double a, const double[:] x, double b, const double[:] y, CmpOp op) noexcept nogil:
+    cdef Py_ssize_t i
+    for i in range(x.shape[0]):
+        out[i] = _cmp(a * x[i], b * y[i], op)
+
+#out = (a * x) op c
+cdef inline void compare_c(signed char[:] out, double a, const double[:] x, double c, CmpOp op) noexcept nogil:
+    cdef Py_ssize_t i
+    for i in range(x.shape[0]):
+        out[i] = _cmp(a * x[i], c, op)
+
+# begin function mapping kernels
+
+ctypedef double (*UnaryFn)(double) noexcept nogil
+ctypedef double (*BinaryFn)(double, double) noexcept nogil
+
+#out = fn(a * x)
+cdef inline void apply(double[:] out, const double[:] x, double a, UnaryFn fn) noexcept nogil:
+    cdef Py_ssize_t i
+    for i in range(x.shape[0]):
+        out[i] = fn(a * x[i])
+
+#out = fn(a * x, b * y)
+cdef inline void apply2(double[:] out, const double[:] x, double a, const double[:] y, double b, BinaryFn fn) noexcept nogil:
+    cdef Py_ssize_t i
+    for i in range(x.shape[0]):
+        out[i] = fn(a * x[i], b * y[i])
+
+#out_sin = sin(a * x), out_cos = cos(a * x)
+cdef inline void sin_cos(double[:] out_sin, double[:] out_cos, const double[:] x, double a) noexcept nogil:
+    cdef Py_ssize_t i
+    cdef double value
+    for i in range(x.shape[0]):
+        value = a * x[i]
+        out_sin[i] = sin(value)
+        out_cos[i] = cos(value)
+
+#lo <= a * x <= hi for every element
+cdef inline bint within(const double[:] x, double a, double lo, double hi) noexcept nogil:
+    cdef Py_ssize_t i
+    cdef double value
+    for i in range(x.shape[0]):
+        value = a * x[i]
+        #negated, so that nan fails the check
+        if not (lo <= value <= hi):
+            return False
+    return True
+
+#x == 0 and y == 0 for some element
+cdef inline bint any_origin(const double[:] x, const double[:] y) noexcept nogil:
+    cdef Py_ssize_t i
+    for i in range(x.shape[0]):
+        if x[i] == 0 and y[i] == 0:
+            return True
+    return False
+
+# begin reduction kernels
+
+cdef enum:
+    PAIRWISE_BLOCK = 128
+
+#sum of x, summing blocks of PAIRWISE_BLOCK elements pairwise
+cdef inline double pairwise_sum(const double[:] x, Py_ssize_t start, Py_ssize_t stop) noexcept nogil:
+    cdef Py_ssize_t i, half
+    cdef double total = 0
+    if stop - start <= PAIRWISE_BLOCK:
+        for i in range(start, stop):
+            total += x[i]
+        return total
+    half = start + (stop - start) // 2
+    return pairwise_sum(x, start, half) + pairwise_sum(x, half, stop)
+
+#total += value, carrying the lost low order bits in comp (Neumaier)
+cdef inline void neumaier_add(double& total, double& comp, double value) noexcept nogil:
+    cdef double t = total + value
+    if fabs(total) >= fabs(value):
+        (&comp)[0] += (total - t) + value
+    else:
+        (&comp)[0] += (value - t) + total
+    (&total)[0] = t
+
+#compensated sum of x
+cdef inline double neumaier_sum(const double[:] x) noexcept nogil:
+    cdef Py_ssize_t i
+    cdef double total = 0, comp = 0
+    for i in range(x.shape[0]):
+        neumaier_add(total, comp, x[i])
+    return total + comp
+
+#smallest element of x (nan if any element is nan); x must not be empty
+cdef inline double minimum(const double[:] x) noexcept nogil:
+    cdef Py_ssize_t i
+    cdef double ret = x[0]
+    for i in range(x.shape[0]):
+        if x[i] < ret or x[i] != x[i]:
+            ret = x[i]
+            if ret != ret:
+                break
+    return ret
+
+#largest element of x (nan if any element is nan); x must not be empty
+cdef inline double maximum(const double[:] x) noexcept nogil:
+    cdef Py_ssize_t i
+    cdef double ret = x[0]
+    for i in range(x.shape[0]):
+        if x[i] > ret or x[i] != x[i]:
+            ret = x[i]
+            if ret != ret:
+                break
+    return ret
+
+#product of x
+cdef inline double product(const double[:] x) noexcept nogil:
+    cdef Py_ssize_t i
+    cdef double ret = 1
+    for i in range(x.shape[0]):
+        ret *= x[i]
+    return ret
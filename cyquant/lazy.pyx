@@ -0,0 +1,787 @@
+#!python
+#cython: language_level=3
+
+"""
+Lazy quantity expressions
+
+Operators on symbols build an expression tree instead of a result. Units
+are checked and folded while the tree is built, and compiling it folds
+every unit conversion into the constants of a small program, which is then
+evaluated in one pass over scalars or arrays:
+
+    m = lazy.symbol("m", si.kilograms)
+    v = lazy.symbol("v", si.meters / si.seconds)
+    h = lazy.symbol("h", si.meters)
+    g = 9.80665 * si.meters / si.seconds ** 2
+
+    energy = (m * v ** 2 / 2 + m * g * h).compile(si.joules)
+    energy(2 * si.kilograms, 3 * si.meters / si.seconds, 1 * si.meters)
+    energy(masses, speeds, heights)  # QuantityArrays, no temporaries
+
+Evaluation follows IEEE 754 like QuantityArray arithmetic, so division by
+zero and math domain errors give inf or nan rather than raising.
+"""
+
+cimport cython
+
+cimport cyquant.ctypes as c
+cimport cyquant.kernels as k
+cimport cyquant.quantities as q
+import cyquant.quantities as q
+
+from libc cimport math
+from libc.stdlib cimport malloc, free
+
+from cyquant import si
+
+
+cdef c.UData RADIANS = (<q.SIUnit>si.radians).data
+cdef c.UData UNITY = (<q.SIUnit>si.unity).data
+
+cdef enum:
+    MAX_SYMBOLS = 32
+    MAX_DEPTH = 64
+    #largest expression tree, counting shared subexpressions once per use;
+    #compiling walks the tree recursively
+    MAX_HEIGHT = 512
+    MAX_NODES = 1 << 16
+    #arrays shorter than this are evaluated without releasing the GIL
+    NOGIL_MIN = 4096
+    #elements per instruction when evaluating arrays
+    BLOCK = 256
+
+cdef enum Kind:
+    KindSymbol
+    KindConst
+    KindLinear
+    KindMul
+    KindDiv
+    KindPow
+    KindIpow
+    KindNeg
+    KindCall
+
+
+@cython.final
+cdef class Expr:
+    """
+    A node of a lazy expression; build them with `symbol` and operators.
+    """
+
+    cdef Kind kind
+    cdef c.UData udata
+    cdef Expr lhs
+    cdef Expr rhs
+    #KindConst: value, KindPow: exponent
+    cdef double value
+    #KindLinear: a * lhs + b * rhs, KindCall: fn(a * lhs)
+    cdef double a
+    cdef double b
+    cdef long power
+    cdef bint subtract
+    #KindSymbol: symbol name, KindCall: function name
+    cdef str name
+    cdef k.UnaryFn fn
+    cdef int height
+    cdef Py_ssize_t nodes
+
+    def __init__(self, *args, **kwargs):
+        raise TypeError("expressions are created with lazy.symbol() and operators")
+
+    @property
+    def units(self):
+        return q.make_unit(self.udata)
+
+    @property
+    def symbols(self):
+        cdef dict symbols = {}
+        collect_symbols(self, symbols)
+        return tuple(symbols)
+
+    def compile(Expr self, q.SIUnit units=None, args=None):
+        """
+        Compiles the expression into a Formula returning values in `units`
+        (default: the units of the expression). `args` names the symbols in
+        positional argument order (default: order of first appearance).
+        """
+        return new_formula(self, units, args)
+
+    def __add__(Expr self, other):
+        cdef Expr rhs = as_expr(other)
+        if rhs is None:
+            return NotImplemented
+        return new_linear(self, rhs, False)
+
+    def __radd__(Expr self, other):
+        cdef Expr lhs = as_expr(other)
+        if lhs is None:
+            return NotImplemented
+        return new_linear(lhs, self, False)
+
+    def __sub__(Expr self, other):
+        cdef Expr rhs = as_expr(other)
+        if rhs is None:
+            return NotImplemented
+        return new_linear(self, rhs, True)
+
+    def __rsub__(Expr self, other):
+        cdef Expr lhs = as_expr(other)
+        if lhs is None:
+            return NotImplemented
+        return new_linear(lhs, self, True)
+
+    def __mul__(Expr self, other):
+        cdef Expr rhs = as_expr(other)
+        if rhs is None:
+            return NotImplemented
+        return new_mul(self, rhs)
+
+    def __rmul__(Expr self, other):
+        cdef Expr lhs = as_expr(other)
+        if lhs is None:
+            return NotImplemented
+        return new_mul(lhs, self)
+
+    def __truediv__(Expr self, other):
+        cdef Expr rhs = as_expr(other)
+        if rhs is None:
+            return NotImplemented
+        return new_div(self, rhs)
+
+    def __rtruediv__(Expr self, other):
+        cdef Expr lhs = as_expr(other)
+        if lhs is None:
+            return NotImplemented
+        return new_div(lhs, self)
+
+    def __pow__(Expr self, exponent, modulo=None):
+        cdef type exponent_type = type(exponent)
+        if modulo is not None:
+            return NotImplemented
+        if exponent_type is int:
+            return new_ipow(self, exponent)
+        if exponent_type is float:
+            if exponent.is_integer() and math.fabs(exponent) < 1 << 30:
+                return new_ipow(self, <long>exponent)
+            return new_pow(self, exponent)
+        return NotImplemented
+
+    def __neg__(Expr self):
+        if self.kind == KindConst:
+            return new_const(-self.value, self.udata)
+        return new_node(KindNeg, self.udata, self, None)
+
+    def __abs__(Expr self):
+        return new_call(self, "abs", math.fabs, 1.0, self.udata)
+
+    def __repr__(Expr self):
+        if self.kind == KindSymbol:
+            return self.name
+        if self.kind == KindConst:
+            if c.eq_udata(self.udata, UNITY):
+                return repr(self.value)
+            return repr(make_scalar(self.value, self.udata))
+        if self.kind == KindLinear:
+            return "(%r %s %r)" % (self.lhs, "-" if self.subtract else "+", self.rhs)
+        if self.kind == KindMul:
+            return "(%r * %r)" % (self.lhs, self.rhs)
+        if self.kind == KindDiv:
+            return "(%r / %r)" % (self.lhs, self.rhs)
+        if self.kind == KindPow:
+            return "(%r ** %r)" % (self.lhs, self.value)
+        if self.kind == KindIpow:
+            return "(%r ** %r)" % (self.lhs, self.power)
+        if self.kind == KindNeg:
+            return "-%r" % self.lhs
+        return "%s(%r)" % (self.name, self.lhs)
+
+q._defer_to(Expr)
+
+def symbol(str name not None, q.SIUnit units not None=si.unity):
+    """
+    A named input of an expression, given as a value in `units` or in any
+    units of the same dimensions.
+    """
+    cdef Expr ret = new_node(KindSymbol, units.data, None, None)
+    ret.name = name
+    return ret
+
+cdef q.Quantity make_scalar(double value, const c.UData& udata):
+    cdef q.Quantity ret = q.Quantity.__new__(q.Quantity)
+    ret.udata = udata
+    ret.py_value = None
+    ret.c_value = value
+    return ret
+
+cdef Expr as_expr(object value):
+    cdef type value_type = type(value)
+    if value_type is Expr:
+        return value
+    if value_type is float or value_type is int:
+        return new_const(value, UNITY)
+    if value_type is q.Quantity:
+        if (<q.Quantity>value).py_value is not None:
+            return None
+        return new_const((<q.Quantity>value).c_value, (<q.Quantity>value).udata)
+    if value_type is q.SIUnit:
+        return new_const(1.0, (<q.SIUnit>value).data)
+    return None
+
+cdef Expr new_node(Kind kind, const c.UData& udata, Expr lhs, Expr rhs):
+    cdef int height = 1
+    cdef Py_ssize_t nodes = 1
+    if lhs is not None:
+        height = max(height, lhs.height + 1)
+        nodes += lhs.nodes
+    if rhs is not None:
+        height = max(height, rhs.height + 1)
+        nodes += rhs.nodes
+    if height > MAX_HEIGHT:
+        raise ValueError("expression nested too deeply (at most %i levels)" % MAX_HEIGHT)
+    if nodes > MAX_NODES:
+        raise ValueError("expression too large (at most %i nodes)" % MAX_NODES)
+
+    cdef Expr ret = Expr.__new__(Expr)
+    ret.kind = kind
+    ret.height = height
+    ret.nodes = nodes
+    ret.udata = udata
+    ret.lhs = lhs
+    ret.rhs = rhs
+    ret.a = 1.0
+    ret.b = 1.0
+    return ret
+
+cdef Expr new_const(double value, const c.UData& udata):
+    cdef Expr ret = new_node(KindConst, udata, None, None)
+    ret.value = value
+    return ret
+
+cdef int check_error(c.Error error_code) except -1:
+    if error_code == c.Success:
+        return 0
+    if error_code == c.DimensionMismatch:
+        raise ValueError("unit mismatch")
+    if error_code == c.ZeroDiv:
+        raise ZeroDivisionError()
+    if error_code == c.Overflow:
+        raise OverflowError("dimension exponent out of range")
+    raise RuntimeError("Unknown Error Occurred: %i" % error_code)
+
+#lhs + rhs or lhs - rhs, in the smaller of both units
+cdef Expr new_linear(Expr lhs, Expr rhs, bint subtract):
+    cdef c.UData udata
+    cdef Expr ret
+    check_error(c.min_udata(udata, lhs.udata, rhs.udata))
+
+    cdef double a = lhs.udata.scale / udata.scale
+    cdef double b = rhs.udata.scale / udata.scale
+    if subtract:
+        b = -b
+    if lhs.kind == KindConst and rhs.kind == KindConst:
+        return new_const(a * lhs.value + b * rhs.value, udata)
+
+    ret = new_node(KindLinear, udata, lhs, rhs)
+    ret.a = a
+    ret.b = b
+    ret.subtract = subtract
+    return ret
+
+cdef Expr new_mul(Expr lhs, Expr rhs):
+    cdef c.UData udata
+    check_error(c.mul_udata(udata, lhs.udata, rhs.udata))
+    if lhs.kind == KindConst and rhs.kind == KindConst:
+        return new_const(lhs.value * rhs.value, udata)
+    return new_node(KindMul, udata, lhs, rhs)
+
+cdef Expr new_div(Expr lhs, Expr rhs):
+    cdef c.UData udata
+    check_error(c.div_udata(udata, lhs.udata, rhs.udata))
+    if rhs.kind == KindConst and rhs.value == 0:
+        raise ZeroDivisionError()
+    if lhs.kind == KindConst and rhs.kind == KindConst:
+        return new_const(lhs.value / rhs.value, udata)
+    return new_node(KindDiv, udata, lhs, rhs)
+
+cdef Expr new_ipow(Expr base, long power):
+    cdef c.UData udata
+    cdef Expr ret
+    check_error(c.ipow_udata(udata, base.udata, power))
+    if base.kind == KindConst:
+        if base.value == 0 and power < 0:
+            raise ZeroDivisionError()
+        return new_const(c.ipow(base.value, power), udata)
+    ret = new_node(KindIpow, udata, base, None)
+    ret.power = power
+    return ret
+
+cdef Expr new_pow(Expr base, double exponent):
+    cdef c.UData udata
+    cdef Expr ret
+    check_error(c.pow_udata(udata, base.udata, exponent))
+    if base.kind == KindConst:
+        return new_const(math.pow(base.value, exponent), udata)
+    ret = new_node(KindPow, udata, base, None)
+    ret.value = exponent
+    return ret
+
+#fn(a * value), in units of udata
+cdef Expr new_call(Expr value, str name, k.UnaryFn fn, double a, const c.UData& udata):
+    cdef Expr ret
+    if value.kind == KindConst:
+        return new_const(fn(a * value.value), udata)
+    ret = new_node(KindCall, udata, value, None)
+    ret.name = name
+    ret.fn = fn
+    ret.a = a
+    return ret
+
+cdef Expr call_as(object value, str name, k.UnaryFn fn, const c.UData& src, const c.UData& dst):
+    cdef Expr arg = as_expr(value)
+    if arg is None:
+        raise TypeError("Expected expression or Quantity")
+    return new_call(arg, name, fn, q.convert_factor(arg.udata, src), dst)
+
+cdef Expr call_root(object value, str name, k.UnaryFn fn, double power):
+    cdef c.UData udata
+    cdef Expr arg = as_expr(value)
+    if arg is None:
+        raise TypeError("Expected expression or Quantity")
+    check_error(c.pow_udata(udata, arg.udata, power))
+    return new_call(arg, name, fn, 1.0, udata)
+
+def sqrt(value):
+    return call_root(value, "sqrt", math.sqrt, 0.5)
+
+def cbrt(value):
+    return call_root(value, "cbrt", math.cbrt, 1.0 / 3.0)
+
+def sin(value):
+    return call_as(value, "sin", math.sin, RADIANS, UNITY)
+
+def cos(value):
+    return call_as(value, "cos", math.cos, RADIANS, UNITY)
+
+def tan(value):
+    return call_as(value, "tan", math.tan, RADIANS, UNITY)
+
+def exp(value):
+    return call_as(value, "exp", math.exp, UNITY, UNITY)
+
+def log(value):
+    return call_as(value, "log", math.log, UNITY, UNITY)
+
+cdef collect_symbols(Expr node, dict symbols):
+    if node is None:
+        return
+    if node.kind == KindSymbol:
+        symbols.setdefault(node.name, node)
+        return
+    collect_symbols(node.lhs, symbols)
+    collect_symbols(node.rhs, symbols)
+
+
+# begin compiled formulas
+#
+# a formula is a program for a small stack machine. unit conversions are
+# folded into the `a` operands, so evaluating it is plain double arithmetic.
+
+cdef enum Code:
+    CodeLoad    #push a * input[arg]
+    CodeConst   #push a
+    CodeScale   #top = a * top
+    CodeOffset  #top = top + a
+    CodeAdd
+    CodeMul
+    CodeDiv
+    CodeRdiv    #top = a / top
+    CodePow     #top = top ** a
+    CodeIpow    #top = top ** n
+    CodeCall    #top = fn(top)
+
+cdef struct Instr:
+    Code code
+    int arg
+    long n
+    double a
+    k.UnaryFn fn
+
+@cython.cdivision(True)
+cdef double run(const Instr* code, Py_ssize_t size, const double* inputs, double* stack) noexcept nogil:
+    cdef Py_ssize_t pc
+    cdef Py_ssize_t top = -1
+    cdef const Instr* instr
+    for pc in range(size):
+        instr = &code[pc]
+        if instr.code == CodeLoad:
+            top += 1
+            stack[top] = instr.a * inputs[instr.arg]
+        elif instr.code == CodeConst:
+            top += 1
+            stack[top] = instr.a
+        elif instr.code == CodeScale:
+            stack[top] = instr.a * stack[top]
+        elif instr.code == CodeOffset:
+            stack[top] = stack[top] + instr.a
+        elif instr.code == CodeAdd:
+            top -= 1
+            stack[top] = stack[top] + stack[top + 1]
+        elif instr.code == CodeMul:
+            top -= 1
+            stack[top] = stack[top] * stack[top + 1]
+        elif instr.code == CodeDiv:
+            top -= 1
+            stack[top] = stack[top] / stack[top + 1]
+        elif instr.code == CodeRdiv:
+            stack[top] = instr.a / stack[top]
+        elif instr.code == CodePow:
+            stack[top] = math.pow(stack[top], instr.a)
+        elif instr.code == CodeIpow:
+            stack[top] = c.ipow(stack[top], instr.n)
+        else:
+            stack[top] = instr.fn(stack[top])
+    return stack[0]
+
+#evaluates out[i] = formula(factors[j] * inputs[j][i]) a block of elements at a
+#time, so that each instruction is a tight loop over the block. `stack` holds
+#BLOCK doubles per stack slot; scalar inputs have stride 0.
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.cdivision(True)
+cdef void run_array(
+    const Instr* code, Py_ssize_t size,
+    const char** data, const Py_ssize_t* strides, const double* factors,
+    double* stack, double[:] out
+) noexcept nogil:
+    cdef Py_ssize_t start, n, i, pc
+    cdef Py_ssize_t top
+    cdef const Instr* instr
+    cdef const char* src
+    cdef Py_ssize_t stride
+    cdef double a
+    cdef double* x
+    cdef double* y
+
+    start = 0
+    while start < out.shape[0]:
+        n = min(BLOCK, out.shape[0] - start)
+        top = -1
+        for pc in range(size):
+            instr = &code[pc]
+            a = instr.a
+            if instr.code == CodeLoad or instr.code == CodeConst:
+                top += 1
+            x = stack + top * BLOCK
+            y = x + BLOCK
+            if instr.code == CodeLoad:
+                a *= factors[instr.arg]
+                stride = strides[instr.arg]
+                src = data[instr.arg] + start * stride
+                if stride == sizeof(double):
+                    for i in range(n):
+                        x[i] = a * (<const double*>src)[i]
+                else:
+                    for i in range(n):
+                        x[i] = a * (<const double*>(src + i * stride))[0]
+            elif instr.code == CodeConst:
+                for i in range(n):
+                    x[i] = a
+            elif instr.code == CodeScale:
+                for i in range(n):
+                    x[i] = a * x[i]
+            elif instr.code == CodeOffset:
+                for i in range(n):
+                    x[i] = x[i] + a
+            elif instr.code == CodeAdd:
+                top -= 1
+                x -= BLOCK
+                y -= BLOCK
+                for i in range(n):
+                    x[i] = x[i] + y[i]
+            elif instr.code == CodeMul:
+                top -= 1
+                x -= BLOCK
+                y -= BLOCK
+                for i in range(n):
+                    x[i] = x[i] * y[i]
+            elif instr.code == CodeDiv:
+                top -= 1
+                x -= BLOCK
+                y -= BLOCK
+                for i in range(n):
+                    x[i] = x[i] / y[i]
+            elif instr.code == CodeRdiv:
+                for i in range(n):
+                    x[i] = a / x[i]
+            elif instr.code == CodePow:
+                for i in range(n):
+                    x[i] = math.pow(x[i], a)
+            elif instr.code == CodeIpow:
+                for i in range(n):
+                    x[i] = c.ipow(x[i], instr.n)
+            else:
+                for i in range(n):
+                    x[i] = instr.fn(x[i])
+        for i in range(n):
+            out[start + i] = stack[i]
+        start += n
+
+
+@cython.final
+cdef class Formula:
+    """
+    A compiled expression; call it with a value for each symbol, as
+    positional arguments in the order of `symbols` or by name.
+    """
+
+    cdef Instr* code
+    cdef Py_ssize_t size
+    cdef Py_ssize_t depth
+    cdef Py_ssize_t max_depth
+    cdef c.UData udata
+    cdef c.UData inputs[MAX_SYMBOLS]
+    cdef Py_ssize_t nargs
+    cdef dict c_index
+    cdef tuple c_symbols
+    cdef Expr c_expression
+
+    def __init__(self, *args, **kwargs):
+        raise TypeError("formulas are created with Expr.compile()")
+
+    @property
+    def units(self):
+        return q.make_unit(self.udata)
+
+    @property
+    def symbols(self):
+        return self.c_symbols
+
+    @property
+    def expression(self):
+        return self.c_expression
+
+    def __dealloc__(Formula self):
+        free(self.code)
+
+    cdef void push(Formula self, Code code, double a) noexcept:
+        self.code[self.size].code = code
+        self.code[self.size].a = a
+        self.size += 1
+
+    #top = a * top, merged into the instruction that produced top if it can be
+    cdef void scale_top(Formula self, double a) noexcept:
+        cdef Instr* last = &self.code[self.size - 1]
+        if a == 1:
+            return
+        if last.code == CodeLoad or last.code == CodeConst or last.code == CodeScale:
+            last.a *= a
+        else:
+            self.push(CodeScale, a)
+
+    cdef int grow(Formula self, Py_ssize_t count) except -1:
+        self.depth += count
+        if self.depth > MAX_DEPTH:
+            raise ValueError("expression nested too deeply")
+        if self.depth > self.max_depth:
+            self.max_depth = self.depth
+        return 0
+
+    cdef int emit(Formula self, Expr node) except -1:
+        if node.kind == KindSymbol:
+            if not c.eq_ddata(node.udata.dimensions, self.inputs[self.c_index[node.name]].dimensions):
+                raise ValueError("symbol %r has conflicting units" % node.name)
+            #inputs are passed in the units of the first occurrence of the
+            #symbol, other occurrences may differ in scale
+            self.grow(1)
+            self.push(CodeLoad, self.inputs[self.c_index[node.name]].scale / node.udata.scale)
+            self.code[self.size - 1].arg = self.c_index[node.name]
+        elif node.kind == KindConst:
+            self.grow(1)
+            self.push(CodeConst, node.value)
+        elif node.kind == KindLinear:
+            if node.rhs.kind == KindConst:
+                self.emit(node.lhs)
+                self.scale_top(node.a)
+                self.push(CodeOffset, node.b * node.rhs.value)
+            elif node.lhs.kind == KindConst:
+                self.emit(node.rhs)
+                self.scale_top(node.b)
+                self.push(CodeOffset, node.a * node.lhs.value)
+            else:
+                self.emit(node.lhs)
+                self.scale_top(node.a)
+                self.emit(node.rhs)
+                self.scale_top(node.b)
+                self.push(CodeAdd, 0)
+                self.depth -= 1
+        elif node.kind == KindMul:
+            if node.rhs.kind == KindConst:
+                self.emit(node.lhs)
+                self.scale_top(node.rhs.value)
+            elif node.lhs.kind == KindConst:
+                self.emit(node.rhs)
+                self.scale_top(node.lhs.value)
+            else:
+                self.emit(node.lhs)
+                self.emit(node.rhs)
+                self.push(CodeMul, 0)
+                self.depth -= 1
+        elif node.kind == KindDiv:
+            if node.rhs.kind == KindConst:
+                self.emit(node.lhs)
+                self.scale_top(1.0 / node.rhs.value)
+            elif node.lhs.kind == KindConst:
+                self.emit(node.rhs)
+                self.push(CodeRdiv, node.lhs.value)
+            else:
+                self.emit(node.lhs)
+                self.emit(node.rhs)
+                self.push(CodeDiv, 0)
+                self.depth -= 1
+        elif node.kind == KindPow:
+            self.emit(node.lhs)
+            self.push(CodePow, node.value)
+        elif node.kind == KindIpow:
+            self.emit(node.lhs)
+            self.push(CodeIpow, 0)
+            self.code[self.size - 1].n = node.power
+        elif node.kind == KindNeg:
+            self.emit(node.lhs)
+            self.scale_top(-1.0)
+        else:
+            self.emit(node.lhs)
+            self.scale_top(node.a)
+            self.push(CodeCall, 0)
+            self.code[self.size - 1].fn = node.fn
+        return 0
+
+    def __call__(Formula self, *args, **kwargs):
+        cdef Py_ssize_t i, j, size = -1
+        cdef object value
+        cdef type value_type
+        cdef c.UData* udata
+        cdef double[:] view
+        cdef list views = None
+        cdef const char* data[MAX_SYMBOLS]
+        cdef Py_ssize_t strides[MAX_SYMBOLS]
+        cdef double factors[MAX_SYMBOLS]
+        cdef double scalars[MAX_SYMBOLS]
+        cdef double stack[MAX_DEPTH]
+        cdef double* array_stack
+        cdef q.QuantityArray ret
+
+        if len(args) > self.nargs:
+            raise TypeError("expected at most %i arguments, got %i" % (self.nargs, len(args)))
+        if kwargs:
+            args = self.bind(args, kwargs)
+        elif len(args) < self.nargs:
+            raise TypeError("missing value for %r" % self.c_symbols[len(args)])
+
+        for i in range(self.nargs):
+            value = args[i]
+            value_type = type(value)
+            view = None
+            strides[i] = 0
+            data[i] = <const char*>&scalars[i]
+            if value_type is q.Quantity:
+                udata = &(<q.Quantity>value).udata
+                if (<q.Quantity>value).py_value is None:
+                    scalars[i] = (<q.Quantity>value).c_value
+                else:
+                    view = q.as_doubles((<q.Quantity>value).py_value)
+            elif value_type is q.QuantityArray:
+                udata = &(<q.QuantityArray>value).udata
+                view = (<q.QuantityArray>value).c_values
+            elif value_type is float or value_type is int:
+                udata = &UNITY
+                scalars[i] = value
+            else:
+                raise TypeError("Expected Quantity, QuantityArray or number for %r" % self.c_symbols[i])
+
+            if not c.eq_ddata(udata.dimensions, self.inputs[i].dimensions):
+                raise ValueError("unit mismatch for %r" % self.c_symbols[i])
+            factors[i] = udata.scale / self.inputs[i].scale
+
+            if view is not None:
+                if size < 0:
+                    size = view.shape[0]
+                    views = []
+                elif view.shape[0] != size:
+                    raise ValueError("size mismatch: %i != %i" % (view.shape[0], size))
+                views.append(view)
+                if size:
+                    data[i] = <const char*>&view[0]
+                    strides[i] = view.strides[0]
+
+        if size < 0:
+            for i in range(self.nargs):
+                scalars[i] *= factors[i]
+            return make_scalar(run(self.code, self.size, scalars, stack), self.udata)
+
+        ret = q.new_qarray(self.udata, size)
+        array_stack = <double*>malloc(self.max_depth * BLOCK * sizeof(double))
+        if array_stack == NULL:
+            raise MemoryError()
+        try:
+            if size < NOGIL_MIN:
+                run_array(self.code, self.size, data, strides, factors, array_stack, ret.c_values)
+            else:
+                with nogil:
+                    run_array(self.code, self.size, data, strides, factors, array_stack, ret.c_values)
+        finally:
+            free(array_stack)
+        return ret
+
+    cdef tuple bind(Formula self, tuple args, dict kwargs):
+        cdef list values = list(args) + [None] * (self.nargs - len(args))
+        cdef Py_ssize_t i
+        for name, value in kwargs.items():
+            i = self.c_index.get(name, -1)
+            if i < 0:
+                raise TypeError("unexpected symbol %r" % name)
+            if i < len(args):
+                raise TypeError("multiple values for %r" % name)
+            values[i] = value
+        for i in range(self.nargs):
+            if values[i] is None:
+                raise TypeError("missing value for %r" % self.c_symbols[i])
+        return tuple(values)
+
+    def __repr__(Formula self):
+        return "Formula(%r, %r)" % (self.c_expression, self.units)
+
+cdef Formula new_formula(Expr expression, q.SIUnit units, object args):
+    cdef Formula ret = Formula.__new__(Formula)
+    cdef dict symbols = {}
+    cdef Expr node
+    cdef Py_ssize_t i
+
+    collect_symbols(expression, symbols)
+    if args is None:
+        names = tuple(symbols)
+    else:
+        names = tuple([(<Expr>arg).name if type(arg) is Expr else arg for arg in args])
+        if sorted(names) != sorted(symbols):
+            raise ValueError("args must name each symbol once: %r" % (tuple(symbols),))
+    if len(names) > MAX_SYMBOLS:
+        raise ValueError("too many symbols (at most %i)" % MAX_SYMBOLS)
+
+    ret.c_expression = expression
+    ret.c_symbols = names
+    ret.c_index = {}
+    ret.nargs = len(names)
+    for i, name in enumerate(names):
+        node = symbols[name]
+        ret.c_index[name] = i
+        ret.inputs[i] = node.udata
+
+    ret.code = <Instr*>malloc((3 * expression.nodes + 1) * sizeof(Instr))
+    if ret.code == NULL:
+        raise MemoryError()
+    ret.emit(expression)
+
+    ret.udata = expression.udata
+    if units is not None:
+        ret.scale_top(q.convert_factor(expression.udata, units.data))
+        ret.udata = units.data
+    return ret
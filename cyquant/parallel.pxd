@@ -0,0 +1,21 @@
+cimport cyquant.kernels as k
+
+# the elementwise kernels of cyquant.kernels, releasing the GIL for large
+# buffers and splitting buffers of at least 2 * min_chunk elements across
+# the configured number of threads.
+
+cdef int scale(double[:] out, const double[:] x, double a) except -1
+cdef int axpby(double[:] out, double a, const double[:] x, double b, const double[:] y) except -1
+cdef int axpc(double[:] out, double a, const double[:] x, double c) except -1
+cdef int mul(double[:] out, const double[:] x, const double[:] y) except -1
+cdef int div(double[:] out, const double[:] x, const double[:] y) except -1
+cdef int divc(double[:] out, const double[:] x, double c) except -1
+cdef int rdiv(double[:] out, double c, const double[:] x) except -1
+cdef int power(double[:] out, const double[:] x, double p) except -1
+cdef int ipower(double[:] out, const double[:] x, long n) except -1
+cdef int absolute(double[:] out, const double[:] x) except -1
+cdef int compare(signed char[:] out, double a, const double[:] x, double b, const double[:] y, k.CmpOp op) except -1
+cdef int compare_c(signed char[:] out, double a, const double[:] x, double c, k.CmpOp op) except -1
+cdef int apply(double[:] out, const double[:] x, double a, k.UnaryFn fn) except -1
+cdef int apply2(double[:] out, const double[:] x, double a, const double[:] y, double b, k.BinaryFn fn) except -1
+cdef int sin_cos(double[:] out_sin, double[:] out_cos, const double[:] x, double a) except -1
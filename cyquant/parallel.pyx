@@ -0,0 +1,407 @@
+#!python
+#cython: language_level=3
+
+"""
+Multi threaded array kernels
+
+QuantityArray arithmetic, conversion, comparison and the qmath functions
+release the GIL for buffers of a few thousand elements and up, so other
+Python threads keep running meanwhile. Buffers of at least 2 * min_chunk
+elements can also be split across a pool of threads:
+
+    parallel.set_threads(0)     # one per cpu
+    parallel.set_threads(1)     # the default, everything on the caller
+"""
+
+cimport cython
+
+cimport cyquant.kernels as k
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+
+#buffers shorter than this are done before another thread could make use
+#of the GIL, so releasing it would only add to their cost
+cdef enum:
+    NOGIL_MIN = 4096
+
+cdef int THREADS = 1
+cdef Py_ssize_t MIN_CHUNK = 1 << 16
+cdef object EXECUTOR = None
+
+def get_threads():
+    return THREADS
+
+def set_threads(int threads):
+    """
+    Sets the number of threads large array operations are split across,
+    including the calling thread. 0 uses one thread per cpu.
+    """
+    global THREADS
+    if threads < 0:
+        raise ValueError("threads must not be negative")
+    if threads == 0:
+        threads = os.cpu_count() or 1
+    if threads != THREADS:
+        reset_executor()
+    THREADS = threads
+
+def get_min_chunk():
+    return MIN_CHUNK
+
+def set_min_chunk(Py_ssize_t size):
+    """
+    Sets the fewest elements handed to a thread; smaller buffers are not
+    split at all.
+    """
+    global MIN_CHUNK
+    if size < 1:
+        raise ValueError("min_chunk must be positive")
+    MIN_CHUNK = size
+
+cdef reset_executor():
+    global EXECUTOR
+    if EXECUTOR is not None:
+        EXECUTOR.shutdown(wait=False)
+    EXECUTOR = None
+
+cdef object executor():
+    global EXECUTOR
+    if EXECUTOR is None:
+        EXECUTOR = ThreadPoolExecutor(max_workers=THREADS - 1, thread_name_prefix="cyquant")
+    return EXECUTOR
+
+def _forget_executor():
+    #the worker threads do not survive a fork
+    global EXECUTOR
+    EXECUTOR = None
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_executor)
+
+
+cdef enum Op:
+    OpScale
+    OpAxpby
+    OpAxpc
+    OpMul
+    OpDiv
+    OpDivc
+    OpRdiv
+    OpPower
+    OpIpower
+    OpAbsolute
+    OpCompare
+    OpCompareC
+    OpApply
+    OpApply2
+    OpSinCos
+
+#one kernel call, run over [start, stop) slices of its buffers
+@cython.final
+cdef class Batch:
+    cdef Op op
+    cdef Py_ssize_t size
+    cdef double[:] out
+    cdef double[:] out2
+    cdef signed char[:] mask
+    cdef const double[:] x
+    cdef const double[:] y
+    cdef double a
+    cdef double b
+    cdef long n
+    cdef k.CmpOp cmp
+    cdef k.UnaryFn fn
+    cdef k.BinaryFn fn2
+
+    cdef void run(Batch self, Py_ssize_t start, Py_ssize_t stop) noexcept nogil:
+        if self.op == OpScale:
+            k.scale(self.out[start:stop], self.x[start:stop], self.a)
+        elif self.op == OpAxpby:
+            k.axpby(self.out[start:stop], self.a, self.x[start:stop], self.b, self.y[start:stop])
+        elif self.op == OpAxpc:
+            k.axpc(self.out[start:stop], self.a, self.x[start:stop], self.b)
+        elif self.op == OpMul:
+            k.mul(self.out[start:stop], self.x[start:stop], self.y[start:stop])
+        elif self.op == OpDiv:
+            k.div(self.out[start:stop], self.x[start:stop], self.y[start:stop])
+        elif self.op == OpDivc:
+            k.divc(self.out[start:stop], self.x[start:stop], self.a)
+        elif self.op == OpRdiv:
+            k.rdiv(self.out[start:stop], self.a, self.x[start:stop])
+        elif self.op == OpPower:
+            k.power(self.out[start:stop], self.x[start:stop], self.a)
+        elif self.op == OpIpower:
+            k.ipower(self.out[start:stop], self.x[start:stop], self.n)
+        elif self.op == OpAbsolute:
+            k.absolute(self.out[start:stop], self.x[start:stop])
+        elif self.op == OpCompare:
+            k.compare(self.mask[start:stop], self.a, self.x[start:stop], self.b, self.y[start:stop], self.cmp)
+        elif self.op == OpCompareC:
+            k.compare_c(self.mask[start:stop], self.a, self.x[start:stop], self.b, self.cmp)
+        elif self.op == OpApply:
+            k.apply(self.out[start:stop], self.x[start:stop], self.a, self.fn)
+        elif self.op == OpApply2:
+            k.apply2(self.out[start:stop], self.x[start:stop], self.a, self.y[start:stop], self.b, self.fn2)
+        elif self.op == OpSinCos:
+            k.sin_cos(self.out[start:stop], self.out2[start:stop], self.x[start:stop], self.a)
+
+    def chunk(Batch self, Py_ssize_t start, Py_ssize_t stop):
+        with nogil:
+            self.run(start, stop)
+
+cdef inline bint serial(Py_ssize_t size) noexcept:
+    return THREADS <= 1 or size < 2 * MIN_CHUNK
+
+cdef Batch new_batch(Op op, const double[:] x):
+    cdef Batch ret = Batch.__new__(Batch)
+    ret.op = op
+    ret.size = x.shape[0]
+    ret.x = x
+    return ret
+
+cdef int run(Batch batch) except -1:
+    cdef Py_ssize_t chunks = min(THREADS, batch.size // MIN_CHUNK)
+    cdef Py_ssize_t step = (batch.size + chunks - 1) // chunks
+    cdef Py_ssize_t start
+
+    #chunks are rounded up to multiples of 8 elements (64 bytes), which keeps
+    #their bounds on separate cache lines when the buffer is 64-byte aligned
+    step = (step + 7) & ~7
+
+    submit = executor().submit
+    futures = [
+        submit(batch.chunk, start, min(start + step, batch.size))
+        for start in range(step, batch.size, step)
+    ]
+    try:
+        with nogil:
+            batch.run(0, min(step, batch.size))
+    finally:
+        for future in futures:
+            future.result()
+    return 0
+
+
+cdef int scale(double[:] out, const double[:] x, double a) except -1:
+    cdef Batch batch
+    if not serial(x.shape[0]):
+        batch = new_batch(OpScale, x)
+        batch.out = out
+        batch.a = a
+        return run(batch)
+    if x.shape[0] < NOGIL_MIN:
+        k.scale(out, x, a)
+    else:
+        with nogil:
+            k.scale(out, x, a)
+    return 0
+
+cdef int axpby(double[:] out, double a, const double[:] x, double b, const double[:] y) except -1:
+    cdef Batch batch
+    if not serial(x.shape[0]):
+        batch = new_batch(OpAxpby, x)
+        batch.out = out
+        batch.y = y
+        batch.a = a
+        batch.b = b
+        return run(batch)
+    if x.shape[0] < NOGIL_MIN:
+        k.axpby(out, a, x, b, y)
+    else:
+        with nogil:
+            k.axpby(out, a, x, b, y)
+    return 0
+
+cdef int axpc(double[:] out, double a, const double[:] x, double c) except -1:
+    cdef Batch batch
+    if not serial(x.shape[0]):
+        batch = new_batch(OpAxpc, x)
+        batch.out = out
+        batch.a = a
+        batch.b = c
+        return run(batch)
+    if x.shape[0] < NOGIL_MIN:
+        k.axpc(out, a, x, c)
+    else:
+        with nogil:
+            k.axpc(out, a, x, c)
+    return 0
+
+cdef int mul(double[:] out, const double[:] x, const double[:] y) except -1:
+    cdef Batch batch
+    if not serial(x.shape[0]):
+        batch = new_batch(OpMul, x)
+        batch.out = out
+        batch.y = y
+        return run(batch)
+    if x.shape[0] < NOGIL_MIN:
+        k.mul(out, x, y)
+    else:
+        with nogil:
+            k.mul(out, x, y)
+    return 0
+
+cdef int div(double[:] out, const double[:] x, const double[:] y) except -1:
+    cdef Batch batch
+    if not serial(x.shape[0]):
+        batch = new_batch(OpDiv, x)
+        batch.out = out
+        batch.y = y
+        return run(batch)
+    if x.shape[0] < NOGIL_MIN:
+        k.div(out, x, y)
+    else:
+        with nogil:
+            k.div(out, x, y)
+    return 0
+
+cdef int divc(double[:] out, const double[:] x, double c) except -1:
+    cdef Batch batch
+    if not serial(x.shape[0]):
+        batch = new_batch(OpDivc, x)
+        batch.out = out
+        batch.a = c
+        return run(batch)
+    if x.shape[0] < NOGIL_MIN:
+        k.divc(out, x, c)
+    else:
+        with nogil:
+            k.divc(out, x, c)
+    return 0
+
+cdef int rdiv(double[:] out, double c, const double[:] x) except -1:
+    cdef Batch batch
+    if not serial(x.shape[0]):
+        batch = new_batch(OpRdiv, x)
+        batch.out = out
+        batch.a = c
+        return run(batch)
+    if x.shape[0] < NOGIL_MIN:
+        k.rdiv(out, c, x)
+    else:
+        with nogil:
+            k.rdiv(out, c, x)
+    return 0
+
+cdef int power(double[:] out, const double[:] x, double p) except -1:
+    cdef Batch batch
+    if not serial(x.shape[0]):
+        batch = new_batch(OpPower, x)
+        batch.out = out
+        batch.a = p
+        return run(batch)
+    if x.shape[0] < NOGIL_MIN:
+        k.power(out, x, p)
+    else:
+        with nogil:
+            k.power(out, x, p)
+    return 0
+
+cdef int ipower(double[:] out, const double[:] x, long n) except -1:
+    cdef Batch batch
+    if not serial(x.shape[0]):
+        batch = new_batch(OpIpower, x)
+        batch.out = out
+        batch.n = n
+        return run(batch)
+    if x.shape[0] < NOGIL_MIN:
+        k.ipower(out, x, n)
+    else:
+        with nogil:
+            k.ipower(out, x, n)
+    return 0
+
+cdef int absolute(double[:] out, const double[:] x) except -1:
+    cdef Batch batch
+    if not serial(x.shape[0]):
+        batch = new_batch(OpAbsolute, x)
+        batch.out = out
+        return run(batch)
+    if x.shape[0] < NOGIL_MIN:
+        k.absolute(out, x)
+    else:
+        with nogil:
+            k.absolute(out, x)
+    return 0
+
+cdef int compare(signed char[:] out, double a, const double[:] x, double b, const double[:] y, k.CmpOp op) except -1:
+    cdef Batch batch
+    if not serial(x.shape[0]):
+        batch = new_batch(OpCompare, x)
+        batch.mask = out
+        batch.y = y
+        batch.a = a
+        batch.b = b
+        batch.cmp = op
+        return run(batch)
+    if x.shape[0] < NOGIL_MIN:
+        k.compare(out, a, x, b, y, op)
+    else:
+        with nogil:
+            k.compare(out, a, x, b, y, op)
+    return 0
+
+cdef int compare_c(signed char[:] out, double a, const double[:] x, double c, k.CmpOp op) except -1:
+    cdef Batch batch
+    if not serial(x.shape[0]):
+        batch = new_batch(OpCompareC, x)
+        batch.mask = out
+        batch.a = a
+        batch.b = c
+        batch.cmp = op
+        return run(batch)
+    if x.shape[0] < NOGIL_MIN:
+        k.compare_c(out, a, x, c, op)
+    else:
+        with nogil:
+            k.compare_c(out, a, x, c, op)
+    return 0
+
+cdef int apply(double[:] out, const double[:] x, double a, k.UnaryFn fn) except -1:
+    cdef Batch batch
+    if not serial(x.shape[0]):
+        batch = new_batch(OpApply, x)
+        batch.out = out
+        batch.a = a
+        batch.fn = fn
+        return run(batch)
+    if x.shape[0] < NOGIL_MIN:
+        k.apply(out, x, a, fn)
+    else:
+        with nogil:
+            k.apply(out, x, a, fn)
+    return 0
+
+cdef int apply2(double[:] out, const double[:] x, double a, const double[:] y, double b, k.BinaryFn fn) except -1:
+    cdef Batch batch
+    if not serial(x.shape[0]):
+        batch = new_batch(OpApply2, x)
+        batch.out = out
+        batch.y = y
+        batch.a = a
+        batch.b = b
+        batch.fn2 = fn
+        return run(batch)
+    if x.shape[0] < NOGIL_MIN:
+        k.apply2(out, x, a, y, b, fn)
+    else:
+        with nogil:
+            k.apply2(out, x, a, y, b, fn)
+    return 0
+
+cdef int sin_cos(double[:] out_sin, double[:] out_cos, const double[:] x, double a) except -1:
+    cdef Batch batch
+    if not serial(x.shape[0]):
+        batch = new_batch(OpSinCos, x)
+        batch.out = out_sin
+        batch.out2 = out_cos
+        batch.a = a
+        return run(batch)
+    if x.shape[0] < NOGIL_MIN:
+        k.sin_cos(out_sin, out_cos, x, a)
+    else:
+        with nogil:
+            k.sin_cos(out_sin, out_cos, x, a)
+    return 0
@@ -0,0 +1,236 @@
+import re
+
+from functools import lru_cache
+
+from cyquant import si
+from cyquant.quantities import SIUnit
+
+#: prefix symbols and names, keyed to their power of ten
+PREFIXES = {
+    "Y": 24, "Z": 21, "E": 18, "P": 15, "T": 12, "G": 9, "M": 6, "k": 3, "h": 2, "da": 1,
+    "d": -1, "c": -2, "m": -3, "µ": -6, "u": -6, "n": -9, "p": -12, "f": -15, "a": -18, "z": -21, "y": -24,
+}
+
+PREFIX_NAMES = {
+    "yotta": 24, "zetta": 21, "exa": 18, "peta": 15, "tera": 12, "giga": 9, "mega": 6, "kilo": 3,
+    "hecto": 2, "hecta": 2, "deka": 1, "deca": 1, "deci": -1, "centi": -2, "milli": -3, "micro": -6,
+    "nano": -9, "pico": -12, "femto": -15, "atto": -18, "zepto": -21, "yocto": -24,
+}
+
+#: unit symbols which accept a prefix
+SYMBOLS = {
+    "m": si.meters,
+    "g": si.grams,
+    "s": si.seconds,
+    "K": si.kelvin,
+    "A": si.amperes,
+    "mol": si.mols,
+    "cd": si.candelas,
+    "rad": si.radians,
+    "sr": si.steradians,
+    "Hz": si.hertz,
+    "N": si.newtons,
+    "Pa": si.pascals,
+    "J": si.joules,
+    "W": si.watts,
+    "C": si.coulombs,
+    "V": si.volts,
+    "F": si.farads,
+    "Ω": si.ohms,
+    "ohm": si.ohms,
+    "S": si.siemens,
+    "Wb": si.webers,
+    "T": si.teslas,
+    "H": si.henrys,
+    "lm": si.lumens,
+    "lx": si.lux,
+    "Bq": si.becquerels,
+    "Gy": si.grays,
+    "Sv": si.sieverts,
+    "kat": si.katals,
+    "L": si.liters,
+    "l": si.liters,
+    "t": si.tonnes,
+    "Gal": si.gals,
+}
+
+#: unit symbols which do not accept a prefix
+PLAIN_SYMBOLS = {
+    "deg": si.degrees,
+    "°": si.degrees,
+    "min": si.minutes,
+    "h": si.hours,
+    "d": si.days,
+    "wk": si.weeks,
+    "yr": si.years,
+}
+
+#: every unit defined in `cyquant.si`, by name
+NAMES = {name: value for name, value in vars(si).items() if type(value) is SIUnit}
+
+PARSE_CACHE_SIZE = 1024
+
+_TOKENS = re.compile(r"\s*(?:(\*\*|[*/^()·.-])|(\d+(?:\.\d*)?(?:[eE][-+]?\d+)?)|([^\W\d]\w*|°|Ω))")
+
+
+def _lookup(name: str) -> SIUnit:
+    unit = PLAIN_SYMBOLS.get(name) or SYMBOLS.get(name) or NAMES.get(name)
+    if unit is not None:
+        return unit
+
+    for prefix, power in PREFIXES.items():
+        if name.startswith(prefix) and name[len(prefix):] in SYMBOLS:
+            return SIUnit.Unit(10.0 ** power) * SYMBOLS[name[len(prefix):]]
+
+    for prefix, power in PREFIX_NAMES.items():
+        if name.startswith(prefix) and name[len(prefix):] in NAMES:
+            return SIUnit.Unit(10.0 ** power) * NAMES[name[len(prefix):]]
+
+    raise ValueError(f"unknown unit '{name}'")
+
+
+def _tokenize(text: str) -> list:
+    tokens = []
+    pos = 0
+    text = text.rstrip()
+    while pos < len(text):
+        match = _TOKENS.match(text, pos)
+        if match is None:
+            raise ValueError(f"invalid unit expression '{text}'")
+        tokens.append(match.groups())
+        pos = match.end()
+    return tokens
+
+
+class _Parser:
+    """Recursive descent over the token list
+
+        expr   := term (('*' | '/' | '·' | '.' | <juxtaposition>) term)*
+        term   := factor (('^' | '**') power)?
+        factor := NAME | NUMBER | '(' expr ')'
+        power  := '-'? NUMBER | '(' '-'? NUMBER ('/' NUMBER)? ')'
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.tokens = _tokenize(text)
+        self.pos = 0
+
+    def error(self):
+        return ValueError(f"invalid unit expression '{self.text}'")
+
+    def peek(self):
+        if self.pos < len(self.tokens):
+            return self.tokens[self.pos]
+        return (None, None, None)
+
+    def take(self):
+        token = self.peek()
+        self.pos += 1
+        return token
+
+    def expect(self, op: str):
+        if self.take()[0] != op:
+            raise self.error()
+
+    def parse(self) -> SIUnit:
+        if not self.tokens:
+            raise self.error()
+        unit = self.expr()
+        if self.pos != len(self.tokens):
+            raise self.error()
+        return unit
+
+    def expr(self) -> SIUnit:
+        unit = self.term()
+        while True:
+            op, number, name = self.peek()
+            if op in ("*", "·", "."):
+                self.take()
+                unit = unit * self.term()
+            elif op == "/":
+                self.take()
+                unit = unit / self.term()
+            elif op == "(" or number is not None or name is not None:
+                unit = unit * self.term()
+            else:
+                return unit
+
+    def term(self) -> SIUnit:
+        unit = self.factor()
+        if self.peek()[0] in ("^", "**"):
+            self.take()
+            unit = unit ** self.power()
+        return unit
+
+    def factor(self) -> SIUnit:
+        op, number, name = self.take()
+        if name is not None:
+            return _lookup(name)
+        if number is not None:
+            if float(number) <= 0:
+                raise self.error()
+            return SIUnit.Unit(float(number))
+        if op == "(":
+            unit = self.expr()
+            self.expect(")")
+            return unit
+        raise self.error()
+
+    def number(self) -> float:
+        sign = 1.0
+        if self.peek()[0] == "-":
+            self.take()
+            sign = -1.0
+        number = self.take()[1]
+        if number is None:
+            raise self.error()
+        return sign * float(number)
+
+    def power(self) -> float:
+        if self.peek()[0] != "(":
+            return self.number()
+        self.take()
+        power = self.number()
+        if self.peek()[0] == "/":
+            self.take()
+            power = power / self.number()
+        self.expect(")")
+        return power
+
+
+def _parse(text: str) -> SIUnit:
+    return _Parser(text).parse()
+
+
+_parse_cached = lru_cache(maxsize=PARSE_CACHE_SIZE)(_parse)
+
+
+def parse_unit(text: str) -> SIUnit:
+    """Parses a unit expression such as "kN*m/s^2" or "mm**3"
+
+    Names may be any unit defined in `cyquant.si`, or an SI symbol with an
+    optional prefix. Results are memoized in an LRU cache.
+
+    :param text: unit expression
+    :type text: str
+    :raises ValueError: on unknown units or malformed expressions
+    :return: the parsed unit
+    :rtype: SIUnit
+    """
+    if type(text) is not str:
+        raise TypeError("Expected str")
+    return _parse_cached(text)
+
+
+def set_parse_cache_size(size: int):
+    """Resizes (and clears) the parse cache; a size of 0 disables it"""
+    global _parse_cached, PARSE_CACHE_SIZE
+    if size < 0:
+        raise ValueError("cache size must be greater than or equal to 0.")
+    PARSE_CACHE_SIZE = size
+    _parse_cached = lru_cache(maxsize=size)(_parse)
+
+
+def parse_cache_info():
+    return _parse_cached.cache_info()
@@ -1,4 +1,6 @@
 cimport cyquant.ctypes as c
+cimport cyquant.kernels as k
+cimport cyquant.parallel as p
 
 cimport cyquant.quantities as q
 import cyquant.quantities as q
@@ -12,52 +14,143 @@ pi = math.pi * si.radians
 eta = pi / 2
 tau = pi * 2
 
-cpdef sin(q.Quantity value):
-    cdef double rads = value.get_as(si.radians)
+cdef c.UData RADIANS = (<q.SIUnit>si.radians).data
+cdef c.UData UNITY = (<q.SIUnit>si.unity).data
+
+cdef inline q.Quantity as_quantity(object value):
+    if type(value) is not q.Quantity:
+        raise TypeError("Expected Quantity or QuantityArray")
+    return value
+
+cdef q.QuantityArray map_array(q.QuantityArray value, const c.UData& src, const c.UData& dst, k.UnaryFn fn):
+    cdef double factor = value.rescale(src)
+    cdef q.QuantityArray ret = q.new_qarray(dst, value.c_values.shape[0])
+    p.apply(ret.c_values, value.c_values, factor, fn)
+    return ret
+
+cdef q.QuantityArray map_arrays(object lhs, object rhs, c.UData& out, k.BinaryFn fn, bint exclude_origin):
+    if type(lhs) is not q.QuantityArray or type(rhs) is not q.QuantityArray:
+        raise TypeError("Expected QuantityArray arguments")
+
+    cdef q.QuantityArray x = lhs
+    cdef q.QuantityArray y = rhs
+    cdef q.QuantityArray ret
+    cdef int error_code
+
+    error_code = c.min_udata(out, x.udata, y.udata)
+
+    if error_code == c.Success:
+        if x.c_values.shape[0] != y.c_values.shape[0]:
+            raise ValueError("size mismatch")
+        if exclude_origin and k.any_origin(x.c_values, y.c_values):
+            raise ValueError("math domain error")
+
+        ret = q.new_qarray(out, x.c_values.shape[0])
+        p.apply2(
+            ret.c_values,
+            x.c_values, x.udata.scale / out.scale,
+            y.c_values, y.udata.scale / out.scale,
+            fn
+        )
+        return ret
+
+    if error_code == c.DimensionMismatch:
+        raise ValueError("unit mismatch")
+
+    raise RuntimeError("Unknown Error Occurred: %i" % error_code)
+
+cpdef sin(object value):
+    if type(value) is q.QuantityArray:
+        return map_array(value, RADIANS, UNITY, math.sin)
+
+    cdef double rads = as_quantity(value).get_as(si.radians)
     cdef double ratio = math.sin(rads)
     return si.unity.promote(ratio)
 
-cpdef cos(q.Quantity value):
-    cdef double rads = value.get_as(si.radians)
+cpdef cos(object value):
+    if type(value) is q.QuantityArray:
+        return map_array(value, RADIANS, UNITY, math.cos)
+
+    cdef double rads = as_quantity(value).get_as(si.radians)
     cdef double ratio = math.cos(rads)
     return si.unity.promote(ratio)
 
-cpdef sin_cos(q.Quantity value):
-    cdef double rads = value.get_as(si.radians)
+cpdef sin_cos(object value):
+    cdef q.QuantityArray array, sines, cosines
+    cdef Py_ssize_t size
+
+    if type(value) is q.QuantityArray:
+        array = value
+        size = array.c_values.shape[0]
+        sines = q.new_qarray(UNITY, size)
+        cosines = q.new_qarray(UNITY, size)
+        p.sin_cos(sines.c_values, cosines.c_values, array.c_values, array.rescale(RADIANS))
+        return sines, cosines
+
+    cdef double rads = as_quantity(value).get_as(si.radians)
     return (
         si.unity.promote(math.sin(rads)),
         si.unity.promote(math.cos(rads))
     )
 
-cpdef tan(q.Quantity value):
-    cdef double rads = value.get_as(si.radians)
+cpdef tan(object value):
+    if type(value) is q.QuantityArray:
+        return map_array(value, RADIANS, UNITY, math.tan)
+
+    cdef double rads = as_quantity(value).get_as(si.radians)
     cdef double ratio = math.tan(rads)
     return si.unity.promote(ratio)
 
-cpdef acos(q.Quantity value):
-    cdef double ratio = value.get_as(si.unity)
+cpdef acos(object value):
+    cdef q.QuantityArray array
+    if type(value) is q.QuantityArray:
+        array = value
+        if not k.within(array.c_values, array.rescale(UNITY), -1, 1):
+            raise ValueError("math domain error")
+        return map_array(array, UNITY, RADIANS, math.acos)
+
+    cdef double ratio = as_quantity(value).get_as(si.unity)
     if ratio < -1 or ratio > 1:
         raise ValueError("math domain error")
     cdef double rads = math.acos(ratio)
     return si.radians.promote(rads)
 
-cpdef asin(q.Quantity value):
-    cdef double ratio = value.get_as(si.unity)
+cpdef asin(object value):
+    cdef q.QuantityArray array
+    if type(value) is q.QuantityArray:
+        array = value
+        if not k.within(array.c_values, array.rescale(UNITY), -1, 1):
+            raise ValueError("math domain error")
+        return map_array(array, UNITY, RADIANS, math.asin)
+
+    cdef double ratio = as_quantity(value).get_as(si.unity)
     if ratio < -1 or ratio > 1:
         raise ValueError("math domain error")
     cdef double rads = math.asin(ratio)
     return si.radians.promote(rads)
 
-cpdef atan(q.Quantity value):
-    cdef double ratio = value.get_as(si.unity)
+cpdef atan(object value):
+    if type(value) is q.QuantityArray:
+        return map_array(value, UNITY, RADIANS, math.atan)
+
+    cdef double ratio = as_quantity(value).get_as(si.unity)
     cdef double rads = math.atan(ratio)
     return si.radians.promote(rads)
 
-cpdef atan2(q.Quantity y, q.Quantity x):
+cpdef atan2(object y_value, object x_value):
     cdef int error_code
     cdef c.UData norm_udata
     memset(&norm_udata, 0, sizeof(c.UData))
     cdef double x_norm, y_norm, rads
+    cdef q.QuantityArray ret
+
+    if type(y_value) is q.QuantityArray or type(x_value) is q.QuantityArray:
+        ret = map_arrays(y_value, x_value, norm_udata, math.atan2, True)
+        ret.udata = RADIANS
+        return ret
+
+    cdef q.Quantity y = as_quantity(y_value)
+    cdef q.Quantity x = as_quantity(x_value)
 
     error_code = c.min_udata(norm_udata, y.udata, x.udata)
 
@@ -78,7 +171,15 @@ cpdef atan2(q.Quantity y, q.Quantity x):
 
 
 
-cpdef hypot(q.Quantity x, q.Quantity y):
+cpdef hypot(object x_value, object y_value):
+    cdef c.UData norm_udata
+    memset(&norm_udata, 0, sizeof(c.UData))
+
+    if type(x_value) is q.QuantityArray or type(y_value) is q.QuantityArray:
+        return map_arrays(x_value, y_value, norm_udata, math.hypot, False)
+
+    cdef q.Quantity x = as_quantity(x_value)
+    cdef q.Quantity y = as_quantity(y_value)
     cdef q.Quantity ret = q.Quantity.__new__(q.Quantity)
     memset(&ret.udata, 0, sizeof(c.UData))
     cdef int error_code
@@ -99,4 +200,318 @@ cpdef hypot(q.Quantity x, q.Quantity y):
 
     raise RuntimeError("Unknown Error Occurred: %i" % error_code)
 
-#todo: exp/log/etc
+cdef map_ratio(object value, k.UnaryFn fn, double lo, double hi):
+    cdef q.QuantityArray array
+    cdef q.Quantity scalar
+    cdef double[:] values
+    cdef double factor
+    cdef double ratio
+    #nan only fails the check for functions with a restricted domain
+    cdef bint bounded = lo > -math.INFINITY or hi < math.INFINITY
+
+    if type(value) is q.QuantityArray:
+        array = value
+        if bounded and not k.within(array.c_values, array.rescale(UNITY), lo, hi):
+            raise ValueError("math domain error")
+        return map_array(array, UNITY, UNITY, fn)
+
+    scalar = as_quantity(value)
+    if getattr(scalar.py_value, "ndim", 0):
+        #ndarray values: evaluated in place on a C ordered float64 copy
+        factor = q.convert_factor(scalar.udata, UNITY)
+        result = scalar.py_value.astype(float, order='C')
+        values = q.as_doubles(result.reshape(-1))
+        if bounded and not k.within(values, factor, lo, hi):
+            raise ValueError("math domain error")
+        p.apply(values, values, factor, fn)
+        return si.unity.promote(result)
+
+    ratio = scalar.get_as(si.unity)
+    if ratio < lo or ratio > hi:
+        raise ValueError("math domain error")
+    return si.unity.promote(fn(ratio))
+
+cdef map_root(object value, int degree):
+    cdef q.QuantityArray array, ret_array
+    cdef q.Quantity scalar, ret
+    cdef double[:] values
+
+    if type(value) is q.QuantityArray:
+        array = value
+        ret_array = q.new_qarray(array.udata, array.c_values.shape[0])
+        if degree == 2:
+            if not k.within(array.c_values, 1.0, 0, math.INFINITY):
+                raise ValueError("math domain error")
+            q.check_error(c.sqrt_udata(ret_array.udata, array.udata))
+            p.apply(ret_array.c_values, array.c_values, 1.0, math.sqrt)
+        else:
+            q.check_error(c.cbrt_udata(ret_array.udata, array.udata))
+            p.apply(ret_array.c_values, array.c_values, 1.0, math.cbrt)
+        return ret_array
+
+    scalar = as_quantity(value)
+    ret = q.Quantity.__new__(q.Quantity)
+    if degree == 2:
+        q.check_error(c.sqrt_udata(ret.udata, scalar.udata))
+    else:
+        q.check_error(c.cbrt_udata(ret.udata, scalar.udata))
+
+    if getattr(scalar.py_value, "ndim", 0):
+        #ndarray values: same kernels and domain check as QuantityArray
+        result = scalar.py_value.astype(float, order='C')
+        values = q.as_doubles(result.reshape(-1))
+        if degree == 2:
+            if not k.within(values, 1.0, 0, math.INFINITY):
+                raise ValueError("math domain error")
+            p.apply(values, values, 1.0, math.sqrt)
+        else:
+            p.apply(values, values, 1.0, math.cbrt)
+        ret.py_value = result
+        return ret
+
+    if scalar.py_value is not None:
+        ret.py_value = scalar.py_value ** (1.0 / degree)
+        return ret
+
+    ret.py_value = None
+    if degree == 2:
+        if scalar.c_value < 0:
+            raise ValueError("math domain error")
+        ret.c_value = math.sqrt(scalar.c_value)
+    else:
+        ret.c_value = math.cbrt(scalar.c_value)
+    return ret
+
+cpdef sqrt(object value):
+    return map_root(value, 2)
+
+cpdef cbrt(object value):
+    return map_root(value, 3)
+
+cpdef ipow(object value, long power):
+    cdef q.QuantityArray array, ret_array
+    cdef q.Quantity scalar, ret
+
+    if type(value) is q.QuantityArray:
+        array = value
+        ret_array = q.new_qarray(array.udata, array.c_values.shape[0])
+        q.check_error(c.ipow_udata(ret_array.udata, array.udata, power))
+        p.ipower(ret_array.c_values, array.c_values, power)
+        return ret_array
+
+    scalar = as_quantity(value)
+    ret = q.Quantity.__new__(q.Quantity)
+    q.check_error(c.ipow_udata(ret.udata, scalar.udata, power))
+
+    if scalar.py_value is not None:
+        ret.py_value = scalar.py_value ** power
+        return ret
+
+    if scalar.c_value == 0 and power < 0:
+        raise ZeroDivisionError()
+    ret.py_value = None
+    ret.c_value = c.ipow(scalar.c_value, power)
+    return ret
+
+cpdef square(object value):
+    return ipow(value, 2)
+
+cpdef cube(object value):
+    return ipow(value, 3)
+
+cpdef exp(object value):
+    return map_ratio(value, math.exp, -math.INFINITY, math.INFINITY)
+
+cpdef expm1(object value):
+    return map_ratio(value, math.expm1, -math.INFINITY, math.INFINITY)
+
+cpdef log(object value):
+    return map_ratio(value, math.log, math.nextafter(0, 1), math.INFINITY)
+
+cpdef log10(object value):
+    return map_ratio(value, math.log10, math.nextafter(0, 1), math.INFINITY)
+
+cpdef log1p(object value):
+    return map_ratio(value, math.log1p, math.nextafter(-1, 0), math.INFINITY)
+
+"""
+Reductions
+
+Iterables must hold scalar Quantities. Values are accumulated as doubles in
+the units of the first element and rescaled once at the end, so there are
+no intermediate Quantity objects. The result is expressed in `units` when
+given, otherwise in the smallest unit seen (as `a + b` would).
+"""
+
+cdef enum Reduction:
+    ReduceSum
+    ReduceMin
+    ReduceMax
+
+#reduces `values` into `result`, in units of `udata`; returns the element count
+cdef Py_ssize_t reduce_values(
+    object values, Reduction op, bint compensated, object units,
+    c.UData& udata, double& result, bint& has_units
+) except -1:
+    cdef q.QuantityArray array
+    cdef q.Quantity value
+    cdef const double[:] data
+    cdef Py_ssize_t count = 0
+    cdef double acc_scale = 1.0, last_scale = 1.0, min_scale = 1.0, factor = 1.0
+    cdef double x, total = 0, comp = 0
+
+    (&has_units)[0] = False
+    if type(values) is q.QuantityArray:
+        array = values
+        udata = array.udata
+        (&has_units)[0] = True
+        data = array.c_values
+        count = data.shape[0]
+        with nogil:
+            if count == 0:
+                total = 0
+            elif op == ReduceMin:
+                total = k.minimum(data)
+            elif op == ReduceMax:
+                total = k.maximum(data)
+            elif compensated:
+                total = k.neumaier_sum(data)
+            else:
+                total = k.pairwise_sum(data, 0, count)
+    else:
+        for item in values:
+            if type(item) is not q.Quantity:
+                raise TypeError("Expected Quantity")
+            value = item
+            if value.py_value is not None:
+                raise TypeError("Expected scalar Quantity")
+
+            if count == 0:
+                udata = value.udata
+                (&has_units)[0] = True
+                acc_scale = last_scale = min_scale = udata.scale
+            else:
+                if not c.eq_ddata(udata.dimensions, value.udata.dimensions):
+                    raise ValueError("unit mismatch")
+                if value.udata.scale != last_scale:
+                    last_scale = value.udata.scale
+                    factor = last_scale / acc_scale
+                    if last_scale < min_scale:
+                        min_scale = last_scale
+
+            x = value.c_value * factor
+            if count == 0:
+                total = x
+            elif op == ReduceMin:
+                if total == total and (x < total or x != x):
+                    total = x
+            elif op == ReduceMax:
+                if total == total and (x > total or x != x):
+                    total = x
+            elif compensated:
+                k.neumaier_add(total, comp, x)
+            else:
+                total += x
+            count += 1
+
+        total += comp
+        if count:
+            total *= acc_scale / min_scale
+            udata.scale = min_scale
+
+    if units is not None:
+        if has_units:
+            if not c.eq_ddata(udata.dimensions, (<q.SIUnit>units).data.dimensions):
+                raise ValueError("unit mismatch")
+            total *= udata.scale / (<q.SIUnit>units).data.scale
+        udata = (<q.SIUnit>units).data
+
+    (&result)[0] = total
+    return count
+
+cdef q.Quantity make_scalar(double value, const c.UData& udata):
+    cdef q.Quantity ret = q.Quantity.__new__(q.Quantity)
+    ret.udata = udata
+    ret.py_value = None
+    ret.c_value = value
+    return ret
+
+cpdef qsum(object values, q.SIUnit units=None, bint compensated=False):
+    """
+    Sum of a QuantityArray or an iterable of Quantities. With `compensated`
+    the sum is accumulated with Neumaier's algorithm; arrays are otherwise
+    summed pairwise.
+    """
+    cdef c.UData udata
+    cdef double result = 0
+    cdef bint has_units = False
+    reduce_values(values, ReduceSum, compensated, units, udata, result, has_units)
+    if not has_units and units is None:
+        raise ValueError("qsum() of an empty sequence requires units")
+    return make_scalar(result, udata)
+
+cpdef qmean(object values, q.SIUnit units=None, bint compensated=False):
+    cdef c.UData udata
+    cdef double result = 0
+    cdef bint has_units = False
+    cdef Py_ssize_t count = reduce_values(values, ReduceSum, compensated, units, udata, result, has_units)
+    if count == 0:
+        raise ValueError("qmean() of an empty sequence")
+    return make_scalar(result / count, udata)
+
+cpdef qmin(object values, q.SIUnit units=None):
+    cdef c.UData udata
+    cdef double result = 0
+    cdef bint has_units = False
+    if reduce_values(values, ReduceMin, False, units, udata, result, has_units) == 0:
+        raise ValueError("qmin() of an empty sequence")
+    return make_scalar(result, udata)
+
+cpdef qmax(object values, q.SIUnit units=None):
+    cdef c.UData udata
+    cdef double result = 0
+    cdef bint has_units = False
+    if reduce_values(values, ReduceMax, False, units, udata, result, has_units) == 0:
+        raise ValueError("qmax() of an empty sequence")
+    return make_scalar(result, udata)
+
+cpdef qprod(object values, q.SIUnit units=None):
+    """
+    Product of a QuantityArray or an iterable of Quantities, in the product
+    of their units unless `units` is given.
+    """
+    cdef q.QuantityArray array
+    cdef q.Quantity value
+    cdef const double[:] data
+    cdef c.UData udata = UNITY
+    cdef double result = 1
+    cdef c.Error error_code = c.Success
+
+    if type(values) is q.QuantityArray:
+        array = values
+        data = array.c_values
+        with nogil:
+            result = k.product(data)
+        error_code = c.ipow_udata(udata, array.udata, array.c_values.shape[0])
+    else:
+        for item in values:
+            if type(item) is not q.Quantity:
+                raise TypeError("Expected Quantity")
+            value = item
+            if value.py_value is not None:
+                raise TypeError("Expected scalar Quantity")
+            result *= value.c_value
+            error_code = c.mul_udata(udata, udata, value.udata)
+            if error_code != c.Success:
+                break
+
+    q.check_error(error_code)
+    if not (0 < udata.scale < math.INFINITY):
+        raise OverflowError("unit scale out of range")
+
+    if units is not None:
+        if not c.eq_ddata(udata.dimensions, units.data.dimensions):
+            raise ValueError("unit mismatch")
+        result *= udata.scale / units.data.scale
+        udata = units.data
+    return make_scalar(result, udata)
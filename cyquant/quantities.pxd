@@ -2,18 +2,25 @@ cimport cyquant.ctypes as c
 cimport cyquant.dimensions as d
 import cyquant.dimensions as d
 
+from cpython cimport array
+
 from libc.math cimport fabs, fmax
 from libc.string cimport memset
 
 cdef class SIUnit:
     cdef c.UData data
+    cdef Py_hash_t hash_value
 
     cpdef is_of(SIUnit self, d.Dimensions dimensions)
 
     cpdef promote(SIUnit self, object value)
     cpdef demote(SIUnit self, Quantity value)
 
+    cpdef QuantityArray promote_buffer(SIUnit self, object buffer)
+    cpdef demote_buffer(SIUnit self, object value, object out=*)
+
 
+    cpdef double factor_to(SIUnit self, SIUnit other) except -1.0
     cpdef bint compatible(SIUnit self, SIUnit other)
     cpdef approx(SIUnit self, SIUnit other, double rtol=*, double atol=*)
     cpdef cmp(SIUnit self, SIUnit other)
@@ -21,6 +28,10 @@ cdef class SIUnit:
 
     cpdef SIUnit exp(SIUnit self, double power)
 
+    cpdef SIUnit intern(SIUnit self)
+
+    cpdef UnitConverter converter_to(SIUnit self, SIUnit target)
+
 cdef class Quantity:
     cdef c.UData udata
     cdef double c_value
@@ -46,31 +57,96 @@ cdef class Quantity:
 
     cpdef Quantity exp(Quantity self, double power)
 
+cdef class QuantityArray:
+    cdef c.UData udata
+    cdef double[:] c_values
+
+    cdef double rescale(QuantityArray self, const c.UData& units) except -1.0
+
+    cpdef is_of(QuantityArray self, d.Dimensions dimensions)
+
+    cpdef get_as(QuantityArray self, SIUnit units)
+    cpdef QuantityArray cvt_to(QuantityArray self, SIUnit units)
+
+    cpdef bint compatible(QuantityArray self, QuantityArray other)
+
+    cpdef QuantityArray exp(QuantityArray self, double power)
+
+cdef class UnitConverter:
+    cdef c.UData src
+    cdef c.UData dst
+    cdef double c_factor
+
+    cpdef convert_quantity(UnitConverter self, Quantity value)
+    cpdef convert_buffer(UnitConverter self, object values, object out=*)
+
+    #value is expressed in the source unit; no dimension checks
+    cdef inline double convert(UnitConverter self, double value) noexcept:
+        return value * self.c_factor
+
+cdef SIUnit make_unit(const c.UData& data)
+
+cdef double convert_factor(const c.UData& src, const c.UData& dst) except -1.0
 
 cdef inline mul_units(SIUnit lhs, SIUnit rhs):
     cdef c.Error error_code
-    cdef SIUnit ret = SIUnit.__new__(SIUnit)
-    error_code = c.mul_udata(ret.data, lhs.data, rhs.data)
+    cdef c.UData data
+    error_code = c.mul_udata(data, lhs.data, rhs.data)
     if error_code == c.Success:
-        return ret
+        return make_unit(data)
+
+    if error_code == c.Overflow:
+        raise OverflowError("dimension exponent out of range")
 
     raise RuntimeError("Unknow Error Occurred: %i" % error_code)
 
 cdef inline div_units(SIUnit lhs, SIUnit rhs):
     cdef c.Error error_code
-    cdef SIUnit ret = SIUnit.__new__(SIUnit)
-    error_code = c.div_udata(ret.data, lhs.data, rhs.data)
+    cdef c.UData data
+    error_code = c.div_udata(data, lhs.data, rhs.data)
     if error_code == c.Success:
-        return ret
+        return make_unit(data)
 
     if error_code == c.ZeroDiv:
         raise ZeroDivisionError()
 
+    if error_code == c.Overflow:
+        raise OverflowError("dimension exponent out of range")
+
     raise RuntimeError("Unknown Error Occurred: %d" % error_code)
 
+#raises the exception for a c.Error returned by the udata/ddata helpers
+cdef inline int check_error(c.Error error_code) except -1:
+    if error_code == c.Success:
+        return 0
+    if error_code == c.DimensionMismatch:
+        raise ValueError("unit mismatch")
+    if error_code == c.ZeroDiv:
+        raise ZeroDivisionError()
+    if error_code == c.Overflow:
+        raise OverflowError("dimension exponent out of range")
+    raise RuntimeError("Unknown Error Occurred: %i" % error_code)
+
 cdef inline void get_udata(c.UData& out, SIUnit units):
     (&out)[0] = units.data
 
+cdef array.array new_doubles(Py_ssize_t size)
+cdef array.array new_mask(Py_ssize_t size)
+cdef double[:] as_doubles(object values)
+cdef object copy_value(object value)
+
+cdef inline QuantityArray new_qarray(const c.UData& udata, Py_ssize_t size):
+    cdef QuantityArray ret = QuantityArray.__new__(QuantityArray)
+    ret.udata = udata
+    ret.c_values = new_doubles(size)
+    return ret
+
+cdef inline QuantityArray view_qarray(const c.UData& udata, double[:] values):
+    cdef QuantityArray ret = QuantityArray.__new__(QuantityArray)
+    ret.udata = udata
+    ret.c_values = values
+    return ret
+
 # parsing functions
 
 
@@ -98,7 +174,7 @@ cdef inline int parse_q(Quantity out, object py_obj):
 
 
     out.udata.scale = 1
-    out.udata.dimensions.exponents[:] = [0,0,0,0,0,0,0]
+    memset(&out.udata.dimensions, 0, sizeof(c.DData))
 
     if value_type is float or value_type is int:
         out.py_value = None
@@ -132,7 +208,9 @@ cdef inline q_assign_mul(Quantity out, object py_obj):
 
 
 cdef inline q_assign_mul_q(Quantity out, Quantity rhs):
-    c.mul_udata(out.udata, out.udata, rhs.udata)
+    cdef c.Error error_code = c.mul_udata(out.udata, out.udata, rhs.udata)
+    if error_code != c.Success:
+        return error_code
 
     if out.py_value is None and rhs.py_value is None:
         out.c_value = out.c_value * rhs.c_value
@@ -149,6 +227,8 @@ cdef inline q_assign_mul_q(Quantity out, Quantity rhs):
     return q_norm(out)
 
 cdef inline q_assign_mul_u(Quantity out, SIUnit rhs):
+    if out.py_value is not None:
+        out.py_value = copy_value(out.py_value)
     return c.mul_udata(out.udata, out.udata, rhs.data)
 
 cdef inline q_assign_mul_d(Quantity out, double rhs):
@@ -176,7 +256,9 @@ cdef inline q_assign_div(Quantity out, object rhs):
     return q_assign_div_o(out, rhs)
 
 cdef inline q_assign_div_q(Quantity out, Quantity rhs):
-    c.div_udata(out.udata, out.udata, rhs.udata)
+    cdef c.Error error_code = c.div_udata(out.udata, out.udata, rhs.udata)
+    if error_code != c.Success:
+        return error_code
 
     if out.py_value is None and rhs.py_value is None:
         if rhs.c_value == 0:
@@ -197,8 +279,9 @@ cdef inline q_assign_div_q(Quantity out, Quantity rhs):
     return q_norm(out)
 
 cdef inline q_assign_div_u(Quantity out, SIUnit rhs):
-    c.div_udata(out.udata, out.udata, rhs.data)
-    return c.Success
+    if out.py_value is not None:
+        out.py_value = copy_value(out.py_value)
+    return c.div_udata(out.udata, out.udata, rhs.data)
 
 cdef inline q_assign_div_d(Quantity out, double rhs):
     if rhs == 0:
@@ -4,18 +4,150 @@
 cimport cython
 
 import copy
+import operator
+import pickle
+import sys
 
 cimport cyquant.ctypes as c
 cimport cyquant.dimensions as d
 import cyquant.dimensions as d
+cimport cyquant.kernels as k
+cimport cyquant.parallel as p
+
+from cpython cimport array
+import array
+
+from cpython.object cimport Py_LT, Py_LE, Py_EQ, Py_NE, Py_GT, Py_GE
 
 from libc.math cimport fabs
+from libc.stdlib cimport calloc, free
+from libc.stdint cimport uint64_t
+from libc.string cimport memcmp, memcpy, memset
 
 cdef double UNIT_SCALE_RTOL = 1e-12
 
+cdef bint INTERNING = False
+cdef dict INTERNED = {}
+
+cdef int PICKLE_VERSION = 1
+
+# raw UData bytes -> name of the same unit in cyquant.si, built on first use
+cdef dict UNIT_IDS = None
+
+# cyquant.lazy.Expr once that module is imported. SIUnit and Quantity
+# operators return NotImplemented for it, so expressions build the node
+# instead of being wrapped as a Quantity value.
+cdef type EXPR_TYPE = None
+
+def _defer_to(type expr_type):
+    global EXPR_TYPE
+    EXPR_TYPE = expr_type
+
+# begin conversion factor cache
+#
+# a set-associative table of validated (source, target) scale ratios. each
+# set holds FACTOR_WAYS entries; a stamp of 0 marks an empty entry and the
+# entry with the smallest stamp is evicted on a miss. disabled (size 0) by
+# default, since exact dimension matches are already a single memcmp.
+
+cdef enum:
+    FACTOR_WAYS = 4
+
+cdef struct FactorEntry:
+    c.UData src
+    c.UData dst
+    double factor
+    unsigned long long stamp
+
+cdef FactorEntry* FACTOR_TABLE = NULL
+cdef size_t FACTOR_SETS = 0
+cdef bint FACTOR_LRU = True
+cdef unsigned long long FACTOR_CLOCK = 0
+cdef unsigned long long FACTOR_HITS = 0
+cdef unsigned long long FACTOR_MISSES = 0
+
+cdef inline bint same_udata(const c.UData& lhs, const c.UData& rhs) noexcept:
+    if lhs.scale != rhs.scale:
+        return False
+    return memcmp(lhs.dimensions.exponents, rhs.dimensions.exponents, sizeof(lhs.dimensions.exponents)) == 0
+
+#cheap xor-fold of both units; collisions only cost a miss
+cdef inline size_t factor_slot(const c.UData& src, const c.UData& dst) noexcept:
+    cdef uint64_t words[8]
+    cdef uint64_t acc = 0
+    cdef int i
+    memcpy(words, &src, sizeof(c.UData))
+    for i in range(8):
+        acc ^= words[i]
+    memcpy(words, &dst, sizeof(c.UData))
+    for i in range(8):
+        acc ^= (words[i] << 1) | (words[i] >> 63)
+    acc *= <uint64_t>0x9e3779b97f4a7c15
+    return <size_t>(acc >> 32)
+
+cdef double convert_factor(const c.UData& src, const c.UData& dst) except -1.0:
+    global FACTOR_CLOCK, FACTOR_HITS, FACTOR_MISSES
+    cdef FactorEntry* entries
+    cdef FactorEntry* victim
+    cdef size_t index
+    cdef int i
+
+    if FACTOR_SETS == 0:
+        if not c.eq_ddata(src.dimensions, dst.dimensions):
+            raise ValueError("Incompatible unit dimensions")
+        return src.scale / dst.scale
+
+    index = factor_slot(src, dst) & (FACTOR_SETS - 1)
+    entries = FACTOR_TABLE + index * FACTOR_WAYS
+    victim = entries
+    FACTOR_CLOCK += 1
+
+    for i in range(FACTOR_WAYS):
+        if entries[i].stamp != 0 and same_udata(entries[i].src, src) and same_udata(entries[i].dst, dst):
+            FACTOR_HITS += 1
+            if FACTOR_LRU:
+                entries[i].stamp = FACTOR_CLOCK
+            return entries[i].factor
+        if entries[i].stamp < victim.stamp:
+            victim = entries + i
+
+    FACTOR_MISSES += 1
+    if not c.eq_ddata(src.dimensions, dst.dimensions):
+        raise ValueError("Incompatible unit dimensions")
+
+    victim.src = src
+    victim.dst = dst
+    victim.factor = src.scale / dst.scale
+    victim.stamp = FACTOR_CLOCK
+    return victim.factor
+
+cdef int resize_factor_cache(Py_ssize_t size) except -1:
+    global FACTOR_TABLE, FACTOR_SETS
+    cdef size_t sets = 0
+    cdef FactorEntry* table = NULL
+
+    if size < 0:
+        raise ValueError("cache size must be greater than or equal to 0.")
+
+    if size > 0:
+        sets = 1
+        while sets * FACTOR_WAYS < <size_t>size:
+            sets <<= 1
+        table = <FactorEntry*>calloc(sets * FACTOR_WAYS, sizeof(FactorEntry))
+        if table == NULL:
+            raise MemoryError()
+
+    free(FACTOR_TABLE)
+    FACTOR_TABLE = table
+    FACTOR_SETS = sets
+    return 0
+
 @cython.final
+@cython.freelist(64)
 cdef class SIUnit:
 
+    # defer ndarray arithmetic to SIUnit.__rmul__ / __rtruediv__
+    __array_ufunc__ = None
 
     @staticmethod
     def SetEqRelTol(double rtol):
@@ -28,9 +160,62 @@ cdef class SIUnit:
     def GetEqRelTol():
         return UNIT_SCALE_RTOL
 
+    @staticmethod
+    def SetFactorCache(Py_ssize_t size, str policy="lru"):
+        global FACTOR_LRU, FACTOR_HITS, FACTOR_MISSES
+        if policy != "lru" and policy != "fifo":
+            raise ValueError("eviction policy must be 'lru' or 'fifo'.")
+        resize_factor_cache(size)
+        FACTOR_LRU = policy == "lru"
+        FACTOR_HITS = 0
+        FACTOR_MISSES = 0
+
+    @staticmethod
+    def GetFactorCache():
+        cdef size_t i
+        cdef Py_ssize_t used = 0
+        for i in range(FACTOR_SETS * FACTOR_WAYS):
+            if FACTOR_TABLE[i].stamp != 0:
+                used += 1
+        return {
+            "size": FACTOR_SETS * FACTOR_WAYS,
+            "used": used,
+            "policy": "lru" if FACTOR_LRU else "fifo",
+            "hits": FACTOR_HITS,
+            "misses": FACTOR_MISSES,
+        }
+
+    @staticmethod
+    def ClearFactorCache():
+        global FACTOR_HITS, FACTOR_MISSES
+        if FACTOR_TABLE != NULL:
+            memset(FACTOR_TABLE, 0, FACTOR_SETS * FACTOR_WAYS * sizeof(FactorEntry))
+        FACTOR_HITS = 0
+        FACTOR_MISSES = 0
+
+    @staticmethod
+    def GetInterning():
+        return INTERNING
+
+    @staticmethod
+    def SetInterning(bint enabled):
+        global INTERNING
+        INTERNING = enabled
+        if not enabled:
+            INTERNED.clear()
+        d.Dimensions.SetInterning(enabled)
+
+    @staticmethod
+    def parse(str text not None):
+        from cyquant.parsing import parse_unit
+        return parse_unit(text)
+
     @staticmethod
     def Unit(scale=1, kg=0, m=0, s=0, k=0, a=0, mol=0, cd=0):
-        return SIUnit(scale, d.Dimensions(kg, m, s, k, a, mol, cd))
+        cdef SIUnit ret = SIUnit(scale, d.Dimensions(kg, m, s, k, a, mol, cd))
+        if INTERNING:
+            return ret.intern()
+        return ret
 
     @property
     def scale(self):
@@ -38,37 +223,35 @@ cdef class SIUnit:
 
     @property
     def dimensions(self):
-        cdef d.Dimensions dims = d.Dimensions.__new__(d.Dimensions)
-        dims.data = self.data.dimensions
-        return dims
+        return d.make_dimensions(self.data.dimensions)
 
     @property
     def kg(self):
-        return self.data.dimensions.exponents[0]
+        return c.ratio_value(self.data.dimensions.exponents[0])
 
     @property
     def m(self):
-        return self.data.dimensions.exponents[1]
+        return c.ratio_value(self.data.dimensions.exponents[1])
 
     @property
     def s(self):
-        return self.data.dimensions.exponents[2]
+        return c.ratio_value(self.data.dimensions.exponents[2])
 
     @property
     def k(self):
-        return self.data.dimensions.exponents[3]
+        return c.ratio_value(self.data.dimensions.exponents[3])
 
     @property
     def a(self):
-        return self.data.dimensions.exponents[4]
+        return c.ratio_value(self.data.dimensions.exponents[4])
 
     @property
     def mol(self):
-        return self.data.dimensions.exponents[5]
+        return c.ratio_value(self.data.dimensions.exponents[5])
 
     @property
     def cd(self):
-        return self.data.dimensions.exponents[6]
+        return c.ratio_value(self.data.dimensions.exponents[6])
 
     def __init__(SIUnit self, double scale=1.0, d.Dimensions dims=d.dimensionless_t):
         if scale <= 0:
@@ -121,6 +304,32 @@ cdef class SIUnit:
         return value.py_value * value.rescale(self.data)
 
 
+    cpdef QuantityArray promote_buffer(SIUnit self, object buffer):
+        if buffer is None:
+            raise TypeError("Quantity value can not be None.")
+        return view_qarray(self.data, as_doubles(buffer))
+
+    cpdef demote_buffer(SIUnit self, object value, object out=None):
+        cdef type value_type = type(value)
+        cdef double[:] source, target
+        cdef double factor
+
+        if value_type is QuantityArray:
+            source = (<QuantityArray>value).c_values
+            factor = (<QuantityArray>value).rescale(self.data)
+        elif value_type is Quantity and (<Quantity>value).py_value is not None:
+            source = as_doubles((<Quantity>value).py_value)
+            factor = (<Quantity>value).rescale(self.data)
+        else:
+            raise TypeError("Expected array valued Quantity or QuantityArray")
+
+        if out is None:
+            out = new_doubles(source.shape[0])
+        target = out
+        check_sizes(target, source)
+        p.scale(target, unaliased(target, source), factor)
+        return out
+
     def __call__(SIUnit self, iterable):
         return self.quantities(iterable)
 
@@ -138,9 +347,11 @@ cdef class SIUnit:
             return NotImplemented
         if not type(rhs) is SIUnit:
             return NotImplemented
-        if lhs.dimensions != rhs.dimensions:
+        if lhs is rhs:
+            return True
+        if not c.eq_ddata((<SIUnit>lhs).data.dimensions, (<SIUnit>rhs).data.dimensions):
             return False
-        return lhs.approx(rhs, rtol=UNIT_SCALE_RTOL)
+        return c.fapprox((<SIUnit>lhs).data.scale, (<SIUnit>rhs).data.scale, UNIT_SCALE_RTOL, 0.0)
 
     def __ne__(lhs, rhs):
         return not lhs == rhs
@@ -175,7 +386,17 @@ cdef class SIUnit:
             raise ValueError("unit mismatch")
         return c.fapprox(self.data.scale, other.data.scale, rtol, atol)
 
+    cpdef UnitConverter converter_to(SIUnit self, SIUnit target):
+        return UnitConverter(self, target)
+
+    cpdef double factor_to(SIUnit self, SIUnit other) except -1.0:
+        if other is None:
+            raise TypeError("Expected SIUnit")
+        return convert_factor(self.data, other.data)
+
     cpdef bint compatible(SIUnit self, SIUnit other):
+        if self is other:
+            return True
         return c.eq_ddata(self.data.dimensions, other.data.dimensions)
 
     """
@@ -185,7 +406,7 @@ cdef class SIUnit:
     def __mul__(self, rhs not None):
         cdef type op_rhs = type(rhs)
 
-        if op_rhs is Quantity:
+        if op_rhs is Quantity or op_rhs is QuantityArray or op_rhs is EXPR_TYPE:
             return NotImplemented
 
         if op_rhs is SIUnit:
@@ -201,7 +422,7 @@ cdef class SIUnit:
     def __truediv__(self, rhs not None):
         cdef type op_rhs = type(rhs)
 
-        if op_rhs is Quantity:
+        if op_rhs is Quantity or op_rhs is QuantityArray or op_rhs is EXPR_TYPE:
             return NotImplemented
 
         if op_rhs is SIUnit:
@@ -223,7 +444,7 @@ cdef class SIUnit:
     def __rtruediv__(self, lhs not None):
         cdef type op_lhs = type(lhs)
 
-        if op_lhs is Quantity:
+        if op_lhs is Quantity or op_lhs is QuantityArray:
             return NotImplemented
 
         if op_lhs is SIUnit:
@@ -232,7 +453,7 @@ cdef class SIUnit:
         cdef Quantity ret = Quantity.__new__(Quantity)
 
         get_udata(ret.udata, self)
-        c.inv_udata(ret.udata, ret.udata)
+        check_error(c.inv_udata(ret.udata, ret.udata))
 
         if op_lhs is float or op_lhs is int:
             ret.py_value = None
@@ -245,10 +466,10 @@ cdef class SIUnit:
 
     def __invert__(SIUnit self):
         cdef c.Error error_code
-        cdef SIUnit ret = SIUnit.__new__(SIUnit)
-        error_code = c.inv_udata(ret.data, self.data)
+        cdef c.UData data
+        error_code = c.inv_udata(data, self.data)
         if error_code == c.Success:
-            return ret
+            return make_unit(data)
 
         if error_code == c.ZeroDiv:
             raise ZeroDivisionError()
@@ -262,27 +483,133 @@ cdef class SIUnit:
 
     cpdef SIUnit exp(SIUnit self, double power):
         cdef c.Error error_code
-        cdef SIUnit ret = SIUnit.__new__(SIUnit)
-        error_code = c.pow_udata(ret.data, self.data, power)
+        cdef c.UData data
+        error_code = c.pow_udata(data, self.data, power)
         if error_code == c.Success:
-            return ret
+            return make_unit(data)
+
+        if error_code == c.Overflow:
+            raise OverflowError("dimension exponent out of range")
 
         raise RuntimeError("Unknown Error Occurred: %i" % error_code)
 
+    cpdef SIUnit intern(SIUnit self):
+        cdef bytes key = udata_key(self.data)
+        cdef SIUnit ret = INTERNED.get(key)
+        if ret is None:
+            self.hash_value = c.hash_udata(self.data)
+            INTERNED[key] = ret = self
+        return ret
+
     def __copy__(SIUnit self):
         return self
 
     def __deepcopy__(SIUnit self, dict memodict={}):
         return self
 
+    def __reduce__(SIUnit self):
+        return _load_unit, (PICKLE_VERSION, pack_unit(self.data))
+
     def __hash__(SIUnit self):
-        data_tuple = (self.data.scale, tuple(self.data.dimensions.exponents))
-        return hash(data_tuple)
+        if self.hash_value == 0:
+            self.hash_value = c.hash_udata(self.data)
+        return self.hash_value
 
     def __repr__(SIUnit self):
         return 'SIUnit(%f, %r)' % (self.data.scale, self.dimensions)
 
+cdef inline bytes udata_key(const c.UData& data):
+    return (<char*>&data)[:sizeof(c.UData)]
+
+cdef SIUnit make_unit(const c.UData& data):
+    cdef SIUnit ret = SIUnit.__new__(SIUnit)
+    ret.data = data
+    if INTERNING:
+        return ret.intern()
+    return ret
+
+"""
+Pickling
+
+Units are encoded as the name of the identical unit in cyquant.si when there
+is one, otherwise as the scale followed by the packed dimensions. Array
+values are handed to pickle as a PickleBuffer so protocol 5 can transfer
+them out-of-band.
+"""
+
+cdef dict unit_ids():
+    global UNIT_IDS
+    cdef dict ids
+    if UNIT_IDS is None:
+        from cyquant import si
+        ids = {}
+        for name, unit in sorted(vars(si).items()):
+            if type(unit) is SIUnit:
+                ids.setdefault(udata_key((<SIUnit>unit).data), name)
+        UNIT_IDS = ids
+    return UNIT_IDS
+
+cdef object pack_unit(const c.UData& data):
+    cdef str name = unit_ids().get(udata_key(data))
+    if name is not None:
+        return name
+    return (<char*>&data.scale)[:sizeof(double)] + d.pack_ddata(data.dimensions)
+
+cdef int unpack_unit(c.UData& data, object packed) except -1:
+    cdef const unsigned char[:] view
+    if type(packed) is str:
+        from cyquant import si
+        unit = getattr(si, packed, None)
+        if type(unit) is not SIUnit:
+            raise ValueError("unknown unit: %r" % packed)
+        data = (<SIUnit>unit).data
+        return 0
+
+    view = packed
+    if view.shape[0] <= <Py_ssize_t>sizeof(double):
+        raise ValueError("invalid packed unit")
+    memcpy(&data.scale, &view[0], sizeof(double))
+    if not data.scale > 0:
+        raise ValueError("invalid packed unit")
+    return d.unpack_ddata(data.dimensions, view[sizeof(double):])
+
+cdef inline int check_pickle_version(int version) except -1:
+    if version != PICKLE_VERSION:
+        raise ValueError("unsupported pickle version: %i" % version)
+    return 0
+
+def _load_unit(int version, object unit):
+    cdef c.UData data
+    check_pickle_version(version)
+    unpack_unit(data, unit)
+    if type(unit) is str and not INTERNING:
+        from cyquant import si
+        return getattr(si, unit)
+    return make_unit(data)
+
+def _load_quantity(int version, object unit, object value):
+    cdef Quantity ret = Quantity.__new__(Quantity)
+    check_pickle_version(version)
+    unpack_unit(ret.udata, unit)
+    if type(value) is float:
+        ret.c_value = value
+    else:
+        ret.py_value = value
+    return ret
+
+def _load_qarray(int version, object unit, object values):
+    cdef QuantityArray ret = QuantityArray.__new__(QuantityArray)
+    check_pickle_version(version)
+    unpack_unit(ret.udata, unit)
+    view = memoryview(values)
+    if view.readonly:
+        ret.c_values = array.array('d', view.cast('B').cast('d'))
+    else:
+        ret.c_values = view.cast('B').cast('d')
+    return ret
+
 @cython.final
+@cython.freelist(64)
 cdef class Quantity:
 
     @property
@@ -297,9 +624,7 @@ cdef class Quantity:
 
     @property
     def units(self):
-        cdef SIUnit units = SIUnit.__new__(SIUnit)
-        units.data = self.udata
-        return units
+        return make_unit(self.udata)
 
     def __init__(Quantity self, object value, SIUnit units not None):
         self.udata = units.data
@@ -311,9 +636,7 @@ cdef class Quantity:
             self.py_value = value
 
     cdef double rescale(Quantity self, const c.UData& units) except -1.0:
-        if not c.eq_ddata(self.udata.dimensions, units.dimensions):
-            raise ValueError("Incompatible unit dimensions")
-        return self.udata.scale / units.scale
+        return convert_factor(self.udata, units)
 
     cpdef is_of(Quantity self, d.Dimensions dims):
         if dims is None:
@@ -384,7 +707,11 @@ cdef class Quantity:
     def __ne__(lhs, rhs):
         return not lhs == rhs
 
-    def __lt__(Quantity lhs not None, Quantity rhs not None):
+    def __lt__(Quantity lhs not None, other):
+        if type(other) is not Quantity:
+            return NotImplemented
+
+        cdef Quantity rhs = other
         if not c.eq_ddata(lhs.udata.dimensions, rhs.udata.dimensions):
             raise ValueError("incompatible units")
 
@@ -395,7 +722,11 @@ cdef class Quantity:
         cdef object norm2 = rhs.q * rhs.udata.scale
         return norm1 < norm2
 
-    def __le__(Quantity lhs not None, Quantity rhs not None):
+    def __le__(Quantity lhs not None, other):
+        if type(other) is not Quantity:
+            return NotImplemented
+
+        cdef Quantity rhs = other
         if not c.eq_ddata(lhs.udata.dimensions, rhs.udata.dimensions):
             raise ValueError("incompatible units")
 
@@ -406,7 +737,11 @@ cdef class Quantity:
         cdef object norm2 = rhs.q * rhs.udata.scale
         return norm1 <= norm2
 
-    def __gt__(Quantity lhs not None, Quantity rhs not None):
+    def __gt__(Quantity lhs not None, other):
+        if type(other) is not Quantity:
+            return NotImplemented
+
+        cdef Quantity rhs = other
         if not c.eq_ddata(lhs.udata.dimensions, rhs.udata.dimensions):
             raise ValueError("incompatible units")
 
@@ -418,7 +753,11 @@ cdef class Quantity:
         return norm1 > norm2
 
 
-    def __ge__(Quantity lhs not None, Quantity rhs not None):
+    def __ge__(Quantity lhs not None, other):
+        if type(other) is not Quantity:
+            return NotImplemented
+
+        cdef Quantity rhs = other
         if not c.eq_ddata(lhs.udata.dimensions, rhs.udata.dimensions):
             raise ValueError("incompatible units")
 
@@ -484,80 +823,23 @@ cdef class Quantity:
     Arithmetic Methods
     """
 
-    def __add__(Quantity lhs not None, Quantity rhs not None):
-        cdef int error_code
-        cdef Quantity ret = Quantity.__new__(Quantity)
-
-        cdef double scale_l, scale_r
-
-        error_code = c.min_udata(ret.udata, lhs.udata, rhs.udata)
-        if error_code == c.Success:
-
-            scale_l = lhs.udata.scale / ret.udata.scale
-            scale_r = rhs.udata.scale / ret.udata.scale
-
-            if lhs.py_value is None and rhs.py_value is None:
-                ret.py_value = None
-                ret.c_value = lhs.c_value * scale_l + rhs.c_value * scale_r
-                return ret
-
-            if lhs.py_value is None:
-                ret.py_value = lhs.c_value * scale_l
-            else:
-                ret.py_value = lhs.py_value * scale_l
-
-            if rhs.py_value is None:
-                ret.py_value = ret.py_value + (rhs.c_value * scale_r)
-            else:
-                ret.py_value = ret.py_value + (rhs.py_value * scale_r)
-
-            if q_norm(ret) == c.Success:
-                return ret
-
-        if error_code == c.DimensionMismatch:
-            raise ValueError("unit mismatch")
-
-        raise RuntimeError("Unknown Error Occurred: %i" % error_code)
-
-    def __sub__(Quantity lhs not None, Quantity rhs not None):
-        cdef int error_code
-        cdef Quantity ret = Quantity.__new__(Quantity)
-
-        cdef double scale_l, scale_r
-
-        error_code = c.min_udata(ret.udata, lhs.udata, rhs.udata)
-        if error_code == c.Success:
-            scale_l = lhs.udata.scale / ret.udata.scale
-            scale_r = rhs.udata.scale / ret.udata.scale
-
-            if lhs.py_value is None and rhs.py_value is None:
-                ret.py_value = None
-                ret.c_value = lhs.c_value * scale_l
-                ret.c_value = ret.c_value - (rhs.c_value * scale_r)
-                return ret
-
-            if lhs.py_value is None:
-                ret.py_value = lhs.c_value * scale_l
-            else:
-                ret.py_value = lhs.py_value * scale_l
-
-            if rhs.py_value is None:
-                ret.py_value = ret.py_value - (rhs.c_value * scale_r)
-            else:
-                ret.py_value = ret.py_value - (rhs.py_value * scale_r)
-
-            if q_norm(ret) == c.Success:
-                return ret
-
-        if error_code == c.DimensionMismatch:
-            raise ValueError("unit mismatch")
+    def __add__(Quantity lhs not None, other):
+        if type(other) is not Quantity:
+            return NotImplemented
+        return q_linear(lhs, other, False)
 
-        raise RuntimeError("Unknown Error Occurred: %i" % error_code)
+    def __sub__(Quantity lhs not None, other):
+        if type(other) is not Quantity:
+            return NotImplemented
+        return q_linear(lhs, other, True)
 
     def __mul__(self, rhs not None):
+        if type(rhs) is QuantityArray or type(rhs) is EXPR_TYPE:
+            return NotImplemented
+
         cdef Quantity ret = Quantity.__new__(Quantity)
         parse_q(ret, self)
-        q_assign_mul(ret, rhs)
+        check_error(q_assign_mul(ret, rhs))
         return ret
 
 
@@ -566,22 +848,36 @@ cdef class Quantity:
 
 
     def __truediv__(self, rhs not None):
-        cdef int error_code
+        if type(rhs) is QuantityArray or type(rhs) is EXPR_TYPE:
+            return NotImplemented
+
         cdef Quantity ret = Quantity.__new__(Quantity)
         parse_q(ret, self)
+        check_error(q_assign_div(ret, rhs))
+        return ret
 
-        error_code = q_assign_div(ret, rhs)
-        if error_code == c.Success:
-            return ret
 
-        if error_code == c.ZeroDiv:
-            raise ZeroDivisionError()
+    def __rtruediv__(self, lhs not None):
+        return self.__invert__().__mul__(lhs)
 
-        return RuntimeError("Unknown Error Occurred: %i" % error_code)
+    """
+    In-place Methods
 
+    Array values are updated in place when they support it (e.g. numpy
+    arrays); scalars fall back to the regular operators.
+    """
 
-    def __rtruediv__(self, lhs not None):
-        return self.__invert__().__mul__(lhs)
+    def __iadd__(Quantity self, other):
+        return q_iadd(self, other, operator.iadd)
+
+    def __isub__(Quantity self, other):
+        return q_iadd(self, other, operator.isub)
+
+    def __imul__(Quantity self, other):
+        return q_imul(self, other, operator.imul)
+
+    def __itruediv__(Quantity self, other):
+        return q_imul(self, other, operator.itruediv)
 
 
     def __pow__(lhs, rhs, modulo):
@@ -635,6 +931,8 @@ cdef class Quantity:
         cdef Quantity ret = Quantity.__new__(Quantity)
 
         cdef error_code = c.pow_udata(ret.udata, self.udata, power)
+        if error_code == c.Overflow:
+            raise OverflowError("dimension exponent out of range")
         if error_code != c.Success:
             raise RuntimeError("Unknown Error Occurred: %i" % error_code)
 
@@ -665,6 +963,10 @@ cdef class Quantity:
         ret.udata = self.udata
         return ret
 
+    def __reduce__(Quantity self):
+        value = self.c_value if self.py_value is None else self.py_value
+        return _load_quantity, (PICKLE_VERSION, pack_unit(self.udata), value)
+
     def __bool__(Quantity self):
         if self.py_value is None:
             return bool(self.c_value)
@@ -682,10 +984,12 @@ cdef class Quantity:
         return int(self.py_value)
 
     def __hash__(Quantity self):
-        dims = tuple(self.udata.dimensions.exponents)
+        cdef Py_hash_t value_hash
         if self.py_value is None:
-            return hash((self.c_value * self.udata.scale, dims))
-        return hash((self.py_value * self.udata.scale, dims))
+            value_hash = hash(self.c_value * self.udata.scale)
+        else:
+            value_hash = hash(self.py_value * self.udata.scale)
+        return c.combine_hash(value_hash, c.hash_ddata(self.udata.dimensions))
 
     def __repr__(Quantity self):
         return 'Quantity(%r, %r)' % (self.quantity, self.units)
@@ -718,13 +1022,767 @@ cdef class Quantity:
             raise TypeError("decimal quantity does not support len")
         return len(self.py_value)
 
+    """
+    NumPy Protocols
+    """
+
+    def __array_ufunc__(Quantity self, ufunc, str method, *inputs, **kwargs):
+        from cyquant.ufuncs import array_ufunc
+        return array_ufunc(ufunc, method, inputs, kwargs)
+
+    def __array_function__(Quantity self, func, types, tuple args, dict kwargs):
+        from cyquant.ufuncs import array_function
+        return array_function(func, types, args, kwargs)
+
     @staticmethod
     def multiplier(fcn):
         def wrapper(Quantity lhs, Quantity rhs):
             cdef Quantity ret = Quantity.__new__(Quantity)
-            c.mul_udata(ret.udata, lhs.udata, rhs.udata)
+            check_error(c.mul_udata(ret.udata, lhs.udata, rhs.udata))
             ret.py_value = fcn(lhs.q, rhs.q)
             if q_norm(ret) == c.Success:
                 return ret
             raise RuntimeError("unknown error")
         return wrapper
+
+
+#lhs + rhs or lhs - rhs, in the smaller of both units
+cdef q_linear(Quantity lhs, Quantity rhs, bint subtract):
+    cdef int error_code
+    cdef double scale_l, scale_r
+    cdef Quantity ret = Quantity.__new__(Quantity)
+
+    error_code = c.min_udata(ret.udata, lhs.udata, rhs.udata)
+    if error_code == c.DimensionMismatch:
+        raise ValueError("unit mismatch")
+    if error_code != c.Success:
+        raise RuntimeError("Unknown Error Occurred: %i" % error_code)
+
+    scale_l = lhs.udata.scale / ret.udata.scale
+    scale_r = rhs.udata.scale / ret.udata.scale
+
+    if lhs.py_value is None and rhs.py_value is None:
+        ret.py_value = None
+        if subtract:
+            ret.c_value = lhs.c_value * scale_l - rhs.c_value * scale_r
+        else:
+            ret.c_value = lhs.c_value * scale_l + rhs.c_value * scale_r
+        return ret
+
+    x = lhs.q
+    y = rhs.q
+    ret.py_value = fused_linear(x, scale_l, y, -scale_r if subtract else scale_r)
+    if ret.py_value is None:
+        # one of the ratios is always exactly 1
+        if scale_l != 1.0:
+            x = x * scale_l
+        if scale_r != 1.0:
+            y = y * scale_r
+        ret.py_value = x - y if subtract else x + y
+
+    q_norm(ret)
+    return ret
+
+cdef object NUMPY = None
+
+#a * x + b * y computed in a single pass over contiguous float64 ndarrays
+#(or an ndarray and a float); None for any other operands. the result is
+#always C ordered, so that its flat view writes into the returned array
+cdef object fused_linear(object x, double a, object y, double b):
+    global NUMPY
+    cdef const double[::1] x_view
+    cdef const double[::1] y_view
+    cdef double[::1] out_view
+
+    if NUMPY is None:
+        # numpy values imply numpy is imported already
+        NUMPY = sys.modules.get("numpy")
+        if NUMPY is None:
+            return None
+
+    cdef bint x_array = type(x) is NUMPY.ndarray
+    cdef bint y_array = type(y) is NUMPY.ndarray
+    if not ((x_array and (y_array or type(y) is float)) or (y_array and type(x) is float)):
+        return None
+
+    try:
+        if x_array:
+            x_view = x.reshape(-1) if x.ndim != 1 else x
+        if y_array:
+            y_view = y.reshape(-1) if y.ndim != 1 else y
+    except (ValueError, BufferError):
+        return None
+
+    if x_array and y_array:
+        if x.shape != y.shape:
+            return None
+        out = NUMPY.empty(x.shape)
+        out_view = out.reshape(-1) if out.ndim != 1 else out
+        p.axpby(out_view, a, x_view, b, y_view)
+    elif x_array:
+        out = NUMPY.empty(x.shape)
+        out_view = out.reshape(-1) if out.ndim != 1 else out
+        p.axpc(out_view, a, x_view, b * <double>y)
+    else:
+        out = NUMPY.empty(y.shape)
+        out_view = out.reshape(-1) if out.ndim != 1 else out
+        p.axpc(out_view, b, y_view, a * <double>x)
+    return out
+
+#lhs op= rhs, with rhs rescaled into the units of lhs
+cdef q_iadd(Quantity lhs, object other, object op):
+    if lhs.py_value is None or type(other) is not Quantity:
+        return NotImplemented
+
+    cdef Quantity rhs = other
+    if not c.eq_ddata(lhs.udata.dimensions, rhs.udata.dimensions):
+        raise ValueError("unit mismatch")
+
+    cdef double factor = rhs.udata.scale / lhs.udata.scale
+    value = rhs.q
+    if factor != 1.0:
+        value = value * factor
+
+    try:
+        result = op(lhs.py_value, value)
+    except TypeError:
+        return NotImplemented
+    return q_inplace_result(lhs, lhs.udata, result)
+
+cdef q_imul(Quantity lhs, object other, object op):
+    cdef c.UData udata = lhs.udata
+    cdef c.Error error_code = c.Success
+    cdef type other_type = type(other)
+
+    if lhs.py_value is None:
+        return NotImplemented
+
+    if other_type is Quantity:
+        if op is operator.imul:
+            error_code = c.mul_udata(udata, lhs.udata, (<Quantity>other).udata)
+        else:
+            error_code = c.div_udata(udata, lhs.udata, (<Quantity>other).udata)
+        if error_code == c.Overflow:
+            raise OverflowError("dimension exponent out of range")
+        other = (<Quantity>other).q
+        other_type = type(other)
+    elif other_type is not float and other_type is not int:
+        return NotImplemented
+
+    if op is operator.itruediv and (other_type is float or other_type is int) and other == 0:
+        raise ZeroDivisionError()
+
+    try:
+        result = op(lhs.py_value, other)
+    except TypeError:
+        return NotImplemented
+    return q_inplace_result(lhs, udata, result)
+
+cdef q_inplace_result(Quantity lhs, const c.UData& udata, object result):
+    cdef Quantity ret
+    if result is lhs.py_value:
+        lhs.udata = udata
+        return lhs
+
+    ret = Quantity.__new__(Quantity)
+    ret.udata = udata
+    ret.py_value = result
+    q_norm(ret)
+    return ret
+
+cdef array.array DOUBLE_ARRAY = array.array('d')
+cdef array.array MASK_ARRAY = array.array('b')
+
+cdef array.array new_doubles(Py_ssize_t size):
+    return array.clone(DOUBLE_ARRAY, size, False)
+
+cdef array.array new_mask(Py_ssize_t size):
+    return array.clone(MASK_ARRAY, size, False)
+
+cdef double[:] as_doubles(object values):
+    cdef double[:] view
+    try:
+        view = values
+    except (TypeError, ValueError, BufferError):
+        view = array.array('d', values)
+    return view
+
+#a copy of value, so that in-place operators on the result leave it alone
+cdef object copy_value(object value):
+    return copy.copy(value)
+
+cdef array.array filled_mask(Py_ssize_t size, signed char value):
+    cdef array.array mask = new_mask(size)
+    memset(mask.data.as_chars, value, size)
+    return mask
+
+cdef double[:] slice_doubles(double[:] values, slice idx):
+    cdef Py_ssize_t start, stop, step
+    start, stop, step = idx.indices(values.shape[0])
+    if (step > 0 and start >= stop) or (step < 0 and start <= stop):
+        return values[:0]
+    if step < 0 and stop < 0:
+        return values[start::step]
+    return values[start:stop:step]
+
+cdef inline int check_sizes(double[:] lhs, double[:] rhs) except -1:
+    if lhs.shape[0] != rhs.shape[0]:
+        raise ValueError("size mismatch: %i != %i" % (lhs.shape[0], rhs.shape[0]))
+    return 0
+
+cdef inline bint same_view(double[:] lhs, double[:] rhs):
+    if lhs.shape[0] == 0 or lhs.shape[0] != rhs.shape[0]:
+        return False
+    return &lhs[0] == &rhs[0] and lhs.strides[0] == rhs.strides[0]
+
+
+#rhs, or a copy of it when it shares memory with lhs without being the same view
+cdef double[:] unaliased(double[:] lhs, double[:] rhs):
+    cdef double[:] ret
+    if rhs.shape[0] == 0 or lhs.shape[0] == 0 or same_view(lhs, rhs):
+        return rhs
+    if max(&lhs[0], &lhs[lhs.shape[0] - 1]) < min(&rhs[0], &rhs[rhs.shape[0] - 1]):
+        return rhs
+    if max(&rhs[0], &rhs[rhs.shape[0] - 1]) < min(&lhs[0], &lhs[lhs.shape[0] - 1]):
+        return rhs
+    ret = new_doubles(rhs.shape[0])
+    ret[:] = rhs
+    return ret
+
+
+@cython.final
+cdef class QuantityArray:
+
+    @property
+    def q(self):
+        return self.c_values
+
+    @property
+    def quantity(self):
+        return self.q
+
+    @property
+    def units(self):
+        return make_unit(self.udata)
+
+    def __init__(QuantityArray self, object values, SIUnit units not None):
+        if values is None:
+            raise TypeError("Quantity value can not be None.")
+        self.udata = units.data
+        self.c_values = as_doubles(values)
+
+    cdef double rescale(QuantityArray self, const c.UData& units) except -1.0:
+        return convert_factor(self.udata, units)
+
+    cpdef is_of(QuantityArray self, d.Dimensions dims):
+        if dims is None:
+            raise TypeError("Expected Dimensions")
+        return c.eq_ddata(self.udata.dimensions, dims.data)
+
+    cpdef get_as(QuantityArray self, SIUnit units):
+        if units is None:
+            raise TypeError("Expected SIUnit")
+
+        cdef double factor = self.rescale(units.data)
+        cdef double[:] out = new_doubles(self.c_values.shape[0])
+        p.scale(out, self.c_values, factor)
+        return out
+
+    cpdef QuantityArray cvt_to(QuantityArray self, SIUnit units):
+        if units is None:
+            raise TypeError("Expected SIUnit")
+
+        if c.eq_udata(self.udata, units.data):
+            return self
+
+        cdef double factor = self.rescale(units.data)
+        cdef QuantityArray ret = new_qarray(units.data, self.c_values.shape[0])
+        p.scale(ret.c_values, self.c_values, factor)
+        return ret
+
+    cpdef bint compatible(QuantityArray self, QuantityArray other):
+        return c.eq_ddata(self.udata.dimensions, other.udata.dimensions)
+
+    """
+    Sequence Methods
+    """
+
+    def __len__(QuantityArray self):
+        return self.c_values.shape[0]
+
+    def __iter__(QuantityArray self):
+        cdef Py_ssize_t i
+        cdef Quantity ret
+        for i in range(self.c_values.shape[0]):
+            ret = Quantity.__new__(Quantity)
+            ret.udata = self.udata
+            ret.py_value = None
+            ret.c_value = self.c_values[i]
+            yield ret
+
+    def __getitem__(QuantityArray self, idx):
+        if type(idx) is slice:
+            return view_qarray(self.udata, slice_doubles(self.c_values, idx))
+
+        cdef Py_ssize_t i = idx
+        cdef Quantity ret = Quantity.__new__(Quantity)
+        ret.udata = self.udata
+        ret.py_value = None
+        ret.c_value = self.c_values[i]
+        return ret
+
+    def __setitem__(QuantityArray self, idx, value not None):
+        cdef Quantity q_value
+        cdef QuantityArray a_value
+        cdef double[:] target, source
+        cdef Py_ssize_t i
+
+        if type(idx) is slice:
+            if type(value) is not QuantityArray:
+                raise TypeError("Expected QuantityArray")
+            a_value = value
+            target = slice_doubles(self.c_values, idx)
+            source = a_value.c_values
+            check_sizes(target, source)
+            p.scale(target, unaliased(target, source), a_value.rescale(self.udata))
+            return
+
+        if type(value) is not Quantity:
+            raise TypeError("Expected Quantity")
+        q_value = value
+        if q_value.py_value is not None:
+            raise TypeError("Expected decimal Quantity")
+        i = idx
+        self.c_values[i] = q_value.c_value * q_value.rescale(self.udata)
+
+    """
+    Comparison Methods
+    """
+
+    def __richcmp__(QuantityArray self, other, int op):
+        cdef QuantityArray a_other = None
+        cdef Quantity q_other = None
+        cdef array.array mask
+        cdef type other_type = type(other)
+        cdef c.DData* other_dims
+
+        if other_type is QuantityArray:
+            a_other = other
+            other_dims = &a_other.udata.dimensions
+        elif other_type is Quantity:
+            q_other = other
+            if q_other.py_value is not None:
+                return NotImplemented
+            other_dims = &q_other.udata.dimensions
+        else:
+            return NotImplemented
+
+        if not c.eq_ddata(self.udata.dimensions, other_dims[0]):
+            if op == Py_EQ or op == Py_NE:
+                return filled_mask(self.c_values.shape[0], op == Py_NE)
+            raise ValueError("incompatible units")
+
+        mask = new_mask(self.c_values.shape[0])
+        if a_other is not None:
+            check_sizes(self.c_values, a_other.c_values)
+            p.compare(
+                mask, self.udata.scale, self.c_values,
+                a_other.udata.scale, a_other.c_values, <k.CmpOp>op
+            )
+        else:
+            p.compare_c(
+                mask, self.udata.scale, self.c_values,
+                q_other.c_value * q_other.udata.scale, <k.CmpOp>op
+            )
+        return mask
+
+    """
+    Arithmetic Methods
+    """
+
+    def __add__(QuantityArray self, other):
+        return qarray_linear(self, 1.0, other, 1.0)
+
+    def __radd__(QuantityArray self, other):
+        return qarray_linear(self, 1.0, other, 1.0)
+
+    def __sub__(QuantityArray self, other):
+        return qarray_linear(self, 1.0, other, -1.0)
+
+    def __rsub__(QuantityArray self, other):
+        return qarray_linear(self, -1.0, other, 1.0)
+
+    def __mul__(QuantityArray self, other):
+        return qarray_mul(self, other)
+
+    def __rmul__(QuantityArray self, other):
+        return qarray_mul(self, other)
+
+    def __truediv__(QuantityArray self, other):
+        return qarray_div(self, other)
+
+    def __rtruediv__(QuantityArray self, other):
+        return qarray_rdiv(self, other)
+
+    def __iadd__(QuantityArray self, other):
+        return qarray_iadd(self, other, 1.0)
+
+    def __isub__(QuantityArray self, other):
+        return qarray_iadd(self, other, -1.0)
+
+    def __imul__(QuantityArray self, other):
+        return qarray_imul(self, other, False)
+
+    def __itruediv__(QuantityArray self, other):
+        return qarray_imul(self, other, True)
+
+    def __pow__(lhs, rhs, modulo):
+        if type(lhs) is not QuantityArray:
+            raise TypeError("Expected QuantityArray ** Number")
+        return lhs.exp(rhs)
+
+    def __neg__(QuantityArray self):
+        cdef QuantityArray ret = new_qarray(self.udata, self.c_values.shape[0])
+        p.scale(ret.c_values, self.c_values, -1.0)
+        return ret
+
+    def __abs__(QuantityArray self):
+        cdef QuantityArray ret = new_qarray(self.udata, self.c_values.shape[0])
+        p.absolute(ret.c_values, self.c_values)
+        return ret
+
+    cpdef QuantityArray exp(QuantityArray self, double power):
+        cdef QuantityArray ret = new_qarray(self.udata, self.c_values.shape[0])
+
+        cdef error_code = c.pow_udata(ret.udata, self.udata, power)
+        if error_code == c.Overflow:
+            raise OverflowError("dimension exponent out of range")
+        if error_code != c.Success:
+            raise RuntimeError("Unknown Error Occurred: %i" % error_code)
+
+        p.power(ret.c_values, self.c_values, power)
+        return ret
+
+    def __copy__(QuantityArray self):
+        cdef QuantityArray ret = new_qarray(self.udata, self.c_values.shape[0])
+        ret.c_values[:] = self.c_values
+        return ret
+
+    def __deepcopy__(QuantityArray self, memodict={}):
+        return self.__copy__()
+
+    def __reduce_ex__(QuantityArray self, protocol):
+        view = memoryview(self.c_values)
+        if protocol >= 5 and view.c_contiguous:
+            values = pickle.PickleBuffer(view)
+        else:
+            values = view.tobytes()
+        return _load_qarray, (PICKLE_VERSION, pack_unit(self.udata), values)
+
+    """
+    NumPy Protocols
+    """
+
+    def __array_ufunc__(QuantityArray self, ufunc, str method, *inputs, **kwargs):
+        from cyquant.ufuncs import array_ufunc
+        return array_ufunc(ufunc, method, inputs, kwargs)
+
+    def __array_function__(QuantityArray self, func, types, tuple args, dict kwargs):
+        from cyquant.ufuncs import array_function
+        return array_function(func, types, args, kwargs)
+
+    def __repr__(QuantityArray self):
+        return 'QuantityArray(%r, %r)' % (list(self.c_values), self.units)
+
+#out = a * arr + b * other
+cdef qarray_linear(QuantityArray arr, double a, object other, double b):
+    cdef int error_code
+    cdef c.UData udata
+    cdef QuantityArray ret, a_other
+    cdef Quantity q_other
+    cdef type other_type = type(other)
+
+    memset(&udata, 0, sizeof(c.UData))
+
+    if other_type is QuantityArray:
+        a_other = other
+        error_code = c.min_udata(udata, arr.udata, a_other.udata)
+        if error_code == c.Success:
+            check_sizes(arr.c_values, a_other.c_values)
+            ret = new_qarray(udata, arr.c_values.shape[0])
+            p.axpby(
+                ret.c_values,
+                a * arr.udata.scale / udata.scale, arr.c_values,
+                b * a_other.udata.scale / udata.scale, a_other.c_values
+            )
+            return ret
+    elif other_type is Quantity:
+        q_other = other
+        if q_other.py_value is not None:
+            return NotImplemented
+        error_code = c.min_udata(udata, arr.udata, q_other.udata)
+        if error_code == c.Success:
+            ret = new_qarray(udata, arr.c_values.shape[0])
+            p.axpc(
+                ret.c_values,
+                a * arr.udata.scale / udata.scale, arr.c_values,
+                b * q_other.c_value * q_other.udata.scale / udata.scale
+            )
+            return ret
+    else:
+        return NotImplemented
+
+    if error_code == c.DimensionMismatch:
+        raise ValueError("unit mismatch")
+
+    raise RuntimeError("Unknown Error Occurred: %i" % error_code)
+
+cdef qarray_mul(QuantityArray arr, object other):
+    cdef QuantityArray ret, a_other
+    cdef Quantity q_other
+    cdef type other_type = type(other)
+
+    if other_type is QuantityArray:
+        a_other = other
+        check_sizes(arr.c_values, a_other.c_values)
+        ret = new_qarray(arr.udata, arr.c_values.shape[0])
+        check_error(c.mul_udata(ret.udata, arr.udata, a_other.udata))
+        p.mul(ret.c_values, arr.c_values, a_other.c_values)
+        return ret
+
+    if other_type is Quantity:
+        q_other = other
+        if q_other.py_value is not None:
+            return NotImplemented
+        ret = new_qarray(arr.udata, arr.c_values.shape[0])
+        check_error(c.mul_udata(ret.udata, arr.udata, q_other.udata))
+        p.scale(ret.c_values, arr.c_values, q_other.c_value)
+        return ret
+
+    if other_type is SIUnit:
+        ret = new_qarray(arr.udata, arr.c_values.shape[0])
+        check_error(c.mul_udata(ret.udata, arr.udata, (<SIUnit>other).data))
+        ret.c_values[:] = arr.c_values
+        return ret
+
+    if other_type is float or other_type is int:
+        ret = new_qarray(arr.udata, arr.c_values.shape[0])
+        p.scale(ret.c_values, arr.c_values, other)
+        return ret
+
+    return NotImplemented
+
+#arr += b * other, with other rescaled into the units of arr
+cdef qarray_iadd(QuantityArray arr, object other, double b):
+    cdef QuantityArray a_other
+    cdef Quantity q_other
+    cdef type other_type = type(other)
+
+    if other_type is QuantityArray:
+        a_other = other
+        if not c.eq_ddata(arr.udata.dimensions, a_other.udata.dimensions):
+            raise ValueError("unit mismatch")
+        check_sizes(arr.c_values, a_other.c_values)
+        p.axpby(
+            arr.c_values,
+            1.0, arr.c_values,
+            b * a_other.udata.scale / arr.udata.scale, unaliased(arr.c_values, a_other.c_values)
+        )
+        return arr
+
+    if other_type is Quantity:
+        q_other = other
+        if q_other.py_value is not None:
+            return NotImplemented
+        if not c.eq_ddata(arr.udata.dimensions, q_other.udata.dimensions):
+            raise ValueError("unit mismatch")
+        p.axpc(arr.c_values, 1.0, arr.c_values, b * q_other.c_value * q_other.udata.scale / arr.udata.scale)
+        return arr
+
+    return NotImplemented
+
+#arr *= other or arr /= other
+cdef qarray_imul(QuantityArray arr, object other, bint divide):
+    cdef c.UData udata
+    cdef c.Error error_code
+    cdef double[:] values
+    cdef double value = 1.0
+    cdef type other_type = type(other)
+
+    if other_type is QuantityArray:
+        udata = (<QuantityArray>other).udata
+        values = unaliased(arr.c_values, (<QuantityArray>other).c_values)
+        check_sizes(arr.c_values, values)
+    elif other_type is Quantity:
+        if (<Quantity>other).py_value is not None:
+            return NotImplemented
+        udata = (<Quantity>other).udata
+        value = (<Quantity>other).c_value
+    elif other_type is SIUnit:
+        udata = (<SIUnit>other).data
+        value = 1.0
+    elif other_type is float or other_type is int:
+        memset(&udata, 0, sizeof(c.UData))
+        udata.scale = 1.0
+        value = other
+    else:
+        return NotImplemented
+
+    if divide:
+        error_code = c.div_udata(udata, arr.udata, udata)
+    else:
+        error_code = c.mul_udata(udata, arr.udata, udata)
+    if error_code == c.Overflow:
+        raise OverflowError("dimension exponent out of range")
+
+    if other_type is QuantityArray:
+        if divide:
+            p.div(arr.c_values, arr.c_values, values)
+        else:
+            p.mul(arr.c_values, arr.c_values, values)
+    elif divide:
+        if value == 0:
+            raise ZeroDivisionError()
+        p.divc(arr.c_values, arr.c_values, value)
+    elif value != 1.0:
+        p.scale(arr.c_values, arr.c_values, value)
+
+    arr.udata = udata
+    return arr
+
+#arr / other
+cdef qarray_div(QuantityArray arr, object other):
+    cdef QuantityArray ret, a_other
+    cdef Quantity q_other
+    cdef type other_type = type(other)
+
+    if other_type is QuantityArray:
+        a_other = other
+        check_sizes(arr.c_values, a_other.c_values)
+        ret = new_qarray(arr.udata, arr.c_values.shape[0])
+        check_error(c.div_udata(ret.udata, arr.udata, a_other.udata))
+        p.div(ret.c_values, arr.c_values, a_other.c_values)
+        return ret
+
+    if other_type is Quantity:
+        q_other = other
+        if q_other.py_value is not None:
+            return NotImplemented
+        if q_other.c_value == 0:
+            raise ZeroDivisionError()
+        ret = new_qarray(arr.udata, arr.c_values.shape[0])
+        check_error(c.div_udata(ret.udata, arr.udata, q_other.udata))
+        p.divc(ret.c_values, arr.c_values, q_other.c_value)
+        return ret
+
+    if other_type is SIUnit:
+        ret = new_qarray(arr.udata, arr.c_values.shape[0])
+        check_error(c.div_udata(ret.udata, arr.udata, (<SIUnit>other).data))
+        ret.c_values[:] = arr.c_values
+        return ret
+
+    if other_type is float or other_type is int:
+        if other == 0:
+            raise ZeroDivisionError()
+        ret = new_qarray(arr.udata, arr.c_values.shape[0])
+        p.divc(ret.c_values, arr.c_values, other)
+        return ret
+
+    return NotImplemented
+
+#other / arr
+cdef qarray_rdiv(QuantityArray arr, object other):
+    cdef QuantityArray ret
+    cdef Quantity q_other
+    cdef type other_type = type(other)
+
+    if other_type is Quantity:
+        q_other = other
+        if q_other.py_value is not None:
+            return NotImplemented
+        ret = new_qarray(arr.udata, arr.c_values.shape[0])
+        check_error(c.div_udata(ret.udata, q_other.udata, arr.udata))
+        p.rdiv(ret.c_values, q_other.c_value, arr.c_values)
+        return ret
+
+    if other_type is SIUnit:
+        ret = new_qarray(arr.udata, arr.c_values.shape[0])
+        check_error(c.div_udata(ret.udata, (<SIUnit>other).data, arr.udata))
+        p.rdiv(ret.c_values, 1.0, arr.c_values)
+        return ret
+
+    if other_type is float or other_type is int:
+        ret = new_qarray(arr.udata, arr.c_values.shape[0])
+        check_error(c.inv_udata(ret.udata, arr.udata))
+        p.rdiv(ret.c_values, other, arr.c_values)
+        return ret
+
+    return NotImplemented
+
+@cython.final
+cdef class UnitConverter:
+
+    @property
+    def source(self):
+        return make_unit(self.src)
+
+    @property
+    def target(self):
+        return make_unit(self.dst)
+
+    @property
+    def factor(self):
+        return self.c_factor
+
+    def __init__(UnitConverter self, SIUnit source not None, SIUnit target not None):
+        self.src = source.data
+        self.dst = target.data
+        self.c_factor = convert_factor(self.src, self.dst)
+
+    cpdef convert_quantity(UnitConverter self, Quantity value):
+        cdef double factor
+        if value is None:
+            raise TypeError("Expected Quantity")
+
+        if same_udata(value.udata, self.src):
+            factor = self.c_factor
+        else:
+            factor = value.rescale(self.dst)
+
+        if value.py_value is None:
+            return value.c_value * factor
+        return value.py_value * factor
+
+    cpdef convert_buffer(UnitConverter self, object values, object out=None):
+        cdef double[:] source, target
+        cdef double factor = self.c_factor
+
+        if type(values) is QuantityArray:
+            source = (<QuantityArray>values).c_values
+            if not same_udata((<QuantityArray>values).udata, self.src):
+                factor = (<QuantityArray>values).rescale(self.dst)
+        else:
+            source = as_doubles(values)
+
+        if out is None:
+            out = new_doubles(source.shape[0])
+        target = out
+        check_sizes(target, source)
+        p.scale(target, unaliased(target, source), factor)
+        return out
+
+    def __call__(UnitConverter self, object value):
+        cdef type value_type = type(value)
+        if value_type is float or value_type is int:
+            return self.convert(value)
+        if value_type is Quantity:
+            return self.convert_quantity(value)
+        if value is None:
+            raise TypeError("Expected a number, Quantity or buffer")
+        return self.convert_buffer(value)
+
+    def __reduce__(UnitConverter self):
+        return UnitConverter, (self.source, self.target)
+
+    def __repr__(UnitConverter self):
+        return 'UnitConverter(%r, %r)' % (self.source, self.target)
@@ -0,0 +1,182 @@
+"""
+Process pool maps over quantity arrays in shared memory
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor() as executor:
+        speeds = shared.map_chunks(integrate, samples, executor)
+
+The values of `samples` are copied once into a shared memory segment, the
+workers write their results into a second one, and only the segment names,
+chunk bounds, the function and the units are pickled.
+"""
+
+import array
+import os
+import sys
+import traceback
+from concurrent.futures import ProcessPoolExecutor, wait
+from multiprocessing import resource_tracker, shared_memory
+
+from cyquant.quantities import QuantityArray
+from cyquant.buffers import double_bytes, values_of
+
+#chunks per worker, so that a slow chunk does not hold up the whole map
+TASKS_PER_WORKER = 4
+#fewest elements per chunk; a task costs some 100us to dispatch
+MIN_CHUNK_SIZE = 16384
+
+#SharedMemory(track=False) is new in python 3.13
+_UNTRACKED = sys.version_info >= (3, 13)
+
+if not _UNTRACKED and os.name == "posix":
+    #older versions register attached segments with the resource tracker.
+    #starting it here lets workers started from now on share it with this
+    #process: registering a segment again is a no-op there, and unlink()
+    #in this process unregisters it once. a worker started before would
+    #run a tracker of its own, which unlinks the segments when it exits.
+    resource_tracker.ensure_running()
+
+
+def chunk_size(count, workers, min_size=MIN_CHUNK_SIZE):
+    """
+    Elements per chunk when mapping `count` elements over `workers`
+    processes: about TASKS_PER_WORKER chunks per worker, but no fewer than
+    `min_size` elements each, rounded up to a multiple of 8 elements.
+    """
+    if workers < 1:
+        raise ValueError("workers must be positive")
+    size = -(-count // (workers * TASKS_PER_WORKER))
+    size = max(size, min_size, 1)
+    return (size + 7) & ~7
+
+
+def map_chunks(func, quantity, executor=None, chunksize=None, workers=None):
+    """
+    Applies `func` to consecutive chunks of an array valued Quantity or
+    QuantityArray in a process pool and joins the results into one
+    QuantityArray.
+
+    `func` must be picklable (e.g. a module level function). It is called
+    with a QuantityArray chunk and returns an array valued Quantity or
+    QuantityArray of the same length. Chunks returned in other units than
+    the first chunk are converted to its units.
+
+    Without `executor` a ProcessPoolExecutor with `workers` processes is
+    started for the call. `chunksize` defaults to `chunk_size(len, workers)`.
+    """
+    units, values = values_of(quantity)
+    data = double_bytes(values)
+    count = len(data) // 8
+    if count == 0:
+        return _joined(func(QuantityArray(array.array('d'), units)))
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if chunksize is None:
+        chunksize = chunk_size(count, workers)
+    elif chunksize < 1:
+        raise ValueError("chunksize must be positive")
+    bounds = [(start, min(start + chunksize, count)) for start in range(0, count, chunksize)]
+
+    source = shared_memory.SharedMemory(create=True, size=count * 8)
+    try:
+        target = shared_memory.SharedMemory(create=True, size=count * 8)
+        try:
+            source.buf[:count * 8] = data
+            del data, values
+
+            own_executor = executor is None
+            if own_executor:
+                executor = ProcessPoolExecutor(min(workers, len(bounds)))
+            futures = []
+            try:
+                for start, stop in bounds:
+                    futures.append(executor.submit(
+                        _map_chunk, func, source.name, target.name, start, stop, units
+                    ))
+                chunk_units = [future.result() for future in futures]
+            except BaseException:
+                #no chunk may still use the segments once they are unlinked
+                for future in futures:
+                    future.cancel()
+                wait(futures)
+                raise
+            finally:
+                if own_executor:
+                    executor.shutdown()
+
+            result = array.array('d')
+            result.frombytes(target.buf[:count * 8])
+        finally:
+            target.close()
+            target.unlink()
+    finally:
+        source.close()
+        source.unlink()
+
+    units = chunk_units[0]
+    view = memoryview(result)
+    for (start, stop), other in zip(bounds, chunk_units):
+        if other.scale != units.scale or other.dimensions != units.dimensions:
+            units.demote_buffer(QuantityArray(view[start:stop], other), out=view[start:stop])
+    view.release()
+    return QuantityArray(result, units)
+
+
+def _joined(quantity):
+    units, values = values_of(quantity)
+    result = array.array('d')
+    result.frombytes(double_bytes(values))
+    return QuantityArray(result, units)
+
+
+def _attach(name):
+    if _UNTRACKED:
+        #the segment belongs to the process that created it
+        return shared_memory.SharedMemory(name=name, track=False)
+    return shared_memory.SharedMemory(name=name)
+
+
+def _release(*views):
+    for view in views:
+        if view is not None:
+            try:
+                view.release()
+            except BufferError:
+                #still exported, e.g. a chunk kept alive by func; the
+                #mapping is then released when the worker exits
+                pass
+
+
+def _close(segment):
+    try:
+        segment.close()
+    except BufferError:
+        #a view could not be released, see _release
+        pass
+
+
+def _map_chunk(func, source_name, target_name, start, stop, units):
+    source = _attach(source_name)
+    target = _attach(target_name)
+    window = source.buf[start * 8:stop * 8]
+    doubles = window.cast('d')
+    values = data = None
+    try:
+        chunk = QuantityArray(doubles, units)
+        result_units, values = values_of(func(chunk))
+        data = double_bytes(values)
+        if len(data) != (stop - start) * 8:
+            raise ValueError("size mismatch: %i != %i" % (len(data) // 8, stop - start))
+        target.buf[start * 8:stop * 8] = data
+        return result_units
+    except BaseException as error:
+        #the frames of func may still reference the chunk
+        traceback.clear_frames(error.__traceback__)
+        raise
+    finally:
+        chunk = None
+        _release(data, values, doubles, window)
+        _close(source)
+        _close(target)
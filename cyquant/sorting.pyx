@@ -0,0 +1,470 @@
+#!python
+#cython: language_level=3
+
+"""
+Sorting and searching scalar quantities by their normalized value
+
+    ordered = sorted(values, key=sort_key(si.meters))
+    i = bisect_left(ordered, 1 * si.meters)
+
+    table = SortedQuantities(values)
+    table.irange(1 * si.meters, 2 * si.meters)
+
+    index = ApproxIndex(1 * si.millimeters)
+    index.update(values)
+    index.within(1 * si.meters)
+    index.nearest(1 * si.meters)
+"""
+
+cimport cython
+
+cimport cyquant.ctypes as c
+cimport cyquant.dimensions as d
+import cyquant.dimensions as d
+cimport cyquant.quantities as q
+import cyquant.quantities as q
+
+from cpython cimport array
+import array
+
+from libc.math cimport fabs, floor, isfinite, INFINITY
+from libc.string cimport memmove
+
+
+cdef array.array DOUBLE_ARRAY = array.array('d')
+
+cdef inline q.Quantity as_scalar(object value):
+    if type(value) is not q.Quantity:
+        raise TypeError("Expected Quantity")
+    if (<q.Quantity>value).py_value is not None:
+        raise TypeError("Expected scalar Quantity")
+    return value
+
+#index of the first key > target (right) or >= target (left) in keys[lo:hi]
+cdef Py_ssize_t search(const double* keys, Py_ssize_t lo, Py_ssize_t hi, double target, bint right) noexcept:
+    cdef Py_ssize_t mid
+    while lo < hi:
+        mid = lo + (hi - lo) // 2
+        if keys[mid] < target or (right and keys[mid] == target):
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+@cython.final
+cdef class QuantityKey:
+    """
+    Sort key returning the normalized value (value * units.scale) of a
+    scalar Quantity. Every value must have the dimensions given, or those
+    of the first value seen when none are given.
+    """
+
+    cdef c.DData dims
+    cdef bint bound
+
+    @property
+    def dimensions(self):
+        if not self.bound:
+            return None
+        return d.make_dimensions(self.dims)
+
+    def __init__(QuantityKey self, object dimensions=None):
+        if type(dimensions) is q.SIUnit:
+            dimensions = (<q.SIUnit>dimensions).dimensions
+        if dimensions is not None:
+            if type(dimensions) is not d.Dimensions:
+                raise TypeError("Expected Dimensions or SIUnit")
+            self.dims = (<d.Dimensions>dimensions).data
+            self.bound = True
+
+    #the first value given binds an unbound key to its dimensions, unless
+    #`bind` is False (lookups, which must not change the key)
+    cdef double key(QuantityKey self, object value, bint bind=True) except? -1.0:
+        cdef q.Quantity quantity = as_scalar(value)
+        if not self.bound:
+            if bind:
+                self.dims = quantity.udata.dimensions
+                self.bound = True
+        elif not c.eq_ddata(self.dims, quantity.udata.dimensions):
+            raise ValueError("unit mismatch")
+        return quantity.c_value * quantity.udata.scale
+
+    def __call__(QuantityKey self, object value):
+        return self.key(value)
+
+
+def sort_key(object dimensions=None):
+    return QuantityKey(dimensions)
+
+
+cdef Py_ssize_t bisect(object values, object x, Py_ssize_t lo, object hi, bint right) except -1:
+    cdef q.QuantityArray array
+    cdef q.Quantity target = as_scalar(x)
+    cdef QuantityKey key
+    cdef double target_key, mid_key
+    cdef Py_ssize_t upper, mid
+
+    if lo < 0:
+        raise ValueError("lo must be non-negative")
+
+    if type(values) is q.QuantityArray:
+        array = values
+        if not c.eq_ddata(array.udata.dimensions, target.udata.dimensions):
+            raise ValueError("unit mismatch")
+        upper = array.c_values.shape[0] if hi is None else hi
+        target_key = target.c_value * target.udata.scale / array.udata.scale
+        while lo < upper:
+            mid = lo + (upper - lo) // 2
+            if array.c_values[mid] < target_key or (right and array.c_values[mid] == target_key):
+                lo = mid + 1
+            else:
+                upper = mid
+        return lo
+
+    if type(values) is SortedQuantities:
+        upper = len(values) if hi is None else hi
+        target_key = (<SortedQuantities>values).key.key(target, False)
+        return search((<SortedQuantities>values).keys.data.as_doubles, lo, min(upper, len(values)), target_key, right)
+
+    key = QuantityKey.__new__(QuantityKey)
+    key.dims = target.udata.dimensions
+    key.bound = True
+    target_key = key.key(target)
+    upper = len(values) if hi is None else hi
+    while lo < upper:
+        mid = lo + (upper - lo) // 2
+        mid_key = key.key(values[mid])
+        if mid_key < target_key or (right and mid_key == target_key):
+            lo = mid + 1
+        else:
+            upper = mid
+    return lo
+
+def bisect_left(object values, object x, Py_ssize_t lo=0, object hi=None):
+    """
+    Index where the scalar Quantity `x` would be inserted into the sorted
+    `values` (a sequence of Quantities, a QuantityArray or SortedQuantities)
+    to the left of any equal values.
+    """
+    return bisect(values, x, lo, hi, False)
+
+def bisect_right(object values, object x, Py_ssize_t lo=0, object hi=None):
+    return bisect(values, x, lo, hi, True)
+
+
+@cython.final
+cdef class SortedQuantities:
+    """
+    Scalar quantities kept in ascending order, next to an array of their
+    normalized values which is used for all searches.
+    """
+
+    cdef QuantityKey key
+    cdef array.array keys
+    cdef list items
+
+    @property
+    def dimensions(self):
+        return self.key.dimensions
+
+    def __init__(SortedQuantities self, object iterable=(), object dimensions=None):
+        self.key = QuantityKey(dimensions)
+        self.keys = array.clone(DOUBLE_ARRAY, 0, False)
+        self.items = []
+        self.update(iterable)
+
+    cdef Py_ssize_t bisect(SortedQuantities self, object value, bint right) except -1:
+        return search(self.keys.data.as_doubles, 0, len(self.items), self.key.key(value, False), right)
+
+    def add(SortedQuantities self, object value):
+        cdef double value_key = self.key.key(value)
+        cdef Py_ssize_t size = len(self.items)
+        cdef Py_ssize_t index = search(self.keys.data.as_doubles, 0, size, value_key, True)
+        cdef double* keys
+
+        array.resize_smart(self.keys, size + 1)
+        keys = self.keys.data.as_doubles
+        memmove(keys + index + 1, keys + index, (size - index) * sizeof(double))
+        keys[index] = value_key
+        self.items.insert(index, value)
+
+    def update(SortedQuantities self, object iterable):
+        cdef list items = list(iterable)
+        cdef QuantityKey key = self.key
+        cdef list keys
+        cdef list order
+
+        if not self.key.bound:
+            #check the whole batch before binding the key
+            key = QuantityKey.__new__(QuantityKey)
+        keys = [key.key(value) for value in items]
+        if key is not self.key:
+            self.key.dims = key.dims
+            self.key.bound = key.bound
+
+        if not items:
+            return
+        if len(items) == 1:
+            self.add(items[0])
+            return
+
+        keys = list(self.keys) + keys
+        items = self.items + items
+        order = sorted(range(len(items)), key=keys.__getitem__)
+        self.items = [items[i] for i in order]
+        self.keys = array.array('d', [keys[i] for i in order])
+
+    def remove(SortedQuantities self, object value):
+        cdef double value_key = self.key.key(value, False)
+        cdef Py_ssize_t size = len(self.items)
+        cdef Py_ssize_t index = search(self.keys.data.as_doubles, 0, size, value_key, False)
+        cdef double* keys
+
+        while index < size and self.keys.data.as_doubles[index] == value_key:
+            if self.items[index] == value:
+                keys = self.keys.data.as_doubles
+                memmove(keys + index, keys + index + 1, (size - index - 1) * sizeof(double))
+                array.resize_smart(self.keys, size - 1)
+                del self.items[index]
+                return
+            index += 1
+        raise ValueError("value not in SortedQuantities")
+
+    def discard(SortedQuantities self, object value):
+        try:
+            self.remove(value)
+        except ValueError:
+            pass
+
+    def clear(SortedQuantities self):
+        array.resize(self.keys, 0)
+        self.items = []
+
+    def bisect_left(SortedQuantities self, object value):
+        return self.bisect(value, False)
+
+    def bisect_right(SortedQuantities self, object value):
+        return self.bisect(value, True)
+
+    def irange(SortedQuantities self, object minimum=None, object maximum=None, tuple inclusive=(True, True)):
+        """
+        Values between `minimum` and `maximum` (either may be None for an
+        open end), in ascending order.
+        """
+        cdef Py_ssize_t size = len(self.items)
+        cdef Py_ssize_t lo = 0, hi = size
+        if minimum is not None:
+            lo = search(self.keys.data.as_doubles, 0, size, self.key.key(minimum, False), not inclusive[0])
+        if maximum is not None:
+            hi = search(self.keys.data.as_doubles, lo, size, self.key.key(maximum, False), inclusive[1])
+        return self.items[lo:hi]
+
+    def __len__(SortedQuantities self):
+        return len(self.items)
+
+    def __iter__(SortedQuantities self):
+        return iter(self.items)
+
+    def __reversed__(SortedQuantities self):
+        return reversed(self.items)
+
+    def __getitem__(SortedQuantities self, object index):
+        return self.items[index]
+
+    def __contains__(SortedQuantities self, object value):
+        cdef double value_key
+        cdef Py_ssize_t index, size = len(self.items)
+        try:
+            value_key = self.key.key(value, False)
+        except (TypeError, ValueError):
+            return False
+        index = search(self.keys.data.as_doubles, 0, size, value_key, False)
+        while index < size and self.keys.data.as_doubles[index] == value_key:
+            if self.items[index] == value:
+                return True
+            index += 1
+        return False
+
+    def __repr__(SortedQuantities self):
+        return 'SortedQuantities(%r)' % (self.items,)
+
+
+cdef inline bytes ddata_key(const c.DData& data):
+    return (<char*>&data)[:sizeof(c.DData)]
+
+
+@cython.final
+cdef class _Grid:
+    #normalized values of one set of dimensions, bucketed into cells of `width`
+
+    cdef object tolerance
+    cdef double width
+    cdef dict cells
+    cdef long long lo, hi
+
+    def __init__(_Grid self, object tolerance, double width):
+        self.tolerance = tolerance
+        self.width = width
+        self.cells = {}
+
+    #cell holding `norm`, clamped to the cells in use
+    cdef long long cell(_Grid self, double norm) noexcept:
+        cdef double index = floor(norm / self.width)
+        if not index >= self.lo:
+            return self.lo
+        if index > self.hi:
+            return self.hi
+        return <long long>index
+
+    cdef void scan(_Grid self, list entries, double norm, double tol, list out):
+        cdef tuple entry
+        for entry in entries:
+            if fabs(<double>entry[0] - norm) <= tol:
+                out.append(entry[1])
+
+
+@cython.final
+cdef class ApproxIndex:
+    """
+    Index of scalar quantities for approximate lookup. Values are bucketed
+    by normalized value on a grid with one cell width per dimensions, given
+    as tolerances: ApproxIndex(1 * si.millimeters, 0.1 * si.seconds).
+    Queries only visit the cells overlapping the requested interval.
+    """
+
+    cdef dict grids
+    cdef Py_ssize_t count
+
+    def __init__(ApproxIndex self, *tolerances):
+        cdef q.Quantity tol
+        cdef double width
+        self.grids = {}
+        for value in tolerances:
+            tol = as_scalar(value)
+            width = tol.c_value * tol.udata.scale
+            if not (width > 0 and isfinite(width)):
+                raise ValueError("tolerance must be positive and finite")
+            self.grids[ddata_key(tol.udata.dimensions)] = _Grid(tol, width)
+
+    def tolerance(ApproxIndex self, d.Dimensions dimensions not None):
+        cdef _Grid grid = self.grids.get(ddata_key(dimensions.data))
+        if grid is None:
+            return None
+        return grid.tolerance
+
+    def add(ApproxIndex self, object value, object item=None):
+        """
+        Adds `value`, returned as `item` (default `value`) from queries.
+        """
+        cdef q.Quantity quantity = as_scalar(value)
+        cdef _Grid grid = self.grids.get(ddata_key(quantity.udata.dimensions))
+        cdef double norm = quantity.c_value * quantity.udata.scale
+        cdef long long cell
+
+        if grid is None:
+            raise ValueError("no tolerance for %r" % quantity.units.dimensions)
+        if not isfinite(norm / grid.width):
+            raise ValueError("Expected a finite value")
+        cell = <long long>floor(norm / grid.width)
+
+        entries = grid.cells.get(cell)
+        if entries is None:
+            if not grid.cells or cell < grid.lo:
+                grid.lo = cell
+            if not grid.cells or cell > grid.hi:
+                grid.hi = cell
+            grid.cells[cell] = entries = []
+        entries.append((norm, value if item is None else item))
+        self.count += 1
+
+    def update(ApproxIndex self, object values):
+        for value in values:
+            self.add(value)
+
+    def within(ApproxIndex self, object value, object tol=None):
+        """
+        Items whose value is within `tol` (default the index tolerance) of
+        `value`.
+        """
+        cdef q.Quantity quantity = as_scalar(value)
+        cdef _Grid grid = self.grids.get(ddata_key(quantity.udata.dimensions))
+        cdef double norm = quantity.c_value * quantity.udata.scale
+        cdef double width
+        cdef long long first, last, cell
+        cdef list out = []
+
+        if grid is None or not grid.cells or norm != norm:
+            return out
+
+        if tol is None:
+            width = grid.width
+        else:
+            if not c.eq_ddata(as_scalar(tol).udata.dimensions, quantity.udata.dimensions):
+                raise ValueError("unit mismatch")
+            width = (<q.Quantity>tol).c_value * (<q.Quantity>tol).udata.scale
+            if width < 0:
+                raise ValueError("tolerance must not be negative")
+
+        first = grid.cell(norm - width)
+        last = grid.cell(norm + width)
+        if last - first >= len(grid.cells):
+            for cell in sorted(grid.cells):
+                if first <= cell <= last:
+                    grid.scan(grid.cells[cell], norm, width, out)
+            return out
+
+        for cell in range(first, last + 1):
+            entries = grid.cells.get(cell)
+            if entries is not None:
+                grid.scan(entries, norm, width, out)
+        return out
+
+    def nearest(ApproxIndex self, object value):
+        """
+        Item whose value is closest to `value`, or None when there are no
+        values of the same dimensions.
+        """
+        cdef q.Quantity quantity = as_scalar(value)
+        cdef _Grid grid = self.grids.get(ddata_key(quantity.udata.dimensions))
+        cdef double norm = quantity.c_value * quantity.udata.scale
+        cdef double distance, best_distance = INFINITY
+        cdef long long center, radius = 0
+        cdef tuple entry
+        best = None
+
+        if grid is None or not grid.cells or norm != norm:
+            return None
+
+        center = grid.cell(norm)
+        while True:
+            if radius > len(grid.cells):
+                # sparse grid, cheaper to check every cell once
+                cells = grid.cells.values()
+            elif radius == 0:
+                cells = (grid.cells.get(center),)
+            else:
+                cells = (grid.cells.get(center - radius), grid.cells.get(center + radius))
+
+            for entries in cells:
+                if entries is None:
+                    continue
+                for entry in entries:
+                    distance = fabs(<double>entry[0] - norm)
+                    if distance < best_distance:
+                        best_distance = distance
+                        best = entry[1]
+
+            # cells further out are at least radius * width away
+            if radius > len(grid.cells) or best_distance <= radius * grid.width:
+                break
+            if center - radius <= grid.lo and center + radius >= grid.hi:
+                break
+            radius += 1
+        return best
+
+    def __len__(ApproxIndex self):
+        return self.count
+
+    def __repr__(ApproxIndex self):
+        return 'ApproxIndex(%s)' % ', '.join(repr((<_Grid>grid).tolerance) for grid in self.grids.values())
@@ -0,0 +1,119 @@
+"""
+Unit tagged on-disk arrays
+
+A file holds a small JSON header with the units, followed by the raw values
+as little endian doubles:
+
+    MAGIC, header length (uint32 le), header, padding, values
+
+The values start at a multiple of `ALIGNMENT` bytes, so a file can be
+memory mapped and used in place with `load(path, mmap=True)`.
+"""
+
+import array
+import json
+import mmap as _mmap
+import os
+import struct
+import sys
+
+from cyquant.buffers import double_bytes, values_of
+from cyquant.quantities import QuantityArray, SIUnit
+
+MAGIC = b"\x93CYQUANT"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+
+_DIMENSIONS = ("kg", "m", "s", "k", "a", "mol", "cd")
+_LENGTH = struct.Struct("<I")
+
+
+def _header(units, count):
+    dims = units.dimensions
+    header = {
+        "version": FORMAT_VERSION,
+        "dtype": "<f8",
+        "count": count,
+        "scale": units.scale,
+        "dimensions": {name: getattr(dims, name) for name in _DIMENSIONS if getattr(dims, name)},
+    }
+    text = json.dumps(header, sort_keys=True).encode("ascii")
+    size = len(MAGIC) + _LENGTH.size + len(text) + 1
+    text += b" " * (-size % ALIGNMENT) + b"\n"
+    return MAGIC + _LENGTH.pack(len(text)) + text
+
+
+def save(path, quantity):
+    """
+    Writes an array valued Quantity or QuantityArray to `path` (a file name
+    or a binary file object).
+    """
+    units, values = values_of(quantity)
+    data = double_bytes(values)
+    if sys.byteorder != "little":
+        swapped = array.array("d", data.cast("d"))
+        swapped.byteswap()
+        data = memoryview(swapped).cast("B")
+
+    header = _header(units, len(data) // 8)
+    if hasattr(path, "write"):
+        path.write(header)
+        path.write(data)
+        return
+    with open(path, "wb") as f:
+        f.write(header)
+        f.write(data)
+
+
+def _read_header(f):
+    magic = f.read(len(MAGIC))
+    if magic != MAGIC:
+        raise ValueError("not a cyquant array file")
+    length, = _LENGTH.unpack(f.read(_LENGTH.size))
+    header = json.loads(f.read(length))
+    if header.get("version") != FORMAT_VERSION:
+        raise ValueError("unsupported cyquant array file version: %r" % header.get("version"))
+    if header.get("dtype") != "<f8":
+        raise ValueError("unsupported dtype: %r" % header.get("dtype"))
+    units = SIUnit.Unit(header["scale"], **header["dimensions"])
+    return units, header["count"], len(MAGIC) + _LENGTH.size + length
+
+
+def load(path, mmap=False):
+    """
+    Reads a QuantityArray written by `save`.
+
+    With `mmap=True` the values are a copy-on-write memory map of the file,
+    so only the pages actually touched are read and writes are not stored.
+    """
+    if hasattr(path, "read"):
+        if mmap:
+            raise ValueError("mmap=True requires a file name")
+        return _load_file(path)
+
+    with open(path, "rb") as f:
+        if not mmap:
+            return _load_file(f)
+
+        units, count, offset = _read_header(f)
+        if sys.byteorder != "little":
+            raise ValueError("mmap=True requires a little endian platform")
+        if os.fstat(f.fileno()).st_size < offset + count * 8:
+            raise ValueError("truncated cyquant array file")
+        if count == 0:
+            return QuantityArray(array.array("d"), units)
+        mapped = _mmap.mmap(f.fileno(), 0, access=_mmap.ACCESS_COPY)
+    values = memoryview(mapped)[offset:offset + count * 8].cast("d")
+    return QuantityArray(values, units)
+
+
+def _load_file(f):
+    units, count, _ = _read_header(f)
+    values = array.array("d")
+    data = f.read(count * 8)
+    if len(data) != count * 8:
+        raise ValueError("truncated cyquant array file")
+    values.frombytes(data)
+    if sys.byteorder != "little":
+        values.byteswap()
+    return QuantityArray(values, units)
@@ -0,0 +1,363 @@
+#!python
+#cython: language_level=3
+
+cimport cyquant.ctypes as c
+cimport cyquant.quantities as q
+import cyquant.quantities as q
+
+from libc.string cimport memset
+
+cdef c.UData UNITY
+memset(&UNITY, 0, sizeof(c.UData))
+UNITY.scale = 1.0
+
+# ufuncs grouped by how they propagate units
+
+#all operands share dimensions, result is in the common unit
+SAME_UNIT = frozenset({
+    "add", "subtract", "maximum", "minimum", "fmax", "fmin",
+    "hypot", "remainder", "fmod",
+    "negative", "positive", "absolute", "fabs",
+    "rint", "floor", "ceil", "trunc", "conjugate",
+})
+
+#all operands share dimensions, result is unitless
+COMPARISON = frozenset({
+    "equal", "not_equal", "less", "less_equal", "greater", "greater_equal",
+})
+
+#operands must be dimensionless, result is dimensionless
+DIMENSIONLESS = frozenset({
+    "exp", "exp2", "expm1", "log", "log2", "log10", "log1p",
+    "logaddexp", "logaddexp2",
+    "sin", "cos", "tan", "arcsin", "arccos", "arctan",
+    "sinh", "cosh", "tanh", "arcsinh", "arccosh", "arctanh",
+})
+
+#result does not depend on units at all
+UNITLESS = frozenset({
+    "isfinite", "isinf", "isnan", "signbit", "sign",
+})
+
+POWERS = {
+    "square": 2.0,
+    "sqrt": 0.5,
+    "cbrt": 1.0 / 3.0,
+    "reciprocal": -1.0,
+}
+
+cdef object np = None
+
+cdef inline object numpy():
+    global np
+    if np is None:
+        import numpy
+        np = numpy
+    return np
+
+cdef inline bint is_quantity(object value):
+    cdef type value_type = type(value)
+    return value_type is q.Quantity or value_type is q.QuantityArray
+
+cdef inline object value_of(object value):
+    cdef type value_type = type(value)
+    if value_type is q.Quantity:
+        return (<q.Quantity>value).q
+    if value_type is q.QuantityArray:
+        return numpy().asarray((<q.QuantityArray>value).c_values)
+    return value
+
+cdef inline void udata_of(c.UData& out, object value):
+    cdef type value_type = type(value)
+    if value_type is q.Quantity:
+        (&out)[0] = (<q.Quantity>value).udata
+    elif value_type is q.QuantityArray:
+        (&out)[0] = (<q.QuantityArray>value).udata
+    else:
+        (&out)[0] = UNITY
+
+cdef inline object scaled(object value, double factor):
+    if factor == 1.0:
+        return value
+    return value * factor
+
+#fills `common` with the smallest unit among the quantities in `values`
+cdef int common_udata(c.UData& common, object values) except -1:
+    cdef c.UData udata
+    cdef bint found = False
+    cdef int error_code
+
+    for value in values:
+        if not is_quantity(value):
+            continue
+        udata_of(udata, value)
+        if not found:
+            (&common)[0] = udata
+            found = True
+            continue
+        error_code = c.min_udata(common, common, udata)
+        if error_code == c.DimensionMismatch:
+            raise ValueError("unit mismatch")
+        if error_code != c.Success:
+            raise RuntimeError("Unknown Error Occurred: %i" % error_code)
+
+    if not found:
+        (&common)[0] = UNITY
+    return 0
+
+#raw value of `value` expressed in `units`; plain values must be dimensionless
+cdef object value_in(object value, const c.UData& units):
+    cdef c.UData udata
+    udata_of(udata, value)
+    if not c.eq_ddata(udata.dimensions, units.dimensions):
+        raise ValueError("unit mismatch")
+    return scaled(value_of(value), udata.scale / units.scale)
+
+cdef object wrap(object value, const c.UData& udata, bint as_array):
+    cdef q.Quantity ret
+    if (as_array and type(value) is np.ndarray and value.ndim == 1
+            and value.dtype == np.float64 and value.flags.writeable):
+        return q.view_qarray(udata, value)
+
+    ret = q.Quantity.__new__(q.Quantity)
+    ret.udata = udata
+    if isinstance(value, float) or type(value) is int:
+        ret.py_value = None
+        ret.c_value = value
+    else:
+        ret.py_value = value
+    return ret
+
+cdef object finish(object result, const c.UData& udata, tuple outs, bint as_array):
+    if outs is None:
+        return wrap(result, udata, as_array)
+
+    cdef object out = outs[0]
+    if type(out) is q.Quantity:
+        (<q.Quantity>out).udata = udata
+    elif type(out) is q.QuantityArray:
+        (<q.QuantityArray>out).udata = udata
+    else:
+        return wrap(result, udata, as_array)
+    return out
+
+cdef tuple unwrap_outs(dict kwargs):
+    cdef object outs = kwargs.get("out")
+    if outs is None:
+        return None
+    if type(outs) is not tuple:
+        outs = (outs,)
+    for out in outs:
+        if type(out) is q.Quantity and (<q.Quantity>out).py_value is None:
+            raise TypeError("decimal quantity can not be used as an output buffer")
+    kwargs["out"] = tuple(value_of(out) for out in outs)
+    return outs
+
+def array_ufunc(object ufunc, str method, tuple inputs, dict kwargs):
+    cdef c.UData udata, base
+    cdef str name = ufunc.__name__
+    cdef bint as_array = any(type(value) is q.QuantityArray for value in inputs)
+    cdef tuple outs
+    cdef object power
+
+    numpy()
+
+    if method in ("reduce", "accumulate"):
+        if name not in SAME_UNIT or len(inputs) != 1:
+            return NotImplemented
+        outs = unwrap_outs(kwargs)
+        udata_of(udata, inputs[0])
+        result = getattr(ufunc, method)(value_of(inputs[0]), **kwargs)
+        return finish(result, udata, outs, as_array)
+
+    if method != "__call__":
+        return NotImplemented
+
+    if name in SAME_UNIT:
+        common_udata(udata, inputs)
+        outs = unwrap_outs(kwargs)
+        result = ufunc(*[value_in(value, udata) for value in inputs], **kwargs)
+        return finish(result, udata, outs, as_array)
+
+    if name in COMPARISON or name == "arctan2":
+        common_udata(udata, inputs)
+        return ufunc(*[value_in(value, udata) for value in inputs], **kwargs)
+
+    if name in DIMENSIONLESS:
+        outs = unwrap_outs(kwargs)
+        result = ufunc(*[value_in(value, UNITY) for value in inputs], **kwargs)
+        return finish(result, UNITY, outs, as_array)
+
+    if name in UNITLESS:
+        return ufunc(*[value_of(value) for value in inputs], **kwargs)
+
+    #the floor depends on the units of the quotient, so use common ones
+    if name == "floor_divide":
+        common_udata(udata, inputs)
+        outs = unwrap_outs(kwargs)
+        result = ufunc(*[value_in(value, udata) for value in inputs], **kwargs)
+        return finish(result, UNITY, outs, as_array)
+
+    if name in ("multiply", "matmul", "divide", "true_divide"):
+        udata_of(udata, inputs[0])
+        udata_of(base, inputs[1])
+        if name == "multiply" or name == "matmul":
+            q.check_error(c.mul_udata(udata, udata, base))
+        else:
+            q.check_error(c.div_udata(udata, udata, base))
+        outs = unwrap_outs(kwargs)
+        result = ufunc(value_of(inputs[0]), value_of(inputs[1]), **kwargs)
+        return finish(result, udata, outs, as_array)
+
+    if name in POWERS:
+        udata_of(base, inputs[0])
+        q.check_error(c.pow_udata(udata, base, POWERS[name]))
+        outs = unwrap_outs(kwargs)
+        result = ufunc(value_of(inputs[0]), **kwargs)
+        return finish(result, udata, outs, as_array)
+
+    if name == "power" or name == "float_power":
+        power = value_in(inputs[1], UNITY)
+        if np.ndim(power) != 0:
+            raise ValueError("quantity exponents must be scalar")
+        udata_of(base, inputs[0])
+        q.check_error(c.pow_udata(udata, base, power))
+        outs = unwrap_outs(kwargs)
+        result = ufunc(value_of(inputs[0]), power, **kwargs)
+        return finish(result, udata, outs, as_array)
+
+    return NotImplemented
+
+"""
+Array Functions
+"""
+
+cdef dict FUNCTIONS = None
+
+cdef inline object convert_arg(object value, const c.UData& units):
+    if is_quantity(value):
+        return value_in(value, units)
+    cdef list items
+    if type(value) is list or type(value) is tuple:
+        items = []
+        for item in value:
+            items.append(convert_arg(item, units))
+        return items if type(value) is list else tuple(items)
+    return value
+
+cdef inline list flat_args(tuple args, dict kwargs):
+    cdef list flat = []
+    for value in args + tuple(kwargs.values()):
+        if type(value) is list or type(value) is tuple:
+            flat.extend(value)
+        else:
+            flat.append(value)
+    return flat
+
+def _same_unit(func):
+    def handler(*args, **kwargs):
+        cdef c.UData udata
+        cdef list flat = flat_args(args, kwargs)
+        common_udata(udata, flat)
+        result = func(
+            *[convert_arg(arg, udata) for arg in args],
+            **{key: convert_arg(arg, udata) for key, arg in kwargs.items()}
+        )
+        as_array = any(type(arg) is q.QuantityArray for arg in flat)
+        if type(result) is tuple:
+            #e.g. np.unique(..., return_counts=True): only the values carry units
+            return (wrap(result[0], udata, as_array),) + result[1:]
+        return wrap(result, udata, as_array)
+    return handler
+
+def _same_unit_raw(func):
+    def handler(*args, **kwargs):
+        cdef c.UData udata
+        common_udata(udata, flat_args(args, kwargs))
+        return func(
+            *[convert_arg(arg, udata) for arg in args],
+            **{key: convert_arg(arg, udata) for key, arg in kwargs.items()}
+        )
+    return handler
+
+def _unitless(func):
+    def handler(*args, **kwargs):
+        return func(
+            *[value_of(arg) for arg in args],
+            **{key: value_of(arg) for key, arg in kwargs.items()}
+        )
+    return handler
+
+def _squared(func):
+    def handler(a, *args, **kwargs):
+        cdef c.UData udata
+        udata_of(udata, a)
+        q.check_error(c.pow_udata(udata, udata, 2.0))
+        return wrap(func(value_of(a), *args, **kwargs), udata, False)
+    return handler
+
+def _product(func):
+    def handler(a, b, *args, **kwargs):
+        cdef c.UData udata, rhs
+        udata_of(udata, a)
+        udata_of(rhs, b)
+        q.check_error(c.mul_udata(udata, udata, rhs))
+        return wrap(func(value_of(a), value_of(b), *args, **kwargs), udata, False)
+    return handler
+
+def _where(condition, x, y):
+    cdef c.UData udata
+    common_udata(udata, (x, y))
+    return wrap(
+        np.where(value_of(condition), value_in(x, udata), value_in(y, udata)),
+        udata,
+        type(x) is q.QuantityArray or type(y) is q.QuantityArray
+    )
+
+cdef dict functions():
+    global FUNCTIONS
+    if FUNCTIONS is not None:
+        return FUNCTIONS
+
+    numpy()
+    FUNCTIONS = {}
+
+    for func in (
+        np.sum, np.nansum, np.mean, np.nanmean, np.average, np.median, np.nanmedian,
+        np.std, np.nanstd, np.min, np.max, np.amin, np.amax, np.nanmin, np.nanmax,
+        np.ptp, np.percentile, np.nanpercentile, np.quantile, np.nanquantile,
+        np.cumsum, np.diff, np.sort, np.unique, np.round, np.around, np.clip,
+        np.copy, np.reshape, np.ravel, np.transpose, np.squeeze, np.expand_dims,
+        np.flip, np.atleast_1d, np.trace, np.linalg.norm,
+        np.concatenate, np.stack, np.hstack, np.vstack, np.append,
+    ):
+        FUNCTIONS[func] = _same_unit(func)
+
+    for func in (np.isclose, np.allclose, np.array_equal, np.searchsorted):
+        FUNCTIONS[func] = _same_unit_raw(func)
+
+    for func in (
+        np.argmin, np.argmax, np.nanargmin, np.nanargmax, np.argsort,
+        np.nonzero, np.count_nonzero, np.shape, np.ndim, np.size,
+    ):
+        FUNCTIONS[func] = _unitless(func)
+
+    for func in (np.var, np.nanvar):
+        FUNCTIONS[func] = _squared(func)
+
+    for func in (np.dot, np.inner, np.outer, np.matmul, np.cross):
+        FUNCTIONS[func] = _product(func)
+
+    FUNCTIONS[np.where] = _where
+    return FUNCTIONS
+
+def array_function(object func, object types, tuple args, dict kwargs):
+    numpy()
+    for arg_type in types:
+        if not (arg_type is q.Quantity or arg_type is q.QuantityArray or issubclass(arg_type, np.ndarray)):
+            return NotImplemented
+
+    handler = functions().get(func)
+    if handler is None:
+        return NotImplemented
+    return handler(*args, **kwargs)
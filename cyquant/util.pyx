@@ -1,3 +1,5 @@
+cimport cython
+
 cimport cyquant.ctypes as c
 
 cimport cyquant.dimensions as d
@@ -6,26 +8,194 @@ import cyquant.dimensions as d
 cimport cyquant.quantities as q
 import cyquant.quantities as q
 
+from cpython cimport array
+from libc.string cimport memset
+
 from functools import partial
 
 
-def converter(q.SIUnit units not None, bint promotes=False):
-    impl = _promiscuous_convert if promotes else _strict_convert
-    return partial(impl, units)
+@cython.final
+cdef class Converter:
+    """
+    Converts Quantities to `units`; with `promotes` plain values are taken
+    to already be in `units`.
+    """
+
+    cdef q.SIUnit c_units
+    cdef bint c_promotes
+
+    @property
+    def units(self):
+        return self.c_units
+
+    @property
+    def promotes(self):
+        return self.c_promotes
+
+    def __init__(Converter self, q.SIUnit units not None, bint promotes=False):
+        self.c_units = units
+        self.c_promotes = promotes
+
+    def convert(Converter self, object value):
+        cdef type value_type = type(value)
+        cdef q.Quantity quantity, ret
+        cdef double factor
+
+        if value_type is q.Quantity:
+            quantity = value
+            if c.eq_udata(quantity.udata, self.c_units.data):
+                return quantity
+            factor = q.convert_factor(quantity.udata, self.c_units.data)
+            ret = q.Quantity.__new__(q.Quantity)
+            ret.udata = self.c_units.data
+            if quantity.py_value is None:
+                ret.c_value = quantity.c_value * factor
+            else:
+                ret.py_value = quantity.py_value * factor
+            return ret
+
+        if not self.c_promotes or value is None:
+            raise TypeError("Expected Quantity")
+
+        ret = q.Quantity.__new__(q.Quantity)
+        ret.udata = self.c_units.data
+        if value_type is float or value_type is int:
+            ret.c_value = value
+        else:
+            ret.py_value = value
+        return ret
+
+    def __call__(Converter self, object value):
+        return self.convert(value)
+
+    def __repr__(Converter self):
+        return 'Converter(%r, promotes=%r)' % (self.c_units, self.c_promotes)
+
+@cython.final
+cdef class Validator:
+    """
+    Checks that every value in an iterable is of `dimensions`.
+    """
+
+    cdef d.Dimensions dims
+
+    @property
+    def dimensions(self):
+        return self.dims
 
-def _strict_convert(q.SIUnit units not None, q.Quantity quantity not None):
-    return quantity.cvt_to(units)
+    def __init__(Validator self, d.Dimensions dims not None):
+        self.dims = dims
 
-def _promiscuous_convert(q.SIUnit units not None, object value):
-    if type(value) is q.Quantity:
-        return value.cvt_to(units)
-    return units.promote(value)
+    def validate(Validator self, qiterable):
+        return first_invalid(self.dims, qiterable) < 0
+
+    def __call__(Validator self, qiterable):
+        return self.validate(qiterable)
+
+    def __repr__(Validator self):
+        return 'Validator(%r)' % (self.dims,)
+
+# bound methods of extension types are called without packing an argument
+# tuple, unlike the instances themselves
+def converter(q.SIUnit units not None, bint promotes=False):
+    return Converter(units, promotes).convert
 
 def validator(d.Dimensions dims not None):
-    return partial(are_of, dims)
+    return Validator(dims).validate
 
 def args_of(d.Dimensions dims not None, *qargs):
     return are_of(dims, qargs)
 
 def are_of(d.Dimensions dims not None, qiterable):
-    return all(q.is_of(dims) for q in qiterable)
+    return first_invalid(dims, qiterable) < 0
+
+"""
+Batch validation
+"""
+
+#1 if `value` is a Quantity, QuantityArray or SIUnit of `dims`, else 0
+cdef inline bint value_is_of(d.Dimensions dims, object value) except -1:
+    cdef type value_type = type(value)
+    if value_type is q.Quantity:
+        return c.eq_ddata((<q.Quantity>value).udata.dimensions, dims.data)
+    if value_type is q.QuantityArray:
+        return c.eq_ddata((<q.QuantityArray>value).udata.dimensions, dims.data)
+    if value_type is q.SIUnit:
+        return c.eq_ddata((<q.SIUnit>value).data.dimensions, dims.data)
+    return bool(value.is_of(dims))
+
+def first_invalid(d.Dimensions dims not None, values):
+    """
+    Index of the first value in `values` not of `dims`, or -1 when all are.
+    A QuantityArray is checked once for all of its elements.
+    """
+    cdef Py_ssize_t i = 0
+    if type(values) is q.QuantityArray:
+        if len(values) == 0 or value_is_of(dims, values):
+            return -1
+        return 0
+
+    if type(values) is list or type(values) is tuple:
+        for i in range(len(values)):
+            if not value_is_of(dims, values[i]):
+                return i
+        return -1
+
+    for value in values:
+        if not value_is_of(dims, value):
+            return i
+        i += 1
+    return -1
+
+def valid_mask(d.Dimensions dims not None, values):
+    """
+    array('b') with 1 for each value in `values` of `dims` and 0 otherwise.
+    """
+    cdef Py_ssize_t i
+    cdef array.array mask
+
+    if type(values) is q.QuantityArray:
+        mask = q.new_mask(len(values))
+        memset(mask.data.as_chars, value_is_of(dims, values), len(values))
+        return mask
+
+    if type(values) is not list and type(values) is not tuple:
+        values = list(values)
+    mask = q.new_mask(len(values))
+    for i in range(len(values)):
+        mask.data.as_schars[i] = value_is_of(dims, values[i])
+    return mask
+
+def invalid_fields(dict schema not None, record):
+    """
+    Names in `schema` (a dict of field name to Dimensions) whose value in
+    `record` is missing or not of those dimensions, in schema order.
+    `record` is a mapping or an object with the fields as attributes.
+    """
+    cdef list invalid = []
+    cdef bint is_mapping = isinstance(record, dict)
+    cdef object missing = invalid
+
+    for name, dims in schema.items():
+        if type(dims) is not d.Dimensions:
+            raise TypeError("Expected Dimensions for field %r" % (name,))
+        if is_mapping:
+            value = (<dict>record).get(name, missing)
+        else:
+            value = getattr(record, name, missing)
+        if value is missing:
+            invalid.append(name)
+            continue
+        try:
+            if value_is_of(dims, value):
+                continue
+        except AttributeError:
+            pass
+        invalid.append(name)
+    return invalid
+
+def is_record_of(dict schema not None, record):
+    return not invalid_fields(schema, record)
+
+def record_validator(dict schema not None):
+    return partial(is_record_of, schema)
@@ -18,7 +18,7 @@ def make_sources(*module_names):
         for mod in module_names
     }
 
-modules = ["dimensions", "quantities", "util", "qmath"]
+modules = ["dimensions", "parallel", "quantities", "util", "qmath", "ufuncs", "sorting", "lazy"]
 sources = make_sources(*modules)
 
 extensions = [
@@ -39,7 +39,7 @@ if use_cython:
 setup(
     name="cyquant",
     version="1.1.1",
-    packages=[package_name],
+    packages=[package_name, f"{package_name}.bench"],
     ext_modules=extensions,
     cmdclass=cmdclass,
     package_data={package_name: ["*.pyx", "*.pxd", "*.cpp"]},
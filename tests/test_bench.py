@@ -0,0 +1,56 @@
+import pytest
+
+from cyquant import bench
+from cyquant.bench.__main__ import main
+
+def test_bench_registry():
+    benchmarks = bench.load()
+    groups = {key.split(".")[0] for key in benchmarks}
+    assert {"construct", "arith", "convert", "compare", "approx", "qmath", "util", "format"} <= groups
+
+    with pytest.raises(ValueError):
+        bench.benchmark("construct", "promote")(lambda: None)
+
+def test_bench_run():
+    report = bench.run(["construct.promote", "arith.scalar_add"], repeat=2, min_time=0.001)
+    assert report["version"] == bench.FORMAT_VERSION
+    assert set(report["results"]) == {"construct.promote", "construct.promote_buffer", "construct.promote_mpf", "arith.scalar_add"}
+    for result in report["results"].values():
+        assert 0 < result["best"] <= result["mean"]
+        assert result["repeat"] == 2
+
+def test_bench_allocations():
+    report = bench.run(["alloc.", "construct.promote_buffer"], repeat=2, min_time=0.001, allocations=True)
+    results = report["results"]
+    assert results["construct.promote_buffer"]["allocated"] > 0
+
+    #temporaries are recycled through the free-lists
+    for key in ("alloc.scalar_chain", "alloc.unit_chain", "alloc.dimensions_chain", "alloc.units_property"):
+        assert results[key]["allocated"] == 0
+
+def test_bench_compare():
+    def report(**times):
+        return {
+            "version": bench.FORMAT_VERSION,
+            "results": {key: {"best": value} for key, value in times.items()},
+        }
+
+    rows = bench.compare(report(a=1.0, b=1.0, c=1.0, d=1.0), report(a=1.5, b=0.5, c=1.05, e=1.0))
+    assert [(row[0], row[4]) for row in rows] == [
+        ("a", "slower"), ("b", "faster"), ("c", "same"), ("d", "removed"), ("e", "added"),
+    ]
+    assert rows[0][3] == pytest.approx(1.5)
+
+    with pytest.raises(ValueError):
+        bench.compare({"version": 0, "results": {}}, report())
+
+def test_bench_main(tmp_path, capsys):
+    old = tmp_path / "old.json"
+    new = tmp_path / "new.json"
+    assert main(["-k", "convert.get_as", "--repeat", "2", "--min-time", "0.001", "--json", str(old)]) == 0
+    assert main(["-k", "convert.get_as", "--repeat", "2", "--min-time", "0.001", "--allocations", "--json", str(new)]) == 0
+    assert "convert.get_as" in bench.load_report(old)["results"]
+
+    capsys.readouterr()
+    assert main(["--compare", str(old), str(new), "--threshold", "100"]) == 0
+    assert "convert.get_as" in capsys.readouterr().out
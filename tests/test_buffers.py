@@ -0,0 +1,37 @@
+import pytest
+import array
+
+import numpy as np
+
+from cyquant import si, QuantityArray
+from cyquant import buffers
+
+def test_values_of():
+    x = QuantityArray(array.array('d', [1, 2, 3]), si.meters)
+    units, values = buffers.values_of(x)
+    assert units == si.meters
+    assert values.tolist() == [1, 2, 3]
+
+    units, values = buffers.values_of(np.arange(3.0) * si.seconds)
+    assert units == si.seconds
+    assert values.tolist() == [0, 1, 2]
+
+    with pytest.raises(TypeError):
+        buffers.values_of(1 * si.meters)
+    with pytest.raises(TypeError):
+        buffers.values_of(array.array('d', [1]))
+
+def test_double_bytes():
+    values = memoryview(array.array('d', [1, 2, 3]))
+    data = buffers.double_bytes(values)
+    assert data.obj is values.obj
+    assert data.cast('d').tolist() == [1, 2, 3]
+
+    data = buffers.double_bytes(memoryview(np.arange(6.0)[::2]))
+    assert data.cast('d').tolist() == [0, 2, 4]
+
+    data = buffers.double_bytes(memoryview(array.array('i', [1, 2])))
+    assert data.cast('d').tolist() == [1, 2]
+
+    with pytest.raises(ValueError):
+        buffers.double_bytes(memoryview(np.ones((2, 2))))
@@ -1,4 +1,5 @@
 import pytest
+import pickle
 
 from cyquant.dimensions import Dimensions
 
@@ -98,4 +99,53 @@ def test_hash_dimensions():
     assert hash(dims3) == hash(dims4)
 
     assert hash(dims1) != hash(dims3)
-    assert hash(dims2) != hash(dims4)
\ No newline at end of file
+    assert hash(dims2) != hash(dims4)
+    assert hash(Dimensions(m=0.0)) == hash(Dimensions(m=-0.0))
+
+def test_intern_dimensions():
+    dims1 = Dimensions(m=1, s=-1)
+    dims2 = Dimensions(m=1, s=-1)
+
+    assert dims1 is not dims2
+    assert dims1.intern() is dims2.intern()
+    assert dims1.intern() == dims2
+
+    Dimensions.SetInterning(True)
+    try:
+        assert Dimensions.GetInterning()
+        assert Dimensions(m=1) / Dimensions(s=1) is dims1.intern()
+    finally:
+        Dimensions.SetInterning(False)
+
+    assert not Dimensions.GetInterning()
+
+def test_rational_dimensions():
+    third = Dimensions(m=1/3)
+    assert third.m == 1/3
+    assert third ** 3 == Dimensions(m=1)
+    assert hash(third ** 3) == hash(Dimensions(m=1))
+    assert third * third * third == Dimensions(m=1)
+    assert Dimensions(m=0.5) ** 2 == Dimensions(m=1)
+    assert Dimensions(s=-1.5) / Dimensions(s=-1.5) == Dimensions()
+    assert hash(Dimensions(s=-1.5) / Dimensions(s=-1.5)) == hash(Dimensions())
+
+    assert Dimensions(m=1/3) != Dimensions(m=0.3333)
+    assert Dimensions(m=1/3).approx(Dimensions(m=1/3 + 1e-14))
+
+def test_dimensions_overflow():
+    with pytest.raises(OverflowError):
+        Dimensions(m=float("nan"))
+
+    with pytest.raises(OverflowError):
+        Dimensions(m=1e12)
+
+    with pytest.raises(OverflowError):
+        Dimensions(m=1) ** 1e12
+
+    with pytest.raises(OverflowError):
+        Dimensions(m=1e-9)
+
+def test_pickle_dimensions():
+    for dims in (Dimensions(), Dimensions(kg=1, m=-3), Dimensions(m=1/3, s=-0.5), Dimensions(m=200)):
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            assert pickle.loads(pickle.dumps(dims, protocol)) == dims
@@ -1,5 +1,6 @@
 from cyquant import si, Quantity, SIUnit, Dimensions
-from cyquant.format_quantity import show_quantity
+from cyquant.format_quantity import show_quantity, show_quantities, si_unit_conversion
+from cyquant import format_quantity
 
 
 def test_show_quantity():
@@ -120,3 +121,26 @@ def test_show_quantity():
 		expected = value[1]
 		error = f"{tested} != Expected Value: {expected} "
 		assert tested == expected, error
+
+
+def test_show_quantities():
+	values = [1 * si.newtons, 1.25 * si.millimeters, 2 * si.grams, 3.0, None, "abc"]
+	expected = ['1.000e+00 N', '1.25 mm', '2.0 g', 3.0, None, "abc"]
+	assert show_quantities(values) == expected
+	assert show_quantities(iter(values)) == expected
+	assert show_quantities([]) == []
+
+	assert show_quantities([1 * si.newtons, 1 * si.meters], show_unit_symbol=False) == [
+		show_quantity(1 * si.newtons, False),
+		'1.0 meters',
+	]
+	assert show_quantity(1 * si.newtons, False) == '1.000e+00 Newtons'
+
+
+def test_derived_unit_tables():
+	for dims, key, name, symbol in format_quantity._DERIVED_UNITS:
+		nonzero = {dim: getattr(dims, dim) for dim in format_quantity._DIMS if getattr(dims, dim) != 0}
+		assert format_quantity._dim2str(nonzero) == key
+		assert si_unit_conversion(key) == {"name": name, "symbol": symbol}
+
+	assert si_unit_conversion("[furlongs]") is None
@@ -0,0 +1,209 @@
+import pytest
+
+import math
+import array
+
+from cyquant import si, qmath, Quantity, QuantityArray
+from cyquant import lazy
+
+g = 9.81 * si.meters / si.seconds ** 2
+
+def energy_expr():
+    m = lazy.symbol("m", si.kilograms)
+    v = lazy.symbol("v", si.meters / si.seconds)
+    h = lazy.symbol("h", si.meters)
+    return m * v ** 2 / 2 + m * g * h
+
+def test_build():
+    e = energy_expr()
+    assert e.units == si.joules
+    assert e.symbols == ("m", "v", "h")
+    assert repr(lazy.symbol("x") * 2) == "(x * 2.0)"
+
+    x = lazy.symbol("x", si.meters)
+    assert type(si.meters * x) is type(x)
+    assert type(2 * si.meters + x) is type(x)
+    assert type(2 * si.meters / x) is type(x)
+    assert (x * x).units == si.meters ** 2
+    assert (x + 1 * si.millimeters).units == si.millimeters
+    assert (x ** 0.5).units == si.meters ** 0.5
+    assert lazy.sqrt(x * x).units == si.meters
+
+def test_build_errors():
+    x = lazy.symbol("x", si.meters)
+    t = lazy.symbol("t", si.seconds)
+    with pytest.raises(ValueError):
+        x + t
+    with pytest.raises(ValueError):
+        x - 1
+    with pytest.raises(ZeroDivisionError):
+        x / (0 * si.seconds)
+    with pytest.raises(ValueError):
+        lazy.sin(x)
+    with pytest.raises(TypeError):
+        x + "1"
+    with pytest.raises(TypeError):
+        x ** t
+    with pytest.raises(TypeError):
+        x + QuantityArray(array.array('d', [1.0]), si.meters)
+
+def test_constant_folding():
+    x = lazy.symbol("x", si.meters)
+    assert repr(x * (2 * si.meters * 3)) == repr(x * (6 * si.meters))
+    assert repr(lazy.symbol("y") + lazy.sqrt(4.0)) == "(y + 2.0)"
+
+def test_compile_scalar():
+    f = energy_expr().compile(si.joules)
+    assert f.units == si.joules
+    assert f.symbols == ("m", "v", "h")
+
+    actual = f(2 * si.kilograms, 3 * si.meters / si.seconds, 1 * si.meters)
+    expected = 2 * si.kilograms * (3 * si.meters / si.seconds) ** 2 / 2 + 2 * si.kilograms * g * si.meters
+    assert type(actual) is Quantity
+    assert actual.units == si.joules
+    assert pytest.approx(expected.get_as(si.joules)) == actual.quantity
+
+    #other units of the same dimensions are converted per call
+    other = f(h=100 * si.centimeters, m=2000 * si.grams, v=3 * si.meters / si.seconds)
+    assert pytest.approx(actual.quantity) == other.quantity
+
+def test_compile_units():
+    x = lazy.symbol("x", si.meters)
+    f = (x * 2 + 1 * si.meters).compile(si.millimeters)
+    assert f.units == si.millimeters
+    assert f(3 * si.meters) == 7000 * si.millimeters
+    assert f(3000 * si.millimeters) == 7000 * si.millimeters
+
+    #repeated symbols are read in the units of their first occurrence
+    f = (x - lazy.symbol("x", si.millimeters)).compile()
+    assert f(1 * si.meters).quantity == 0
+
+    with pytest.raises(ValueError):
+        (x * 2).compile(si.seconds)
+    with pytest.raises(ValueError):
+        (x * lazy.symbol("x", si.seconds)).compile()
+
+def test_compile_args():
+    x = lazy.symbol("x", si.meters)
+    y = lazy.symbol("y", si.meters)
+    f = (x - y).compile(args=["y", x])
+    assert f.symbols == ("y", "x")
+    assert f(1 * si.meters, 3 * si.meters) == 2 * si.meters
+
+    with pytest.raises(ValueError):
+        (x - y).compile(args=["x"])
+    with pytest.raises(ValueError):
+        (x - y).compile(args=["x", "x"])
+
+def test_call_errors():
+    x = lazy.symbol("x", si.meters)
+    f = (x * 2).compile()
+    with pytest.raises(ValueError):
+        f(1 * si.seconds)
+    with pytest.raises(ValueError):
+        f(1)
+    with pytest.raises(TypeError):
+        f()
+    with pytest.raises(TypeError):
+        f(1 * si.meters, 2 * si.meters)
+    with pytest.raises(TypeError):
+        f(1 * si.meters, x=1 * si.meters)
+    with pytest.raises(TypeError):
+        f(y=1 * si.meters)
+    with pytest.raises(TypeError):
+        f("1")
+
+def test_math():
+    x = lazy.symbol("x", si.degrees)
+    f = (lazy.sin(x) ** 2 + lazy.cos(x) ** 2).compile()
+    assert pytest.approx(1) == f(30 * si.degrees).quantity
+    assert pytest.approx(0.5) == lazy.sin(x).compile()(math.pi / 6 * si.radians).quantity
+    assert pytest.approx(1) == lazy.tan(x).compile()(45 * si.degrees).quantity
+
+    y = lazy.symbol("y")
+    assert pytest.approx(math.e) == lazy.exp(y).compile()(1).quantity
+    assert pytest.approx(2) == lazy.log(y).compile()(math.e ** 2).quantity
+    assert lazy.cbrt(y * si.meters ** 3).compile(si.meters)(8) == 2 * si.meters
+    assert abs(y - 3).compile()(1) == 2 * si.unity
+
+    #ieee 754 results instead of exceptions, as for QuantityArray
+    assert math.isinf((1 / y).compile()(0).quantity)
+    assert math.isnan(lazy.sqrt(y).compile()(-1).quantity)
+
+def test_compile_arrays():
+    m = QuantityArray(array.array('d', [1, 2, 3, 4]), si.kilograms)
+    v = QuantityArray(array.array('d', [1000, 2000, 3000, 4000]), si.millimeters / si.seconds)
+    h = 1 * si.meters
+    f = energy_expr().compile(si.joules)
+
+    actual = f(m, v, h)
+    expected = m * v ** 2 / 2 + m * g * h
+    assert type(actual) is QuantityArray
+    assert actual.units == si.joules
+    assert list(actual.q) == pytest.approx(list(expected.get_as(si.joules)))
+
+    with pytest.raises(ValueError):
+        f(m, QuantityArray(array.array('d', [1, 2]), si.meters / si.seconds), h)
+
+    empty = QuantityArray(array.array('d'), si.kilograms)
+    assert len(f(empty, 1 * si.meters / si.seconds, h)) == 0
+
+def test_compile_large_array():
+    x = lazy.symbol("x", si.meters)
+    values = QuantityArray(array.array('d', range(10000)), si.meters)
+    actual = (x * x + x * si.meters).compile()(values)
+    assert actual.units == si.meters ** 2
+    assert list(actual.q) == [float(i * i + i) for i in range(10000)]
+
+def test_compile_ndarray():
+    np = pytest.importorskip("numpy")
+    x = lazy.symbol("x", si.seconds)
+    f = (x * 2).compile(si.milliseconds)
+    actual = f(np.arange(5.0) * si.seconds)
+    assert list(actual.q) == [0.0, 2000.0, 4000.0, 6000.0, 8000.0]
+
+def test_matches_eager():
+    x = QuantityArray(array.array('d', [i + 0.5 for i in range(100)]), si.meters)
+    y = QuantityArray(array.array('d', [(i * 7) % 13 + 1.0 for i in range(100)]), si.millimeters)
+    sx = lazy.symbol("x", si.meters)
+    sy = lazy.symbol("y", si.millimeters)
+
+    cases = [
+        (sx + sy, x + y),
+        (sx - sy, x - y),
+        (sx * sy, x * y),
+        (sx / sy, x / y),
+        (2 * si.meters / sx, 2 * si.meters / x),
+        (-sx * 3 + 1 * si.meters, -x * 3 + 1 * si.meters),
+        (lazy.sqrt(sx * sy), qmath.sqrt(x * y)),
+        (sx ** 3 / sy, x ** 3 / y),
+    ]
+    for expr, expected in cases:
+        f = expr.compile(expected.units)
+        actual = f(**{name: {"x": x, "y": y}[name] for name in f.symbols})
+        assert list(actual.q) == pytest.approx(list(expected.q))
+
+def test_expression_limits():
+    x = lazy.symbol("x")
+    total = x
+    with pytest.raises(ValueError):
+        for _ in range(100000):
+            total = total + x
+    assert total.compile()(1.0).quantity == 512
+
+    #shared subexpressions count once per use
+    doubled = x
+    with pytest.raises(ValueError):
+        for _ in range(64):
+            doubled = doubled + doubled
+    assert doubled.compile()(1.0).quantity == 2 ** 15
+
+def test_construction():
+    with pytest.raises(TypeError):
+        lazy.symbol("x", None)
+    with pytest.raises(TypeError):
+        lazy.symbol(None)
+    with pytest.raises(TypeError):
+        lazy.Expr()
+    with pytest.raises(TypeError):
+        lazy.Formula()
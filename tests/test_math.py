@@ -1,8 +1,9 @@
 import pytest
 
 import math
+import array
 
-from cyquant import si
+from cyquant import si, QuantityArray
 from cyquant import qmath
 
 def test_sin():
@@ -152,4 +153,261 @@ def test_hypot():
     y = 2000 * si.millimeters
     h = qmath.hypot(x, y)
     assert h.units == si.millimeters
-    assert pytest.approx(1000 * expected) == h.quantity
\ No newline at end of file
+    assert pytest.approx(1000 * expected) == h.quantity
+
+def test_array_trig():
+    angles = QuantityArray([0, 90, 180], si.degrees)
+
+    actual = qmath.sin(angles)
+    assert type(actual) is QuantityArray
+    assert actual.units == si.unity
+    assert pytest.approx([0, 1, 0]) == list(actual.quantity)
+
+    actual = qmath.cos(angles)
+    assert pytest.approx([1, 0, -1]) == list(actual.quantity)
+
+    sines, cosines = qmath.sin_cos(angles)
+    assert pytest.approx([0, 1, 0]) == list(sines.quantity)
+    assert pytest.approx([1, 0, -1]) == list(cosines.quantity)
+
+    actual = qmath.tan(QuantityArray([45], si.degrees))
+    assert pytest.approx([1]) == list(actual.quantity)
+
+    with pytest.raises(ValueError):
+        qmath.sin(QuantityArray([1], si.meters))
+
+def test_array_inverse_trig():
+    ratios = QuantityArray([0.5, 1], si.unity)
+
+    actual = qmath.asin(ratios)
+    assert actual.units == si.radians
+    assert pytest.approx([math.asin(0.5), math.asin(1)]) == list(actual.quantity)
+
+    actual = qmath.acos(ratios)
+    assert pytest.approx([math.acos(0.5), math.acos(1)]) == list(actual.quantity)
+
+    actual = qmath.atan(ratios)
+    assert pytest.approx([math.atan(0.5), math.atan(1)]) == list(actual.quantity)
+
+    with pytest.raises(ValueError):
+        qmath.asin(QuantityArray([2], si.unity))
+
+    with pytest.raises(ValueError):
+        qmath.acos(QuantityArray([1], si.meters))
+
+def test_array_atan2_hypot():
+    y = QuantityArray([1, -2], si.meters)
+    x = QuantityArray([1000, 2000], si.millimeters)
+
+    actual = qmath.atan2(y, x)
+    assert actual.units == si.radians
+    assert pytest.approx([math.atan2(1, 1), math.atan2(-2, 2)]) == list(actual.quantity)
+
+    actual = qmath.hypot(x, y)
+    assert actual.units == si.millimeters
+    assert pytest.approx([math.hypot(1000, 1000), math.hypot(2000, 2000)]) == list(actual.quantity)
+
+    with pytest.raises(ValueError):
+        qmath.atan2(QuantityArray([0], si.meters), QuantityArray([0], si.meters))
+
+    with pytest.raises(ValueError):
+        qmath.hypot(x, QuantityArray([1, 2], si.seconds))
+
+    with pytest.raises(ValueError):
+        qmath.hypot(x, QuantityArray([1], si.meters))
+
+    with pytest.raises(TypeError):
+        qmath.hypot(x, 1 * si.meters)
+
+def test_sqrt_cbrt():
+    area = 4 * si.millimeters ** 2
+
+    actual = qmath.sqrt(area)
+    assert actual.units == si.millimeters
+    assert actual.quantity == 2
+
+    actual = qmath.cbrt(27 * si.liters)
+    assert actual.units.m == 1
+    assert pytest.approx(0.3) == actual.get_as(si.meters)
+
+    actual = qmath.sqrt(QuantityArray([1, 4, 9], si.meters ** 2))
+    assert actual.units == si.meters
+    assert list(actual.quantity) == [1, 2, 3]
+
+    actual = qmath.cbrt(QuantityArray([-8, 27], si.seconds ** 3))
+    assert actual.units == si.seconds
+    assert pytest.approx([-2, 3]) == list(actual.quantity)
+
+    with pytest.raises(ValueError):
+        qmath.sqrt(-1 * si.meters ** 2)
+
+    with pytest.raises(ValueError):
+        qmath.sqrt(QuantityArray([1, -1], si.meters ** 2))
+
+    with pytest.raises(TypeError):
+        qmath.sqrt(4)
+
+def test_sqrt_cbrt_ndarray():
+    np = pytest.importorskip("numpy")
+
+    actual = qmath.cbrt(np.array([-8.0, 27.0]) * si.meters ** 3)
+    assert actual.units == si.meters
+    assert np.allclose(actual.quantity, [-2, 3])
+
+    actual = qmath.sqrt(np.array([[1, 4], [9, 16]]).T * si.meters ** 2)
+    assert actual.units == si.meters
+    assert np.array_equal(actual.quantity, [[1, 3], [2, 4]])
+
+    with pytest.raises(ValueError):
+        qmath.sqrt(np.array([1.0, -1.0]) * si.meters ** 2)
+
+def test_ipow():
+    x = 2 * si.millimeters
+
+    actual = qmath.ipow(x, 3)
+    assert actual.quantity == 8
+    assert actual.units == si.millimeters ** 3
+
+    actual = qmath.ipow(x, -2)
+    assert actual.quantity == 0.25
+    assert actual.units == si.millimeters ** -2
+
+    assert qmath.square(x) == x * x
+    assert qmath.cube(x) == x * x * x
+
+    actual = qmath.square(QuantityArray([1, 2, 3], si.meters))
+    assert actual.units == si.meters ** 2
+    assert list(actual.quantity) == [1, 4, 9]
+
+    with pytest.raises(ZeroDivisionError):
+        qmath.ipow(0 * si.meters, -1)
+
+def test_exp_log():
+    actual = qmath.exp(1 * si.unity)
+    assert actual.units == si.unity
+    assert pytest.approx(math.e) == actual.quantity
+
+    actual = qmath.log((1000 * si.millimeters) / si.meters)
+    assert pytest.approx(0) == actual.quantity
+
+    assert pytest.approx(2) == qmath.log10(100 * si.unity).quantity
+    assert pytest.approx(math.expm1(1e-9)) == qmath.expm1(1e-9 * si.unity).quantity
+    assert pytest.approx(math.log1p(1e-9)) == qmath.log1p(1e-9 * si.unity).quantity
+
+    actual = qmath.log(QuantityArray([1, math.e], si.unity))
+    assert pytest.approx([0, 1]) == list(actual.quantity)
+
+    actual = qmath.exp(QuantityArray([0, 1], si.unity))
+    assert pytest.approx([1, math.e]) == list(actual.quantity)
+
+    with pytest.raises(ValueError):
+        qmath.exp(1 * si.meters)
+
+    with pytest.raises(ValueError):
+        qmath.log(0 * si.unity)
+
+    with pytest.raises(ValueError):
+        qmath.log(QuantityArray([1, -1], si.unity))
+
+    with pytest.raises(ValueError):
+        qmath.log1p(-1 * si.unity)
+
+    with pytest.raises(ValueError):
+        qmath.log(QuantityArray([1, math.nan], si.unity))
+
+    with pytest.raises(ValueError):
+        qmath.acos(QuantityArray([0, math.nan], si.unity))
+
+    assert math.isnan(qmath.exp(math.nan * si.unity).q)
+    assert math.isnan(qmath.exp(QuantityArray([0, math.nan], si.unity)).q[1])
+    assert math.isnan(qmath.expm1(QuantityArray([0, math.nan], si.unity)).q[1])
+
+def test_exp_log_ndarray():
+    np = pytest.importorskip("numpy")
+    values = np.arange(1.0, 7.0).reshape(2, 3)
+
+    actual = qmath.exp(values * si.unity)
+    assert actual.units == si.unity
+    assert actual.quantity.shape == (2, 3)
+    assert np.allclose(actual.quantity, np.exp(values))
+
+    actual = qmath.log(values.T * si.meters / si.millimeters)
+    assert np.allclose(actual.quantity, np.log(values.T * 1000))
+
+    actual = qmath.log10(np.arange(1, 4) * si.unity)
+    assert np.allclose(actual.quantity, np.log10([1, 2, 3]))
+
+    with pytest.raises(ValueError):
+        qmath.log(np.array([1.0, 0.0]) * si.unity)
+    with pytest.raises(ValueError):
+        qmath.exp(values * si.meters)
+
+def test_qsum():
+    values = [1 * si.meters, 2 * si.millimeters, 3 * si.kilometers]
+    assert qmath.qsum(values) == 3001.002 * si.meters
+    assert qmath.qsum(values).units == si.millimeters
+    assert qmath.qsum(values, si.meters).units == si.meters
+    assert qmath.qsum(iter(values)) == 3001.002 * si.meters
+    assert qmath.qsum([], si.meters) == 0 * si.meters
+
+    array_values = QuantityArray(array.array('d', [1, 2, 3]), si.millimeters)
+    assert qmath.qsum(array_values) == 6 * si.millimeters
+    assert qmath.qsum(array_values, si.meters).units == si.meters
+    assert qmath.qsum(QuantityArray(array.array('d'), si.meters)) == 0 * si.meters
+
+    with pytest.raises(ValueError):
+        qmath.qsum([])
+    with pytest.raises(ValueError):
+        qmath.qsum([1 * si.meters, 1 * si.seconds])
+    with pytest.raises(ValueError):
+        qmath.qsum(array_values, si.seconds)
+    with pytest.raises(TypeError):
+        qmath.qsum([1 * si.meters, 1.0])
+
+def test_qsum_compensated():
+    values = [1e16, 1.0, -1e16]
+    assert qmath.qsum([v * si.meters for v in values], compensated=True) == 1 * si.meters
+    array_values = QuantityArray(array.array('d', values), si.meters)
+    assert qmath.qsum(array_values, compensated=True) == 1 * si.meters
+
+def test_qmean_qmin_qmax():
+    values = [1 * si.meters, 2 * si.millimeters, 3 * si.kilometers]
+    assert qmath.qmean(values, si.meters).get_as(si.meters) == pytest.approx(1000.334)
+    assert qmath.qmin(values) == 2 * si.millimeters
+    assert qmath.qmax(values) == 3 * si.kilometers
+
+    array_values = QuantityArray(array.array('d', [3, 1, 2]), si.meters)
+    assert qmath.qmean(array_values) == 2 * si.meters
+    assert qmath.qmin(array_values) == 1 * si.meters
+    assert qmath.qmax(array_values) == 3 * si.meters
+
+    assert math.isnan(qmath.qmax([1 * si.meters, math.nan * si.meters, 3 * si.meters]).q)
+    assert math.isnan(qmath.qmin(QuantityArray(array.array('d', [1, math.nan, 0]), si.meters)).q)
+
+    for reduce in (qmath.qmean, qmath.qmin, qmath.qmax):
+        with pytest.raises(ValueError):
+            reduce([], si.meters)
+
+def test_qprod():
+    values = [2 * si.meters, 3 * si.millimeters, 4 * si.seconds]
+    assert qmath.qprod(values) == 0.024 * si.meters ** 2 * si.seconds
+    assert qmath.qprod(values, si.millimeters ** 2 * si.seconds).units == si.millimeters ** 2 * si.seconds
+    assert qmath.qprod([]) == 1 * si.unity
+
+    array_values = QuantityArray(array.array('d', [1, 2, 3]), si.meters)
+    assert qmath.qprod(array_values) == 6 * si.meters ** 3
+
+    with pytest.raises(ValueError):
+        qmath.qprod(values, si.meters)
+
+    big = 1 * si.kilometers ** 100
+    with pytest.raises(OverflowError, match="scale"):
+        qmath.qprod([big, big])
+    with pytest.raises(OverflowError, match="dimension"):
+        qmath.qprod([1 * si.meters ** 2e9] * 2)
+
+def test_ipow_overflow():
+    with pytest.raises(OverflowError):
+        qmath.ipow(QuantityArray(array.array('d', [1, 2]), si.meters), 3000000000)
+    with pytest.raises(OverflowError):
+        qmath.ipow(2 * si.meters, 3000000000)
@@ -0,0 +1,126 @@
+import pytest
+import array
+import os
+import threading
+
+from cyquant import si, qmath, Quantity, QuantityArray
+from cyquant import parallel
+
+SIZE = 1001
+
+@pytest.fixture
+def threaded():
+    threads, min_chunk = parallel.get_threads(), parallel.get_min_chunk()
+    parallel.set_threads(4)
+    parallel.set_min_chunk(16)
+    yield
+    parallel.set_threads(threads)
+    parallel.set_min_chunk(min_chunk)
+
+def arrays():
+    x = QuantityArray(array.array('d', [i + 1.5 for i in range(SIZE)]), si.meters)
+    y = QuantityArray(array.array('d', [(i * 37) % 101 + 0.5 for i in range(SIZE)]), si.millimeters)
+    return x, y
+
+def results():
+    x, y = arrays()
+    return [
+        x + y,
+        x - y,
+        x * y,
+        x / y,
+        2 / x,
+        x * 2.5,
+        x / 4,
+        -x,
+        abs(y - x),
+        x ** 2,
+        x.exp(0.5),
+        x < y,
+        x >= 5 * si.meters,
+        x.get_as(si.millimeters),
+        qmath.sin(x / si.meters * si.radians),
+        qmath.atan2(x, y),
+        qmath.sqrt(x),
+        qmath.ipow(y, 3),
+        qmath.qsum(x),
+    ] + list(qmath.sin_cos(y / si.millimeters * si.radians))
+
+def test_thread_config():
+    threads = parallel.get_threads()
+    try:
+        parallel.set_threads(3)
+        assert parallel.get_threads() == 3
+        parallel.set_threads(0)
+        assert parallel.get_threads() == (os.cpu_count() or 1)
+        with pytest.raises(ValueError):
+            parallel.set_threads(-1)
+    finally:
+        parallel.set_threads(threads)
+
+    with pytest.raises(ValueError):
+        parallel.set_min_chunk(0)
+
+def test_threaded_matches_serial(threaded):
+    threads = parallel.get_threads()
+    parallel.set_threads(1)
+    serial = results()
+    parallel.set_threads(threads)
+    for result, expected in zip(results(), serial):
+        if type(expected) is QuantityArray:
+            assert result.units == expected.units
+            assert list(result.q) == list(expected.q)
+        elif type(expected) is Quantity:
+            assert result == expected
+        else:
+            assert list(result) == list(expected)
+
+def test_threaded_inplace(threaded):
+    x, y = arrays()
+    expected = [a + b / 1000 for a, b in zip(x.q, y.q)]
+    x += y
+    assert list(x.q) == expected
+
+    x, y = arrays()
+    x *= x
+    assert list(x.q) == [(i + 1.5) ** 2 for i in range(SIZE)]
+    assert x.units == si.meters ** 2
+
+def test_threaded_overlap(threaded):
+    to_mm = si.meters.converter_to(si.millimeters)
+    for first in (1, 0):
+        values = array.array('d', range(SIZE + 1))
+        view = memoryview(values)
+        source, out = view[first:SIZE + first], view[1 - first:SIZE + 1 - first]
+        si.millimeters.demote_buffer(QuantityArray(source, si.meters), out=out)
+        assert list(out) == [1000.0 * (i + first) for i in range(SIZE)]
+
+        values = array.array('d', range(SIZE + 1))
+        view = memoryview(values)
+        source, out = view[first:SIZE + first], view[1 - first:SIZE + 1 - first]
+        to_mm.convert_buffer(source, out=out)
+        assert list(out) == [1000.0 * (i + first) for i in range(SIZE)]
+
+def test_threaded_ndarray(threaded):
+    np = pytest.importorskip("numpy")
+    x = np.arange(SIZE, dtype=float) * si.meters
+    y = np.arange(SIZE, dtype=float) * si.millimeters
+    total = (x + y).get_as(si.millimeters)
+    assert (total == np.arange(SIZE) * 1000 + np.arange(SIZE)).all()
+
+def test_concurrent_callers(threaded):
+    x, y = arrays()
+    expected = list((x * 2 + y).q)
+    failures = []
+
+    def work():
+        for _ in range(20):
+            if list((x * 2 + y).q) != expected:
+                failures.append(True)
+
+    workers = [threading.Thread(target=work) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert not failures
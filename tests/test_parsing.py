@@ -0,0 +1,72 @@
+import pytest
+
+from cyquant import si, SIUnit, parse_unit
+from cyquant import parsing
+
+def test_parse_names():
+    assert parse_unit("meters") == si.meters
+    assert parse_unit("kilonewtons") == si.kilonewtons
+    assert parse_unit("newton_meters") == si.newton_meters
+    assert parse_unit("millikelvin") == SIUnit.Unit(1e-3, k=1)
+
+def test_parse_symbols():
+    assert parse_unit("m") == si.meters
+    assert parse_unit("mm") == si.millimeters
+    assert parse_unit("kg") == si.kilograms
+    assert parse_unit("µs") == si.microseconds
+    assert parse_unit("us") == si.microseconds
+    assert parse_unit("ms") == si.milliseconds
+    assert parse_unit("min") == si.minutes
+    assert parse_unit("dam") == si.decameters
+    assert parse_unit("Pa") == si.pascals
+    assert parse_unit("MPa") == si.megapascals
+    assert parse_unit("T") == si.teslas
+    assert parse_unit("mL") == si.milliliters
+
+def test_parse_expressions():
+    assert parse_unit("kN*m/s^2") == si.kilonewtons * si.meters / si.seconds ** 2
+    assert parse_unit("mm**3") == si.millimeters ** 3
+    assert parse_unit("m/s/s") == si.meters / si.seconds ** 2
+    assert parse_unit("kg m s^-2") == si.newtons
+    assert parse_unit("kg*m/s**2") == si.newtons
+    assert parse_unit("N·m") == si.newton_meters
+    assert parse_unit("(m/s)^2") == si.meters ** 2 / si.seconds ** 2
+    assert parse_unit("m^(1/2)") == si.meters ** 0.5
+    assert parse_unit("1/s") == si.hertz
+    assert parse_unit("km/h") == si.kilometers / si.hours
+    assert parse_unit(" 1000 * g ") == si.kilograms
+
+def test_parse_errors():
+    for text in ("", "furlongs", "m*", "m^", "(m", "m)", "m/", "0*m", "m$s"):
+        with pytest.raises(ValueError):
+            parse_unit(text)
+
+    with pytest.raises(TypeError):
+        parse_unit(None)
+
+def test_parse_static():
+    assert SIUnit.parse("kN") == si.kilonewtons
+
+    with pytest.raises(TypeError):
+        SIUnit.parse(None)
+
+def test_parse_cache():
+    size = parsing.PARSE_CACHE_SIZE
+    parsing.set_parse_cache_size(2)
+    try:
+        first = parse_unit("kN*m")
+        assert parse_unit("kN*m") is first
+
+        info = parsing.parse_cache_info()
+        assert info.hits == 1
+        assert info.misses == 1
+        assert info.maxsize == 2
+
+        parse_unit("m")
+        parse_unit("s")
+        assert parsing.parse_cache_info().currsize == 2
+
+        with pytest.raises(ValueError):
+            parsing.set_parse_cache_size(-1)
+    finally:
+        parsing.set_parse_cache_size(size)
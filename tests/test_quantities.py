@@ -1,4 +1,5 @@
 import pytest
+import pickle
 import copy
 
 import numpy as np
@@ -785,3 +786,107 @@ def test_q_multiplier():
     c = qdot(a, b)
 
     assert c.get_as(si.meters ** 2) == pytest.approx(1 + 4 + 9)
+
+def test_pickle_quantity():
+    for value in (1.5 * si.meters, 3 * si.kilonewtons, mp.mpf(2.5) * si.millimeters, -0.0 * si.seconds):
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            copied = pickle.loads(pickle.dumps(value, protocol))
+            assert copied == value
+            assert type(copied.q) is type(value.q)
+
+    value = np.arange(4.0) * si.meters
+    copied = pickle.loads(pickle.dumps(value, 5))
+    assert copied.units == si.meters
+    assert np.array_equal(copied.q, value.q)
+
+def test_inplace_add_array():
+    acc = np.zeros(3) * si.meters
+    values = acc.q
+    for _ in range(3):
+        acc += np.ones(3) * si.millimeters
+    acc -= 1 * si.millimeters
+
+    assert acc.q is values
+    assert acc.units == si.meters
+    assert np.allclose(values, 0.002)
+
+    with pytest.raises(ValueError):
+        acc += np.ones(3) * si.seconds
+
+def test_inplace_mul_array():
+    acc = np.ones(3) * si.meters
+    values = acc.q
+    acc *= 2 * si.seconds
+    acc /= 4.0
+    acc /= np.full(3, 0.5) * si.meters
+
+    assert acc.q is values
+    assert acc.units == si.seconds
+    assert np.allclose(values, 1.0)
+
+    with pytest.raises(ZeroDivisionError):
+        acc /= 0
+
+def test_inplace_fallback():
+    x = 1 * si.meters
+    y = x
+    x += 2 * si.millimeters
+    assert x == 1002 * si.millimeters
+    assert y == 1 * si.meters
+
+    x = np.arange(3) * si.meters
+    values = x.q
+    x += 1.5 * si.meters
+    assert list(x.q) == [1.5, 2.5, 3.5]
+    assert list(values) == [0, 1, 2]
+
+    x = mp.mpf(2) * si.meters
+    y = x
+    x *= 3
+    assert x == 6 * si.meters
+    assert y == 2 * si.meters
+
+def test_inplace_shared():
+    x = np.arange(3.0) * si.meters
+    y = x * si.unity
+    y += np.ones(3) * si.meters
+    y /= si.seconds
+    assert list(x.q) == [0, 1, 2]
+    assert list(y.q) == [1, 2, 3]
+
+    z = x / si.seconds
+    z *= 2.0
+    assert list(x.q) == [0, 1, 2]
+    assert list(z.q) == [0, 2, 4]
+
+def test_array_add_sub():
+    x = np.arange(6.0).reshape(2, 3)
+    y = np.ones((2, 3))
+
+    total = x * si.meters + y * si.millimeters
+    assert total.units == si.millimeters
+    assert np.array_equal(total.q, x * 1000 + y)
+
+    diff = y * si.millimeters - x * si.meters
+    assert np.array_equal(diff.q, y - x * 1000)
+
+    assert np.array_equal((2.0 * si.meters - x * si.meters).q, 2.0 - x)
+    assert np.array_equal((x * si.meters - 2.0 * si.millimeters).q, x * 1000 - 2.0)
+
+    strided = np.arange(6.0)[::2]
+    assert np.array_equal((strided * si.meters + strided * si.meters).q, strided * 2)
+
+    readonly = np.ones(3)
+    readonly.flags.writeable = False
+    assert np.array_equal((readonly * si.meters + readonly * si.meters).q, [2, 2, 2])
+
+    ints = np.arange(3)
+    assert np.array_equal((ints * si.meters + ints * si.millimeters).q, ints * 1001)
+
+    fortran = np.asfortranarray(np.arange(6.0).reshape(2, 3))
+    assert np.array_equal((fortran * si.meters + fortran * si.meters).q, fortran * 2)
+    assert np.array_equal((fortran * si.meters - 1.0 * si.meters).q, fortran - 1)
+
+    transposed = np.arange(6.0).reshape(2, 3).T
+    assert np.array_equal((transposed * si.meters + transposed * si.meters).q, transposed * 2)
+    assert np.array_equal((transposed * si.meters - x.T * si.millimeters).q, transposed * 1000 - x.T)
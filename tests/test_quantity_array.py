@@ -0,0 +1,302 @@
+import pytest
+import pickle
+import copy
+import array
+
+import numpy as np
+
+from cyquant import si, Quantity, QuantityArray, dimensions
+
+def test_create_quantity_array():
+    values = array.array('d', [1, 2, 3])
+    x = QuantityArray(values, si.meters)
+
+    assert len(x) == 3
+    assert list(x.quantity) == [1, 2, 3]
+    assert x.units == si.meters
+    assert x.is_of(dimensions.distance_t)
+
+    # double buffers are wrapped, not copied
+    values[0] = 10
+    assert x[0] == 10 * si.meters
+
+    x = QuantityArray([1, 2, 3], si.meters)
+    assert list(x.quantity) == [1, 2, 3]
+
+    x = QuantityArray(np.array([1, 2, 3]), si.meters)
+    assert list(x.quantity) == [1, 2, 3]
+
+    with pytest.raises(TypeError):
+        QuantityArray(None, si.meters)
+
+    with pytest.raises(TypeError):
+        QuantityArray([1, 2, 3], None)
+
+def test_quantity_array_views():
+    values = np.array([1.0, 2.0, 3.0, 4.0])
+    x = QuantityArray(values, si.meters)
+
+    y = x[1:3]
+    assert list(y.quantity) == [2, 3]
+    assert y.units == si.meters
+
+    y[0] = 20 * si.meters
+    assert values[1] == 20
+
+    assert list(x[::-1].quantity) == [4, 3, 20, 1]
+    assert list(x[::2].quantity) == [1, 3]
+    assert len(x[3:1]) == 0
+
+    x[-1] = 1 * si.kilometers
+    assert values[3] == 1000
+
+    x[:2] = QuantityArray([1, 2], si.millimeters)
+    assert list(values) == [0.001, 0.002, 3, 1000]
+
+    x[1:] = x[:-1]
+    assert list(values) == [0.001, 0.001, 0.002, 3]
+
+    with pytest.raises(ValueError):
+        x[0] = 1 * si.seconds
+
+    with pytest.raises(ValueError):
+        x[:2] = x[:3]
+
+    with pytest.raises(IndexError):
+        x[4]
+
+def test_quantity_array_iter():
+    x = QuantityArray([1, 2], si.meters)
+    assert list(x) == [1 * si.meters, 2 * si.meters]
+
+def test_cvt_quantity_array():
+    x = QuantityArray([1, 2, 3], si.meters)
+
+    y = x.cvt_to(si.millimeters)
+    assert list(y.quantity) == [1000, 2000, 3000]
+    assert y.units == si.millimeters
+
+    assert x.cvt_to(si.meters) is x
+
+    assert list(x.get_as(si.kilometers)) == [0.001, 0.002, 0.003]
+
+    with pytest.raises(ValueError):
+        x.cvt_to(si.seconds)
+
+    with pytest.raises(TypeError):
+        x.get_as(None)
+
+def test_add_quantity_array():
+    x = QuantityArray([1, 2, 3], si.meters)
+    y = QuantityArray([1000, 2000, 3000], si.millimeters)
+
+    z = x + y
+    assert list(z.quantity) == [2000, 4000, 6000]
+    assert z.units == si.millimeters
+
+    z = y - x
+    assert list(z.quantity) == [0, 0, 0]
+    assert z.units == si.millimeters
+
+    z = x + 1 * si.kilometers
+    assert list(z.quantity) == [1001, 1002, 1003]
+    assert z.units == si.meters
+
+    z = 1 * si.kilometers - x
+    assert list(z.quantity) == [999, 998, 997]
+    assert z.units == si.meters
+
+    with pytest.raises(ValueError):
+        x + QuantityArray([1, 2, 3], si.seconds)
+
+    with pytest.raises(ValueError):
+        x + QuantityArray([1, 2], si.meters)
+
+    with pytest.raises(TypeError):
+        x + 1
+
+    with pytest.raises(TypeError):
+        1 - x
+
+def test_mul_quantity_array():
+    x = QuantityArray([1, 2, 3], si.meters)
+    y = QuantityArray([2, 2, 2], si.seconds)
+
+    z = x * y
+    assert list(z.quantity) == [2, 4, 6]
+    assert z.units == si.meters * si.seconds
+
+    z = 2 * x
+    assert list(z.quantity) == [2, 4, 6]
+    assert z.units == si.meters
+
+    z = (2 * si.newtons) * x
+    assert list(z.quantity) == [2, 4, 6]
+    assert z.units == si.joules
+
+    z = si.newtons * x
+    assert list(z.quantity) == [1, 2, 3]
+    assert z.units == si.joules
+
+    #results never share memory with the operands
+    z[0] = 5 * si.joules
+    assert list(x.quantity) == [1, 2, 3]
+
+def test_div_quantity_array():
+    x = QuantityArray([2, 4, 6], si.meters)
+    y = QuantityArray([2, 2, 2], si.seconds)
+
+    z = x / y
+    assert list(z.quantity) == [1, 2, 3]
+    assert z.units == si.meters_per_second
+
+    z = x / 2
+    assert list(z.quantity) == [1, 2, 3]
+
+    z = 12 / x
+    assert list(z.quantity) == [6, 3, 2]
+    assert z.units == ~si.meters
+
+    z = (12 * si.seconds) / x
+    assert list(z.quantity) == [6, 3, 2]
+    assert z.units == si.seconds / si.meters
+
+    z = x / si.seconds
+    assert list(z.quantity) == [2, 4, 6]
+    assert z.units == si.meters_per_second
+
+    z[0] = 5 * si.meters_per_second
+    assert list(x.quantity) == [2, 4, 6]
+
+    with pytest.raises(ZeroDivisionError):
+        x / 0
+
+    with pytest.raises(ZeroDivisionError):
+        x / (0 * si.seconds)
+
+def test_pow_quantity_array():
+    x = QuantityArray([1, 2, 3], si.millimeters)
+
+    z = x ** 2
+    assert list(z.quantity) == [1, 4, 9]
+    assert z.units == si.millimeters ** 2
+
+    assert list((-x).quantity) == [-1, -2, -3]
+    assert list(abs(-x).quantity) == [1, 2, 3]
+
+def test_cmp_quantity_array():
+    x = QuantityArray([1, 2, 3], si.meters)
+    y = QuantityArray([1000, 2500, 2500], si.millimeters)
+
+    assert list(x == y) == [1, 0, 0]
+    assert list(x != y) == [0, 1, 1]
+    assert list(x < y) == [0, 1, 0]
+    assert list(x <= y) == [1, 1, 0]
+    assert list(x > y) == [0, 0, 1]
+    assert list(x >= y) == [1, 0, 1]
+
+    assert list(x < 2 * si.meters) == [1, 0, 0]
+    assert list(2 * si.meters < x) == [0, 0, 1]
+
+    assert list(x == QuantityArray([1, 2, 3], si.seconds)) == [0, 0, 0]
+
+    with pytest.raises(ValueError):
+        x < QuantityArray([1, 2, 3], si.seconds)
+
+    with pytest.raises(TypeError):
+        x < 1
+
+    with pytest.raises(TypeError):
+        hash(x)
+
+def test_copy_quantity_array():
+    values = array.array('d', [1, 2])
+    x = QuantityArray(values, si.meters)
+
+    y = copy.copy(x)
+    values[0] = 10
+    assert list(y.quantity) == [1, 2]
+    assert y.units == si.meters
+
+    y = copy.deepcopy(x)
+    assert list(y.quantity) == [10, 2]
+
+def test_pickle():
+    x = QuantityArray(array.array('d', [1, 2, 3, 4]), si.millimeters)
+    for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+        copied = pickle.loads(pickle.dumps(x, protocol))
+        assert copied.units == si.millimeters
+        assert list(copied.q) == [1, 2, 3, 4]
+
+    strided = pickle.loads(pickle.dumps(x[::2], 5))
+    assert list(strided.q) == [1, 3]
+
+def test_pickle_out_of_band():
+    x = QuantityArray(array.array('d', [1, 2, 3, 4]), si.millimeters)
+    buffers = []
+    data = pickle.dumps(x, 5, buffer_callback=buffers.append)
+    assert len(buffers) == 1
+
+    copied = pickle.loads(data, buffers=[bytearray(buffer) for buffer in buffers])
+    assert list(copied.q) == [1, 2, 3, 4]
+    copied.q[0] = 5
+    assert list(copied.q) == [5, 2, 3, 4]
+
+    readonly = pickle.loads(data, buffers=[bytes(buffer) for buffer in buffers])
+    assert list(readonly.q) == [1, 2, 3, 4]
+
+def test_inplace_add():
+    x = QuantityArray(array.array('d', [1, 2, 3]), si.meters)
+    x += QuantityArray(array.array('d', [1, 2, 3]), si.millimeters)
+    x -= 1 * si.millimeters
+    assert x.units == si.meters
+    assert list(x.q) == pytest.approx([1.0, 2.001, 3.002])
+
+    with pytest.raises(ValueError):
+        x += 1 * si.seconds
+
+def test_inplace_mul():
+    x = QuantityArray(array.array('d', [1, 2, 3]), si.meters)
+    x *= x
+    assert x.units == si.meters ** 2
+    assert list(x.q) == [1, 4, 9]
+
+    x /= 2 * si.meters
+    x *= si.seconds
+    assert x.units == si.meters * si.seconds
+    assert list(x.q) == [0.5, 2, 4.5]
+
+    with pytest.raises(ZeroDivisionError):
+        x /= 0
+
+def test_inplace_shared():
+    x = QuantityArray([1.0, 2.0], si.meters)
+    y = x * si.meters
+    y *= 2.0
+    z = x / si.seconds
+    z += QuantityArray([1.0, 1.0], si.meters_per_second)
+    assert list(x.q) == [1, 2]
+    assert list(y.q) == [2, 4]
+    assert list(z.q) == [2, 3]
+
+def test_inplace_overlap():
+    values = array.array('d', [1, 2, 3, 4, 5])
+    view = memoryview(values)
+    x = QuantityArray(view[1:], si.meters)
+    x += QuantityArray(view[:-1], si.meters)
+    assert list(values) == [1, 3, 5, 7, 9]
+
+def test_dimension_overflow():
+    x = QuantityArray(array.array('d', [1, 2]), si.meters ** 2e9)
+    with pytest.raises(OverflowError):
+        x * x
+    with pytest.raises(OverflowError):
+        x * (2 * si.meters ** 2e9)
+    with pytest.raises(OverflowError):
+        x * si.meters ** 2e9
+    with pytest.raises(OverflowError):
+        x / si.meters ** -2e9
+    with pytest.raises(OverflowError):
+        (2 * si.meters ** -2e9) / x
+    with pytest.raises(OverflowError):
+        np.ones(2) * si.meters ** 2e9 * (2 * si.meters ** 2e9)
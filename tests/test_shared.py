@@ -0,0 +1,122 @@
+import pytest
+import array
+import gc
+import sys
+import time
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from cyquant import si, qmath, QuantityArray
+from cyquant import shared
+
+@pytest.fixture(scope="module")
+def executor():
+    with ProcessPoolExecutor(2) as executor:
+        yield executor
+
+def squared(x):
+    return x * x
+
+def to_millimeters(x):
+    #units depend on the chunk, so the results need converting
+    if x.q[0] == 0:
+        return x.cvt_to(si.millimeters)
+    return x
+
+def truncated(x):
+    return x[1:]
+
+def failing(x):
+    y = x * 2
+    raise RuntimeError("failed chunk")
+
+STARTED = []
+FINISHED = []
+
+def slow_unless_first(x):
+    if x.q[0] == 0:
+        raise RuntimeError("failed chunk")
+    STARTED.append(x.q[0])
+    time.sleep(0.05)
+    FINISHED.append(x.q[0])
+    return x
+
+def test_chunk_size():
+    assert shared.chunk_size(10, 4) == shared.MIN_CHUNK_SIZE
+    assert shared.chunk_size(10, 4, min_size=1) == 8
+    assert shared.chunk_size(1000000, 4) == 62504
+    assert shared.chunk_size(1000000, 4) % 8 == 0
+    assert shared.chunk_size(0, 1) > 0
+    with pytest.raises(ValueError):
+        shared.chunk_size(10, 0)
+
+def test_map_chunks(executor):
+    x = QuantityArray(array.array('d', range(1000)), si.meters)
+    y = shared.map_chunks(squared, x, executor, chunksize=64)
+    assert y.units == si.meters ** 2
+    assert list(y.q) == [float(i * i) for i in range(1000)]
+
+def test_map_chunks_units(executor):
+    x = QuantityArray(array.array('d', range(100)), si.meters)
+    y = shared.map_chunks(to_millimeters, x, executor, chunksize=10)
+    assert y.units == si.millimeters
+    assert list(y.q) == [1000.0 * i for i in range(100)]
+
+    y = shared.map_chunks(qmath.sqrt, x, executor, chunksize=10)
+    assert y.units == si.meters ** 0.5
+    assert list(y.q) == [i ** 0.5 for i in range(100)]
+
+def test_map_chunks_ndarray(executor):
+    np = pytest.importorskip("numpy")
+    x = np.linspace(0, 1, 101) * si.seconds
+    y = shared.map_chunks(squared, x, executor, chunksize=16)
+    assert y.units == si.seconds ** 2
+    assert list(y.q) == list(np.linspace(0, 1, 101) ** 2)
+
+def test_map_chunks_errors(executor):
+    x = QuantityArray(array.array('d', range(100)), si.meters)
+    with pytest.raises(ValueError):
+        shared.map_chunks(truncated, x, executor, chunksize=10)
+    with pytest.raises(ValueError):
+        shared.map_chunks(squared, x, executor, chunksize=0)
+    with pytest.raises(TypeError):
+        shared.map_chunks(squared, 1 * si.meters, executor)
+
+def test_map_chunks_empty():
+    x = QuantityArray(array.array('d'), si.meters)
+    y = shared.map_chunks(squared, x)
+    assert len(y) == 0
+    assert y.units == si.meters ** 2
+
+def test_map_chunks_threads():
+    x = QuantityArray(array.array('d', range(100)), si.meters)
+    with ThreadPoolExecutor(2) as executor:
+        y = shared.map_chunks(squared, x, executor, chunksize=30)
+    assert list(y.q) == [float(i * i) for i in range(100)]
+
+def test_map_chunks_own_executor():
+    x = QuantityArray(array.array('d', range(100)), si.meters)
+    y = shared.map_chunks(squared, x, workers=2, chunksize=50)
+    assert list(y.q) == [float(i * i) for i in range(100)]
+
+def test_map_chunks_failure_releases_segments(monkeypatch):
+    #threads, so that a failed close surfaces in this process
+    unraisable = []
+    monkeypatch.setattr(sys, "unraisablehook", unraisable.append)
+    x = QuantityArray(array.array('d', range(100)), si.meters)
+    with ThreadPoolExecutor(2) as executor:
+        with pytest.raises(RuntimeError):
+            shared.map_chunks(failing, x, executor, chunksize=10)
+    gc.collect()
+    assert not unraisable
+
+def test_map_chunks_failure_waits():
+    x = QuantityArray(array.array('d', range(100)), si.meters)
+    del STARTED[:], FINISHED[:]
+    with ThreadPoolExecutor(2) as executor:
+        with pytest.raises(RuntimeError):
+            shared.map_chunks(slow_unless_first, x, executor, chunksize=10)
+        #chunks still running when the error came in have finished, the
+        #others were cancelled
+        assert sorted(STARTED) == sorted(FINISHED)
+        assert len(STARTED) < 9
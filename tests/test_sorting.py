@@ -0,0 +1,152 @@
+import pytest
+import array
+import math
+import random
+
+from cyquant import si, QuantityArray
+from cyquant import sorting
+from cyquant.sorting import SortedQuantities
+
+def test_sort_key():
+    values = [3 * si.meters, 20 * si.millimeters, 1 * si.kilometers, 50 * si.centimeters]
+    ordered = sorted(values, key=sorting.sort_key(si.meters))
+    assert ordered == sorted(values)
+
+    key = sorting.sort_key()
+    assert key.dimensions is None
+    assert key(2 * si.kilometers) == 2000
+    assert key.dimensions == si.meters.dimensions
+
+    with pytest.raises(ValueError):
+        key(1 * si.seconds)
+    with pytest.raises(TypeError):
+        key(1.0)
+    with pytest.raises(TypeError):
+        sorting.sort_key(1.0)
+
+def test_bisect_list():
+    values = [1 * si.millimeters, 1 * si.meters, 1 * si.meters, 2 * si.kilometers]
+    assert sorting.bisect_left(values, 1000 * si.millimeters) == 1
+    assert sorting.bisect_right(values, 1000 * si.millimeters) == 3
+    assert sorting.bisect_left(values, 0 * si.meters) == 0
+    assert sorting.bisect_right(values, 3 * si.kilometers) == 4
+    assert sorting.bisect_left(values, 1 * si.meters, 2) == 2
+    assert sorting.bisect_right(values, 5 * si.kilometers, 0, 2) == 2
+
+    with pytest.raises(ValueError):
+        sorting.bisect_left(values, 1 * si.seconds)
+
+def test_bisect_array():
+    values = QuantityArray(array.array('d', [1, 2, 2, 3]), si.meters)
+    assert sorting.bisect_left(values, 2000 * si.millimeters) == 1
+    assert sorting.bisect_right(values, 2000 * si.millimeters) == 3
+
+    with pytest.raises(ValueError):
+        sorting.bisect_left(values, 1 * si.seconds)
+
+def test_sorted_quantities():
+    values = [random.uniform(-10, 10) * si.meters for _ in range(100)]
+    values += [random.uniform(-10000, 10000) * si.millimeters for _ in range(100)]
+    table = SortedQuantities(values[:50])
+    table.update(values[50:150])
+    for value in values[150:]:
+        table.add(value)
+
+    assert len(table) == 200
+    assert list(table) == sorted(values)
+    assert table.dimensions == si.meters.dimensions
+
+    inside = table.irange(-1 * si.meters, 2000 * si.millimeters)
+    assert inside == [v for v in sorted(values) if -1 * si.meters <= v <= 2 * si.meters]
+    assert table.irange(maximum=0 * si.meters, inclusive=(True, False)) == [v for v in sorted(values) if v < 0 * si.meters]
+    assert table.irange(minimum=20 * si.meters) == []
+
+    assert values[0] in table
+    assert 1 * si.seconds not in table
+    table.remove(values[0])
+    assert len(table) == 199
+    with pytest.raises(ValueError):
+        table.remove(100 * si.meters)
+    table.discard(100 * si.meters)
+
+    assert sorting.bisect_left(table, table[10]) == table.bisect_left(table[10])
+
+    with pytest.raises(ValueError):
+        table.add(1 * si.seconds)
+
+    table.clear()
+    assert len(table) == 0
+    assert table.irange() == []
+
+def test_sorted_quantities_ties():
+    table = SortedQuantities([1 * si.meters])
+    table.add(1000 * si.millimeters)
+    table.update([100 * si.centimeters, 2 * si.meters])
+    assert [v.units for v in table] == [si.meters, si.millimeters, si.centimeters, si.meters]
+    assert table.bisect_left(1 * si.meters) == 0
+    assert table.bisect_right(1 * si.meters) == 3
+
+def test_sorted_quantities_binding():
+    table = SortedQuantities()
+    assert (1 * si.seconds) not in table
+    assert table.bisect_left(1 * si.seconds) == 0
+    assert table.irange(1 * si.seconds) == []
+    table.discard(1 * si.seconds)
+    assert table.dimensions is None
+
+    with pytest.raises(ValueError):
+        table.update([1 * si.seconds, 1 * si.meters])
+    assert table.dimensions is None
+    assert len(table) == 0
+
+    table.add(1 * si.meters)
+    assert table.dimensions == si.meters.dimensions
+    with pytest.raises(ValueError):
+        table.update([2 * si.meters, 1 * si.seconds])
+    assert list(table) == [1 * si.meters]
+
+def test_approx_index_within():
+    index = sorting.ApproxIndex(1 * si.millimeters, 0.5 * si.seconds)
+    assert index.tolerance(si.meters.dimensions) == 1 * si.millimeters
+    assert index.tolerance(si.kilograms.dimensions) is None
+
+    index.add(1 * si.meters, "a")
+    index.add(1000.5 * si.millimeters, "b")
+    index.add(1.0025 * si.meters, "c")
+    index.add(10 * si.seconds, "d")
+    index.update([-3 * si.meters])
+    assert len(index) == 5
+
+    assert sorted(index.within(1 * si.meters)) == ["a", "b"]
+    assert sorted(index.within(1000.9 * si.millimeters)) == ["a", "b"]
+    assert sorted(index.within(1 * si.meters, 5 * si.millimeters)) == ["a", "b", "c"]
+    assert index.within(1 * si.meters, 0 * si.meters) == ["a"]
+    assert index.within(10.2 * si.seconds) == ["d"]
+    assert len(index.within(0 * si.meters, 1 * si.kilometers)) == 4
+    assert len(index.within(0 * si.meters, math.inf * si.meters)) == 4
+    assert index.within(-3 * si.meters) == [-3 * si.meters]
+    assert index.within(1 * si.kilograms) == []
+    assert index.within(math.nan * si.meters) == []
+
+    with pytest.raises(ValueError):
+        index.within(1 * si.meters, 1 * si.seconds)
+    with pytest.raises(ValueError):
+        index.add(1 * si.kilograms)
+    with pytest.raises(ValueError):
+        index.add(math.inf * si.meters)
+    with pytest.raises(ValueError):
+        sorting.ApproxIndex(0 * si.meters)
+
+def test_approx_index_nearest():
+    index = sorting.ApproxIndex(1 * si.millimeters)
+    assert index.nearest(1 * si.meters) is None
+
+    values = [random.uniform(-1, 1) * si.meters for _ in range(500)]
+    values.append(100 * si.meters)
+    index.update(values)
+
+    for target in [random.uniform(-2, 2) * si.meters for _ in range(100)] + [50 * si.meters, 1 * si.kilometers]:
+        expected = min(values, key=lambda v: abs((v - target).get_as(si.meters)))
+        assert index.nearest(target) == expected
+
+    assert index.nearest(1 * si.seconds) is None
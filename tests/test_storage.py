@@ -0,0 +1,76 @@
+import pytest
+import array
+import io
+
+import numpy as np
+
+from cyquant import si, SIUnit, QuantityArray
+from cyquant import storage
+
+def test_save_load(tmp_path):
+    path = tmp_path / "values.cyq"
+    x = QuantityArray(array.array('d', [1, 2, 3]), si.millimeters)
+    storage.save(path, x)
+
+    with open(path, "rb") as f:
+        assert f.read(len(storage.MAGIC)) == storage.MAGIC
+    assert path.stat().st_size % storage.ALIGNMENT == 3 * 8 % storage.ALIGNMENT
+
+    loaded = storage.load(path)
+    assert loaded.units == si.millimeters
+    assert loaded.units.scale == si.millimeters.scale
+    assert list(loaded.q) == [1, 2, 3]
+
+def test_save_load_units(tmp_path):
+    path = tmp_path / "values.cyq"
+    units = SIUnit.Unit(0.3048, kg=1, m=1/3, s=-2)
+    storage.save(path, np.linspace(0, 1, 5) * units)
+
+    loaded = storage.load(path)
+    assert loaded.units == units
+    assert list(loaded.q) == list(np.linspace(0, 1, 5))
+
+def test_save_load_file_object():
+    f = io.BytesIO()
+    storage.save(f, np.arange(4, dtype=np.int32) * si.seconds)
+    f.seek(0)
+    loaded = storage.load(f)
+    assert loaded.units == si.seconds
+    assert list(loaded.q) == [0, 1, 2, 3]
+
+    with pytest.raises(ValueError):
+        storage.load(io.BytesIO(f.getvalue()), mmap=True)
+
+def test_load_mmap(tmp_path):
+    path = tmp_path / "values.cyq"
+    storage.save(path, np.arange(1000.0) * si.meters)
+
+    loaded = storage.load(path, mmap=True)
+    assert loaded.units == si.meters
+    assert loaded[10] == 10 * si.meters
+    assert (loaded[500:502] * 2).q[1] == 1002
+
+    loaded.q[0] = 5
+    assert storage.load(path).q[0] == 0
+
+    storage.save(path, QuantityArray(array.array('d'), si.meters))
+    assert len(storage.load(path, mmap=True).q) == 0
+
+def test_save_load_errors(tmp_path):
+    path = tmp_path / "values.cyq"
+
+    with pytest.raises(TypeError):
+        storage.save(path, 1.5 * si.meters)
+    with pytest.raises(ValueError):
+        storage.save(path, np.ones((2, 2)) * si.meters)
+
+    path.write_bytes(b"not an array file")
+    with pytest.raises(ValueError):
+        storage.load(path)
+
+    storage.save(path, np.arange(4.0) * si.meters)
+    path.write_bytes(path.read_bytes()[:-8])
+    with pytest.raises(ValueError):
+        storage.load(path)
+    with pytest.raises(ValueError):
+        storage.load(path, mmap=True)
@@ -0,0 +1,157 @@
+import pytest
+
+import numpy as np
+
+from cyquant import si, QuantityArray
+
+def test_ufunc_same_units():
+    x = si.meters.promote(np.array([1.0, 2.0, 3.0]))
+    y = si.millimeters.promote(np.array([500.0, 2500.0, 3000.0]))
+
+    z = np.add(x, y)
+    assert z.units == si.millimeters
+    assert np.all(z.quantity == np.array([1500, 4500, 6000]))
+
+    z = np.maximum(x, y)
+    assert z.units == si.millimeters
+    assert np.all(z.quantity == np.array([1000, 2500, 3000]))
+
+    z = np.negative(x)
+    assert z.units == si.meters
+    assert np.all(z.quantity == np.array([-1, -2, -3]))
+
+    assert np.all(np.less(x, y) == np.array([False, True, False]))
+    assert np.all(np.equal(x, y) == np.array([False, False, True]))
+
+    with pytest.raises(ValueError):
+        np.add(x, 1 * si.seconds)
+
+    with pytest.raises(ValueError):
+        np.less(x, 1)
+
+def test_ufunc_mul_div_pow():
+    x = si.meters.promote(np.array([1.0, 4.0, 9.0]))
+    t = si.seconds.promote(np.array([1.0, 2.0, 3.0]))
+
+    z = np.multiply(x, t)
+    assert z.units == si.meters * si.seconds
+    assert np.all(z.quantity == np.array([1, 8, 27]))
+
+    z = np.divide(x, t)
+    assert z.units == si.meters_per_second
+    assert np.all(z.quantity == np.array([1, 2, 3]))
+
+    z = np.sqrt(x)
+    assert z.units == si.meters ** 0.5
+    assert np.all(z.quantity == np.array([1, 2, 3]))
+
+    z = np.square(t)
+    assert z.units == si.seconds ** 2
+
+    z = np.power(x, 2)
+    assert z.units == si.meters ** 2
+    assert np.all(z.quantity == np.array([1, 16, 81]))
+
+    with pytest.raises(ValueError):
+        np.power(x, np.array([1, 2, 3]))
+
+    z = np.array([1.0, 2.0]) * si.meters
+    assert z.units == si.meters
+    assert np.all(z.quantity == np.array([1, 2]))
+
+    z = np.floor_divide(7 * si.kilometers, si.meters.promote(np.array([2.0, 3000.0])))
+    assert z.units == si.unity
+    assert np.all(z.quantity == np.array([3500, 2]))
+
+    with pytest.raises(ValueError):
+        np.floor_divide(x, t)
+
+def test_ufunc_dimensionless():
+    angles = si.degrees.promote(np.array([0.0, 90.0]))
+    z = np.sin(angles)
+    assert z.units == si.unity
+    assert z.quantity == pytest.approx([0, 1])
+
+    with pytest.raises(ValueError):
+        np.exp(si.meters.promote(np.array([1.0])))
+
+    assert np.all(np.isnan(si.meters.promote(np.array([np.nan, 1.0]))) == [True, False])
+
+def test_ufunc_out():
+    x = si.meters.promote(np.array([1.0, 2.0]))
+    buffer = x.quantity
+
+    z = np.multiply(x, x, out=x)
+    assert z is x
+    assert x.quantity is buffer
+    assert x.units == si.meters ** 2
+    assert np.all(buffer == np.array([1, 4]))
+
+def test_ufunc_reduce():
+    x = si.millimeters.promote(np.array([1.0, 2.0, 3.0]))
+
+    z = np.add.reduce(x)
+    assert z == 6 * si.millimeters
+
+    z = np.maximum.accumulate(x)
+    assert np.all(z.quantity == np.array([1, 2, 3]))
+    assert z.units == si.millimeters
+
+def test_array_function():
+    x = si.meters.promote(np.array([1.0, 2.0, 3.0]))
+    y = si.millimeters.promote(np.array([4000.0]))
+
+    assert np.sum(x) == 6 * si.meters
+    assert np.mean(x) == 2 * si.meters
+    assert np.max(x) == 3 * si.meters
+    assert np.var(x).units == si.meters ** 2
+    assert np.argmax(x) == 2
+    assert np.dot(x, x).units == si.meters ** 2
+
+    z = np.concatenate([x, y])
+    assert z.units == si.millimeters
+    assert np.all(z.quantity == np.array([1000, 2000, 3000, 4000]))
+
+    z = np.clip(x, 1500 * si.millimeters, 2.5 * si.meters)
+    assert z.units == si.millimeters
+    assert np.all(z.quantity == np.array([1500, 2000, 2500]))
+
+    assert np.allclose(x, si.millimeters.promote(np.array([1000.0, 2000.0, 3000.0])))
+
+    values, counts = np.unique(np.array([1.0, 2.0, 2.0]) * si.meters, return_counts=True)
+    assert values.units == si.meters
+    assert np.all(values.quantity == np.array([1.0, 2.0]))
+    assert type(counts) is np.ndarray
+    assert np.all(counts == np.array([1, 2]))
+
+    with pytest.raises(ValueError):
+        np.concatenate([x, 1 * si.seconds])
+
+    with pytest.raises(TypeError):
+        np.fft.fft(x)
+
+def test_quantity_array_ufuncs():
+    x = QuantityArray([1, 4, 9], si.meters)
+
+    z = np.sqrt(x)
+    assert type(z) is QuantityArray
+    assert list(z.quantity) == [1, 2, 3]
+    assert z.units == si.meters ** 0.5
+
+    assert np.sum(x) == 14 * si.meters
+
+    z = np.add(x, x, out=x)
+    assert z is x
+    assert list(x.quantity) == [2, 8, 18]
+
+def test_ufunc_overflow():
+    x = np.array([1.0, 2.0]) * si.meters
+    big = np.ones(2) * si.meters ** 2e9
+    with pytest.raises(OverflowError):
+        np.power(x, 1e10)
+    with pytest.raises(OverflowError):
+        np.square(big)
+    with pytest.raises(OverflowError):
+        np.multiply(big, big)
+    with pytest.raises(OverflowError):
+        np.divide(big, np.ones(2) / si.meters ** 2e9)
@@ -1,6 +1,10 @@
 import pytest
+import pickle
+import array
 
-from cyquant import si, SIUnit
+import numpy as np
+
+from cyquant import si, SIUnit, QuantityArray, UnitConverter
 
 def test_create_units():
     x = SIUnit.Unit(m=1)
@@ -28,6 +32,28 @@ def test_hash_units():
     assert h1 != h4
     assert h2 != h4
 
+def test_hash_units_signed_zero():
+    assert hash(SIUnit.Unit(m=0.0)) == hash(SIUnit.Unit(m=-0.0))
+
+def test_intern_units():
+    assert not SIUnit.GetInterning()
+    assert (si.meters * si.meters) is not (si.meters * si.meters)
+
+    SIUnit.SetInterning(True)
+    try:
+        assert SIUnit.GetInterning()
+        area = si.meters * si.meters
+        assert area is si.meters ** 2
+        assert area is SIUnit.Unit(m=2)
+        assert area.dimensions is (si.meters ** 2).dimensions
+        assert (~si.seconds) is (si.unity / si.seconds)
+        assert si.meters.intern() is SIUnit.Unit(m=1)
+        assert hash(area) == hash(SIUnit(1, area.dimensions))
+    finally:
+        SIUnit.SetInterning(False)
+
+    assert (si.meters * si.meters) is not (si.meters * si.meters)
+
 def test_cmp_units():
 
     assert si.meters == si.meters
@@ -148,4 +174,182 @@ def test_invert_units():
 
 def test_compatible_units():
     assert si.meters.compatible(si.millimeters)
-    assert not si.meters.compatible(si.kilograms)
\ No newline at end of file
+    assert not si.meters.compatible(si.kilograms)
+
+def test_promote_buffer():
+    values = array.array('d', [1, 2, 3])
+
+    x = si.millimeters.promote_buffer(values)
+    assert type(x) is QuantityArray
+    assert x.units == si.millimeters
+    assert list(x.quantity) == [1, 2, 3]
+
+    values[0] = 10
+    assert x[0] == 10 * si.millimeters
+
+    x = si.millimeters.promote_buffer(memoryview(values))
+    values[0] = 20
+    assert x[0] == 20 * si.millimeters
+
+    x = si.millimeters.promote_buffer(array.array('i', [1, 2]))
+    assert list(x.quantity) == [1, 2]
+
+    with pytest.raises(TypeError):
+        si.millimeters.promote_buffer(None)
+
+def test_demote_buffer():
+    x = si.millimeters.promote_buffer(array.array('d', [1000, 2000]))
+
+    values = si.meters.demote_buffer(x)
+    assert type(values) is array.array
+    assert list(values) == [1, 2]
+
+    out = np.zeros(2)
+    assert si.meters.demote_buffer(x, out) is out
+    assert np.all(out == np.array([1, 2]))
+
+    x = si.millimeters.promote(np.array([1000.0, 2000.0]))
+    assert list(si.meters.demote_buffer(x)) == [1, 2]
+
+    with pytest.raises(ValueError):
+        si.seconds.demote_buffer(x)
+
+    with pytest.raises(ValueError):
+        si.meters.demote_buffer(x, np.zeros(3))
+
+    with pytest.raises(TypeError):
+        si.meters.demote_buffer(1 * si.meters)
+
+def test_rational_units():
+    assert (si.meters ** (1 / 3)) ** 3 == si.meters
+    assert hash((si.meters ** 0.5) ** 2) == hash(si.meters)
+    assert (si.meters ** 0.5).m == 0.5
+
+    with pytest.raises(OverflowError):
+        si.meters ** 1e12
+
+    #no nearby ratio, instead of silently rounding to dimensionless
+    with pytest.raises(OverflowError):
+        si.meters ** 1e-9
+    with pytest.raises(OverflowError):
+        si.meters ** (1 / 65537)
+
+def test_factor_to():
+    assert si.meters.factor_to(si.millimeters) == pytest.approx(1000)
+    assert si.millimeters.factor_to(si.meters) == pytest.approx(0.001)
+    assert si.meters.factor_to(si.meters) == 1
+
+    with pytest.raises(ValueError):
+        si.meters.factor_to(si.seconds)
+
+    with pytest.raises(TypeError):
+        si.meters.factor_to(None)
+
+def test_factor_cache():
+    assert SIUnit.GetFactorCache()["size"] == 0
+
+    SIUnit.SetFactorCache(8)
+    try:
+        info = SIUnit.GetFactorCache()
+        assert info["size"] == 8
+        assert info["policy"] == "lru"
+        assert info["hits"] == info["misses"] == info["used"] == 0
+
+        x = 5 * si.meters
+        assert x.get_as(si.millimeters) == pytest.approx(5000)
+        assert x.get_as(si.millimeters) == pytest.approx(5000)
+        assert si.meters.demote(x) == 5
+
+        info = SIUnit.GetFactorCache()
+        assert info["hits"] == 1
+        assert info["misses"] == 2
+        assert info["used"] == 2
+
+        with pytest.raises(ValueError):
+            x.get_as(si.seconds)
+        assert SIUnit.GetFactorCache()["used"] == 2
+
+        for scale in range(1, 100):
+            SIUnit.Unit(scale, m=1).factor_to(si.meters)
+        assert SIUnit.GetFactorCache()["used"] <= 8
+        assert x.get_as(si.millimeters) == pytest.approx(5000)
+
+        SIUnit.ClearFactorCache()
+        info = SIUnit.GetFactorCache()
+        assert info["hits"] == info["misses"] == info["used"] == 0
+
+        SIUnit.SetFactorCache(3, policy="fifo")
+        assert SIUnit.GetFactorCache()["size"] == 4
+        assert SIUnit.GetFactorCache()["policy"] == "fifo"
+
+        with pytest.raises(ValueError):
+            SIUnit.SetFactorCache(8, policy="random")
+        with pytest.raises(ValueError):
+            SIUnit.SetFactorCache(-1)
+    finally:
+        SIUnit.SetFactorCache(0)
+
+def test_converter_to():
+    to_mm = si.meters.converter_to(si.millimeters)
+
+    assert type(to_mm) is UnitConverter
+    assert to_mm.source == si.meters
+    assert to_mm.target == si.millimeters
+    assert to_mm.factor == pytest.approx(1000)
+
+    assert to_mm(2) == pytest.approx(2000)
+    assert to_mm(2.5) == pytest.approx(2500)
+    assert to_mm(2 * si.meters) == pytest.approx(2000)
+    assert to_mm(2 * si.kilometers) == pytest.approx(2e6)
+    assert list(map(to_mm, [1, 2])) == pytest.approx([1000, 2000])
+    assert sorted([3 * si.meters, 1 * si.kilometers], key=to_mm)[0] == 3 * si.meters
+
+    assert list(to_mm([1, 2])) == pytest.approx([1000, 2000])
+    assert list(to_mm(si.kilometers.promote_buffer(array.array('d', [1, 2])))) == pytest.approx([1e6, 2e6])
+
+    out = array.array('d', [0, 0])
+    assert to_mm.convert_buffer([1, 2], out=out) is out
+    assert list(out) == pytest.approx([1000, 2000])
+
+    with pytest.raises(ValueError):
+        to_mm.convert_buffer([1, 2, 3], out=out)
+
+    with pytest.raises(ValueError):
+        to_mm(2 * si.seconds)
+
+    with pytest.raises(ValueError):
+        si.meters.converter_to(si.seconds)
+
+    with pytest.raises(TypeError):
+        si.meters.converter_to(None)
+
+    with pytest.raises(TypeError):
+        to_mm(None)
+
+def test_pickle_unit():
+    custom = SIUnit.Unit(3.5, kg=1, m=0.5)
+    for unit in (si.meters, si.kilonewtons, si.unity, custom, custom ** 300):
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            copied = pickle.loads(pickle.dumps(unit, protocol))
+            assert copied == unit
+            assert copied.scale == unit.scale
+
+    assert pickle.loads(pickle.dumps(si.meters)) is si.meters
+
+    converter = si.meters.converter_to(si.millimeters)
+    copied = pickle.loads(pickle.dumps(converter))
+    assert copied.source == si.meters
+    assert copied.target == si.millimeters
+    assert copied(1.5) == converter(1.5)
+
+def test_pickle_unit_errors():
+    from cyquant.quantities import _load_unit
+
+    with pytest.raises(ValueError):
+        _load_unit(0, "meters")
+    with pytest.raises(ValueError):
+        _load_unit(1, "not_a_unit")
+    with pytest.raises(ValueError):
+        _load_unit(1, b"\x00" * 8)
+    with pytest.raises(ValueError):
+        _load_unit(1, b"\x00" * 12)
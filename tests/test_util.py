@@ -1,8 +1,9 @@
 import pytest
 
 import math
+import array
 
-from cyquant import si, converter
+from cyquant import si, converter, QuantityArray
 from cyquant import util
 
 def test_converter_strict():
@@ -66,3 +67,92 @@ def test_converter_promiscuous():
     with pytest.raises(TypeError):
         cvtr = converter(object(), promotes=True)
 
+
+def test_are_of():
+    lengths = [1 * si.meters, 2 * si.millimeters, si.kilometers]
+    assert util.are_of(si.meters.dimensions, lengths)
+    assert util.are_of(si.meters.dimensions, iter(lengths))
+    assert not util.are_of(si.meters.dimensions, lengths + [1 * si.seconds])
+    assert util.validator(si.meters.dimensions)(lengths)
+    assert util.args_of(si.meters.dimensions, *lengths)
+
+def test_first_invalid():
+    dims = si.meters.dimensions
+    values = [1 * si.meters, 2 * si.millimeters, 1 * si.seconds, 3 * si.meters]
+    assert util.first_invalid(dims, values) == 2
+    assert util.first_invalid(dims, tuple(values)) == 2
+    assert util.first_invalid(dims, iter(values)) == 2
+    assert util.first_invalid(dims, values[:2]) == -1
+    assert util.first_invalid(dims, []) == -1
+
+    lengths = QuantityArray(array.array('d', [1, 2]), si.meters)
+    assert util.first_invalid(dims, lengths) == -1
+    assert util.first_invalid(si.seconds.dimensions, lengths) == 0
+
+    with pytest.raises(AttributeError):
+        util.first_invalid(dims, [1.0])
+
+def test_valid_mask():
+    dims = si.meters.dimensions
+    values = [1 * si.meters, 1 * si.seconds, si.millimeters]
+    assert list(util.valid_mask(dims, values)) == [1, 0, 1]
+    assert list(util.valid_mask(dims, iter(values))) == [1, 0, 1]
+
+    lengths = QuantityArray(array.array('d', [1, 2]), si.meters)
+    assert list(util.valid_mask(dims, lengths)) == [1, 1]
+    assert list(util.valid_mask(si.seconds.dimensions, lengths)) == [0, 0]
+
+def test_record_schema():
+    schema = {
+        "mass": si.kilograms.dimensions,
+        "size": (si.meters ** 3).dimensions,
+        "time": si.seconds.dimensions,
+    }
+    record = {"mass": 10 * si.grams, "size": 1 * si.liters, "time": 1 * si.meters}
+    assert util.invalid_fields(schema, record) == ["time"]
+    assert not util.is_record_of(schema, record)
+
+    record["time"] = 1 * si.minutes
+    assert util.invalid_fields(schema, record) == []
+    assert util.record_validator(schema)(record)
+
+    del record["size"]
+    record["mass"] = 10
+    assert util.invalid_fields(schema, record) == ["mass", "size"]
+
+    class Record:
+        mass = 1 * si.kilograms
+        size = 1 * si.meters
+    assert util.invalid_fields(schema, Record()) == ["size", "time"]
+
+    with pytest.raises(TypeError):
+        util.invalid_fields({"mass": si.kilograms}, record)
+
+def test_converter_objects():
+    convert = converter(si.meters)
+    assert isinstance(convert.__self__, util.Converter)
+    assert convert.__self__.units == si.meters
+    assert not convert.__self__.promotes
+
+    value = 1.5 * si.meters
+    assert convert(value) is value
+
+    direct = util.Converter(si.meters, promotes=True)
+    assert direct(1500 * si.millimeters) == 1.5 * si.meters
+    assert direct(2) == 2 * si.meters
+    assert type(direct(2).q) is float
+    assert direct(math.inf).q == math.inf
+    assert repr(direct) == "Converter(%r, promotes=True)" % si.meters
+
+    with pytest.raises(TypeError):
+        direct(None)
+
+def test_validator_objects():
+    validate = util.validator(si.meters.dimensions)
+    assert isinstance(validate.__self__, util.Validator)
+    assert validate.__self__.dimensions == si.meters.dimensions
+    assert util.Validator(si.meters.dimensions)([1 * si.meters])
+    assert not util.Validator(si.meters.dimensions)([1 * si.seconds])
+
+    with pytest.raises(TypeError):
+        util.Validator(None)